@@ -1,125 +1,96 @@
-from neo4j import GraphDatabase
+import argparse
 import json
+import os
 import pandas as pd
 import random
+import shutil
+import tempfile
 from collections import Counter
 
+from graph_store import open_store
+
 # === 配置区 ===
 URI = "bolt://localhost:7687"
 AUTH = ("neo4j", "your password")  # ← 替换为你的密码
+GRAPH_BACKEND = "neo4j"  # neo4j、sqlite（json2neo4j.py --mode sqlite 写出的内嵌图）或 snapshot
+SQLITE_PATH = "kite_graph.db"
+SNAPSHOT_PATH = "kite_graph.snapshot"  # graph_snapshot.py export 导出的只读快照，多进程共享页缓存
 
 MAX_PATH_LENGTH = 6  # 已调整为6
 MIN_PATH_LENGTH = 3  # 已调整为3
-
-def fetch_node_full_properties(element_id):
+LAMBDA_VAL = 0  # 候选节点来自未访问过的文档时的额外权重（0 即均匀随机）
+WALK_BATCH_SIZE = 2000  # 同时推进的游走者数：每步一次批量入边查询，路径完成后一次批量取属性
+# 游走引擎：batched 按批查询图存储；csr 将入边一次性载入内存 CSR（图快照），多进程采样（见 csr_walk.py）
+WALK_ENGINE = "batched"
+WALKS_PER_NODE = 1  # 每个稀有节点的游走次数
+WALK_WORKERS = os.cpu_count() or 1  # csr 引擎的进程数
+RANDOM_SEED = None  # 固定种子可复现游走结果
+
+def store_path():
+    return SNAPSHOT_PATH if GRAPH_BACKEND == "snapshot" else SQLITE_PATH
+
+def fetch_node_full_properties(element_id, store):
     """
-    通过 elementId 字符串查询节点（兼容Neo4j 5.0+）
+    通过 elementId 字符串查询节点（兼容Neo4j 5.0+；SQLite 后端为节点行号字符串）
     element_id 格式: "4:9980e3d8-5b1d-4799-8699-0cb685a7019f:11257"（与CSV中element_id一致）
     """
-    with GraphDatabase.driver(URI, auth=AUTH) as driver:
-        with driver.session() as session:
-            res = session.run("""
-                MATCH (n)
-                WHERE elementId(n) = $element_id
-                RETURN 
-                    elementId(n) AS element_id,
-                    labels(n) AS labels,
-                    properties(n) AS properties
-            """, element_id=element_id)  # 直接使用字符串，不转换
-            record = res.single()
-            if not record:
-                return None
-            
-            properties = record["properties"] or {}
-            
-            return {
-                "element_id": record["element_id"],
-                "labels": list(record["labels"]) if record["labels"] else [],
-                "properties": properties
-            }
-
-def get_path_with_full_info(rare_element_id):
-    """
-    从稀有节点反向游走（使用 elementId 字符串作为标识）
-    """
-    visited = {rare_element_id}  # 存储 elementId 字符串
-    path_nodes = []
-    path_relations = []
-
-    # 获取稀有节点（终点）
-    rare_node = fetch_node_full_properties(rare_element_id)
-    if not rare_node:
-        return None
-    path_nodes.append(rare_node)
-    current_element_id = rare_element_id
-
-    # 记录已访问的文档ID
-    visited_doc_ids = set()
-    doc_id = rare_node["properties"].get("document_id")
-    if doc_id:
-        visited_doc_ids.add(doc_id)
-
-    # 反向游走（最多5步，因为MAX_PATH_LENGTH=6）
-    for _ in range(MAX_PATH_LENGTH - 1):
-        with GraphDatabase.driver(URI, auth=AUTH) as driver:
-            with driver.session() as session:
-                query = """
-                MATCH (prev)-[r]->(curr)
-                WHERE elementId(curr) = $current_element_id 
-                  AND NOT (elementId(prev) IN $visited)
-                RETURN 
-                    elementId(prev) AS source_id,
-                    prev.document_id AS doc_id,
-                    type(r) AS rel_type
-                """
-                result = session.run(
-                    query,
-                    current_element_id=current_element_id,
-                    visited=list(visited)
-                )
-                candidates = []
-                for rec in result:
-                    candidates.append({
-                        "source_id": rec["source_id"],
-                        "doc_id": rec["doc_id"],
-                        "rel_type": rec["rel_type"]
-                    })
-
+    return store.get_node(element_id)
+
+# 单个游走者的状态：当前节点、已访问节点/文档、已选的反向步 (起点 elementId, 关系类型)
+class Walker:
+    __slots__ = ("rare_node", "current", "visited", "visited_doc_ids", "steps", "active")
+
+    def __init__(self, rare_node):
+        self.rare_node = rare_node
+        self.current = rare_node["element_id"]
+        self.visited = {self.current}  # 存储 elementId 字符串
+        self.visited_doc_ids = set()
+        doc_id = rare_node["properties"].get("document_id")
+        if doc_id:
+            self.visited_doc_ids.add(doc_id)
+        self.steps = []
+        self.active = True
+
+    def advance(self, candidates):
         if not candidates:
-            break
+            self.active = False
+            return
 
-        # 计算权重
+        # 计算权重：来自未访问文档的候选额外加 LAMBDA_VAL
         weights = []
-        lambda_val = 0
         for cand in candidates:
             w = 1.0
-            if cand["doc_id"] and cand["doc_id"] not in visited_doc_ids:
-                w += lambda_val
+            if cand["doc_id"] and cand["doc_id"] not in self.visited_doc_ids:
+                w += LAMBDA_VAL
             weights.append(w)
 
         # 加权随机选择
         chosen = random.choices(candidates, weights=weights, k=1)[0]
-        chosen_source_id = chosen["source_id"]
-        chosen_rel_type = chosen["rel_type"]
-        chosen_doc_id = chosen["doc_id"]
+        self.steps.append((chosen["source_id"], chosen["rel_type"]))
+        self.visited.add(chosen["source_id"])
+        if chosen["doc_id"]:
+            self.visited_doc_ids.add(chosen["doc_id"])
+        self.current = chosen["source_id"]
 
-        # 获取新节点
-        new_node = fetch_node_full_properties(chosen_source_id)
-        if not new_node:
-            continue
 
-        # 添加到路径开头
-        path_nodes.insert(0, new_node)
+def build_path(walker, nodes):
+    """
+    由游走步骤组装路径（节点从起点到稀有节点）；中途节点已被删除时只保留其后靠近稀有节点的一段
+    """
+    path_nodes = [walker.rare_node]
+    path_relations = []
+    target_id = walker.rare_node["element_id"]
+    for source_id, rel_type in walker.steps:
+        node = nodes.get(source_id)
+        if node is None:
+            break
+        path_nodes.insert(0, node)
         path_relations.insert(0, {
-            "type": chosen_rel_type,
-            "source_id": chosen_source_id,
-            "target_id": current_element_id
+            "type": rel_type,
+            "source_id": source_id,
+            "target_id": target_id
         })
-
-        visited.add(chosen_source_id)
-        if chosen_doc_id:
-            visited_doc_ids.add(chosen_doc_id)
-        current_element_id = chosen_source_id
+        target_id = source_id
 
     if len(path_nodes) < MIN_PATH_LENGTH:
         return None
@@ -131,10 +102,65 @@ def get_path_with_full_info(rare_element_id):
         "path_length": len(path_nodes)
     }
 
+
+def walk_batch(rare_element_ids, store):
+    """
+    一批稀有节点同时反向游走：所有游走者逐步一起推进，每步一次批量入边查询；
+    节点属性只在游走结束后为够长的路径批量获取一次。返回与输入对齐的路径（不足 MIN_PATH_LENGTH 为 None）
+    往返次数约为 1（稀有节点）+ (MAX_PATH_LENGTH - 1)（各步）+ 1（路径节点属性）
+    """
+    rare_nodes = store.get_nodes(rare_element_ids)
+    walkers = [Walker(rare_nodes[eid]) if eid in rare_nodes else None for eid in rare_element_ids]
+
+    # 反向游走（最多5步，因为MAX_PATH_LENGTH=6）
+    for _ in range(MAX_PATH_LENGTH - 1):
+        active = [w for w in walkers if w is not None and w.active]
+        if not active:
+            break
+        frontier = [(w.current, w.visited) for w in active]
+        for walker, candidates in zip(active, store.in_neighbors_batch(frontier)):
+            walker.advance(candidates)
+
+    complete = [w for w in walkers if w is not None and len(w.steps) + 1 >= MIN_PATH_LENGTH]
+    nodes = store.get_nodes({source_id for w in complete for source_id, _ in w.steps})
+    return [build_path(w, nodes) if w is not None else None for w in walkers]
+
+
+def get_path_with_full_info(rare_element_id, store):
+    """
+    从稀有节点反向游走（使用 elementId 字符串作为标识）
+    """
+    return walk_batch([rare_element_id], store)[0]
+
+def generate_paths_csr(rare_element_ids, output_file):
+    """csr 引擎：snapshot 后端直接使用快照，其他后端先导出到临时快照目录"""
+    from csr_walk import run_walks
+    from graph_snapshot import export_from_neo4j, export_from_sqlite
+
+    tmp_dir = None
+    snapshot_path = SNAPSHOT_PATH
+    try:
+        if GRAPH_BACKEND != "snapshot":
+            tmp_dir = tempfile.mkdtemp(prefix="kite_walk_")
+            snapshot_path = os.path.join(tmp_dir, "graph.snapshot")
+            if GRAPH_BACKEND == "neo4j":
+                meta = export_from_neo4j(URI, AUTH, snapshot_path)
+            else:
+                meta = export_from_sqlite(SQLITE_PATH, snapshot_path)
+            print(f"  已载入入边 CSR: {meta['num_nodes']} 个节点，{meta['num_edges']} 条边")
+        return run_walks(
+            snapshot_path, rare_element_ids, output_file,
+            walks_per_node=WALKS_PER_NODE, seed=RANDOM_SEED, workers=WALK_WORKERS,
+            max_length=MAX_PATH_LENGTH, min_length=MIN_PATH_LENGTH, lambda_val=LAMBDA_VAL,
+        )
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
 def generate_paths_jsonl():
     """主函数：生成包含全部节点属性的JSONL文件（使用elementId字符串查询）"""
     # 1. 从CSV读取稀有节点（直接使用elementId字符串）
-    df_rare = pd.read_csv("rare_nodes.csv", encoding='utf-8-sig')
+    df_rare = pd.read_csv("rare_nodes.csv", encoding='utf-8-sig', dtype={"element_id": str})
     rare_element_ids = df_rare["element_id"].tolist()  # 保持字符串格式
 
     output_file = "sft_paths_full.jsonl"
@@ -144,24 +170,37 @@ def generate_paths_jsonl():
     print(f" 开始生成路径（使用elementId字符串查询，兼容Neo4j 5.0+）...")
     print(f"  读取 {len(rare_element_ids)} 个稀有节点（格式: 4:uuid:11257）")
 
-    with open(output_file, "w", encoding="utf-8") as f_out:
-        for i, element_id in enumerate(rare_element_ids):
+    if WALK_ENGINE == "csr":
+        path_length_counts = generate_paths_csr(rare_element_ids, output_file)
+        valid_count = sum(path_length_counts.values())
+    else:
+        random.seed(RANDOM_SEED)
+        rare_element_ids = [eid for eid in rare_element_ids for _ in range(WALKS_PER_NODE)]
+        valid_count = walk_to_file(rare_element_ids, output_file, path_length_counts)
+    print_summary(valid_count, path_length_counts, output_file)
+
+def walk_to_file(rare_element_ids, output_file, path_length_counts):
+    valid_count = 0
+    with open_store(GRAPH_BACKEND, URI, AUTH, store_path()) as store, \
+            open(output_file, "w", encoding="utf-8") as f_out:
+        for start in range(0, len(rare_element_ids), WALK_BATCH_SIZE):
             # 直接传递字符串，不进行任何转换
-            path_data = get_path_with_full_info(element_id)
-            
-            if path_data is None:
-                continue
+            batch = rare_element_ids[start:start + WALK_BATCH_SIZE]
+            for path_data in walk_batch(batch, store):
+                if path_data is None:
+                    continue
 
-            # 统计链路长度
-            path_length_counts[path_data['path_length']] += 1
+                # 统计链路长度
+                path_length_counts[path_data['path_length']] += 1
 
-            # 写入JSONL
-            f_out.write(json.dumps(path_data, ensure_ascii=False) + "\n")
-            valid_count += 1
+                # 写入JSONL
+                f_out.write(json.dumps(path_data, ensure_ascii=False) + "\n")
+                valid_count += 1
 
-            if (i + 1) % 50 == 0:
-                print(f"  处理进度: {i+1}/{len(rare_element_ids)} | 有效路径: {valid_count}")
+            print(f"  处理进度: {start + len(batch)}/{len(rare_element_ids)} | 有效路径: {valid_count}")
+    return valid_count
 
+def print_summary(valid_count, path_length_counts, output_file):
     print(f"\n✅ 完成！生成 {valid_count} 条路径，保存至: {output_file}")
     print("   无任何Neo4j警告（已使用elementId字符串查询）")
     print("   路径中每个节点包含: element_id, labels, properties（所有自定义属性）")
@@ -186,4 +225,16 @@ def generate_paths_jsonl():
         
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从稀有节点反向游走生成跨文档路径")
+    parser.add_argument("--backend", choices=("neo4j", "sqlite", "snapshot"), default=GRAPH_BACKEND)
+    parser.add_argument("--sqlite-path", default=SQLITE_PATH)
+    parser.add_argument("--snapshot-path", default=SNAPSHOT_PATH)
+    parser.add_argument("--engine", choices=("batched", "csr"), default=WALK_ENGINE,
+                        help="batched: 按批查询图存储; csr: 入边载入内存 CSR 后多进程采样")
+    parser.add_argument("--walks-per-node", type=int, default=WALKS_PER_NODE)
+    parser.add_argument("--workers", type=int, default=WALK_WORKERS, help="csr 引擎的进程数")
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED)
+    args = parser.parse_args()
+    GRAPH_BACKEND, SQLITE_PATH, SNAPSHOT_PATH = args.backend, args.sqlite_path, args.snapshot_path
+    WALK_ENGINE, WALKS_PER_NODE, WALK_WORKERS, RANDOM_SEED = args.engine, args.walks_per_node, args.workers, args.seed
     generate_paths_jsonl()
@@ -0,0 +1,234 @@
+# 内存 CSR 反向游走采样：在图快照（graph_snapshot）的入边 CSR 上执行与 cross_doc_walk 相同的加权反向游走
+# - 候选为当前节点的全部入边（平行边各算一个候选），起点已在路径中的排除；
+#   起点 document_id 未出现在路径已访问文档中的候选权重为 1 + lambda_val，其余为 1
+# - 一批游走者逐步同时推进：按入边均匀抽样 + 按权重接受（拒绝采样，分布与逐个加权选择一致），
+#   多轮仍未接受的游走者（候选大多已访问）改为精确计算权重后抽样
+# - 游走按 WALK_CHUNK_SIZE 分块分发到进程池，每块使用 SeedSequence.spawn 派生的独立随机流，
+#   结果只取决于种子，与进程数无关；各进程以 mmap 打开同一快照，共享页缓存
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from graph_snapshot import load_snapshot
+
+# === 配置区 ===
+MAX_PATH_LENGTH = 6
+MIN_PATH_LENGTH = 3
+LAMBDA_VAL = 0  # 候选节点来自未访问过的文档时的额外权重（0 即均匀随机）
+WALK_CHUNK_SIZE = 20000  # 每个任务（一个独立随机流）的游走数
+WALK_WORKERS = os.cpu_count() or 1
+MAX_REJECTION_ROUNDS = 8  # 拒绝采样轮数，之后剩余的游走者逐个精确抽样
+
+
+def _step_weights(docs: np.ndarray, path_docs: np.ndarray, visited: np.ndarray, lambda_val: float) -> np.ndarray:
+    new_doc = (docs >= 0) & ~(path_docs == docs[:, None]).any(axis=1)
+    weights = np.where(new_doc, 1.0 + lambda_val, 1.0)
+    weights[visited] = 0.0
+    return np.maximum(weights, 0.0)
+
+
+def sample_walks(
+    snap,
+    starts: np.ndarray,
+    rng: np.random.Generator,
+    max_length: int = MAX_PATH_LENGTH,
+    lambda_val: float = LAMBDA_VAL,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    从 starts（快照节点下标）反向游走。返回 (nodes, types, lengths)：
+    nodes[w, k] 为第 w 条游走第 k 步到达的节点（第 0 列为起点，-1 表示未到达），
+    types[w, k] 为 nodes[w, k+1] -> nodes[w, k] 的关系类型码，lengths 为路径节点数
+    """
+    indptr = np.asarray(snap.in_indptr)
+    indices = np.asarray(snap.in_indices)
+    in_types = np.asarray(snap.in_types)
+    node_doc = np.asarray(snap.node_doc)
+    w_max = max(1.0, 1.0 + lambda_val)
+
+    n = len(starts)
+    nodes = np.full((n, max_length), -1, dtype=np.int64)
+    types = np.full((n, max(max_length - 1, 0)), -1, dtype=np.int64)
+    nodes[:, 0] = starts
+    lengths = np.ones(n, dtype=np.int64)
+    active = np.arange(n)
+
+    for step in range(max_length - 1):
+        cur = nodes[active, step]
+        begin = indptr[cur]
+        deg = indptr[cur + 1] - begin
+        active, begin, deg = active[deg > 0], begin[deg > 0], deg[deg > 0]
+        chosen = np.full(len(active), -1, dtype=np.int64)  # 选中的入边下标
+
+        # 拒绝采样：均匀取一条入边，以 权重 / 最大权重 的概率接受
+        pending = np.arange(len(active))
+        for _ in range(MAX_REJECTION_ROUNDS):
+            if not len(pending):
+                break
+            walkers = active[pending]
+            edge = begin[pending] + (rng.random(len(pending)) * deg[pending]).astype(np.int64)
+            src = indices[edge]
+            path = nodes[walkers, : step + 1]
+            visited = (path == src[:, None]).any(axis=1)
+            weights = _step_weights(node_doc[src], node_doc[path], visited, lambda_val)
+            accept = rng.random(len(pending)) * w_max < weights
+            chosen[pending[accept]] = edge[accept]
+            pending = pending[~accept]
+
+        # 精确抽样：列出全部候选入边计算权重；没有可选候选的游走在此结束
+        for i in pending.tolist():
+            walker = active[i]
+            edges = np.arange(begin[i], begin[i] + deg[i])
+            src = indices[edges]
+            path = nodes[walker, : step + 1]
+            visited = np.isin(src, path)
+            weights = _step_weights(
+                node_doc[src], np.broadcast_to(node_doc[path], (len(src), len(path))), visited, lambda_val
+            )
+            total = weights.sum()
+            if total > 0:
+                chosen[i] = edges[np.searchsorted(np.cumsum(weights), rng.random() * total, side="right")]
+
+        moved = chosen >= 0
+        active, edge = active[moved], chosen[moved]
+        if not len(active):
+            break
+        nodes[active, step + 1] = indices[edge]
+        types[active, step] = in_types[edge]
+        lengths[active] += 1
+
+    return nodes, types, lengths
+
+
+# 与 GraphStore.get_node 相同的节点结构；一条路径内重复解码的节点按块缓存
+def _node_json(snap, idx: int, cache: Dict[int, dict]) -> dict:
+    node = cache.get(idx)
+    if node is None:
+        node = {"element_id": snap.element_id(idx), "labels": [snap.label(idx)], "properties": snap.properties(idx)}
+        cache[idx] = node
+    return node
+
+
+# 组装与 cross_doc_walk 相同的 JSONL 行：节点从最远起点到稀有节点
+def path_records(snap, nodes: np.ndarray, types: np.ndarray, lengths: np.ndarray, min_length: int = MIN_PATH_LENGTH):
+    cache: Dict[int, dict] = {}
+    for w in np.flatnonzero(lengths >= min_length).tolist():
+        length = int(lengths[w])
+        row = nodes[w, :length][::-1].tolist()
+        rel_types = types[w, : length - 1][::-1].tolist()
+        path_nodes = [_node_json(snap, idx, cache) for idx in row]
+        path_relations = [
+            {"type": snap.edge_types[t], "source_id": path_nodes[k]["element_id"], "target_id": path_nodes[k + 1]["element_id"]}
+            for k, t in enumerate(rel_types)
+        ]
+        yield {
+            "path_nodes": path_nodes,
+            "path_relations": path_relations,
+            "rare_node": path_nodes[-1],
+            "path_length": length,
+        }
+
+
+# ---------------- 进程池 ----------------
+
+_worker_snapshot = None
+
+
+def _init_worker(snapshot_path: str):
+    global _worker_snapshot
+    _worker_snapshot = load_snapshot(snapshot_path)
+
+
+def _walk_chunk(task) -> Tuple[List[str], Counter]:
+    starts, seed_seq, max_length, min_length, lambda_val = task
+    snap = _worker_snapshot
+    rng = np.random.default_rng(seed_seq)
+    nodes, types, lengths = sample_walks(snap, starts, rng, max_length, lambda_val)
+    lines, counts = [], Counter()
+    for record in path_records(snap, nodes, types, lengths, min_length):
+        lines.append(json.dumps(record, ensure_ascii=False))
+        counts[record["path_length"]] += 1
+    return lines, counts
+
+
+def run_walks(
+    snapshot_path: str,
+    start_element_ids: List[str],
+    output_file: str,
+    walks_per_node: int = 1,
+    seed: int | None = None,
+    workers: int = WALK_WORKERS,
+    max_length: int = MAX_PATH_LENGTH,
+    min_length: int = MIN_PATH_LENGTH,
+    lambda_val: float = LAMBDA_VAL,
+) -> Counter:
+    """
+    对每个起点执行 walks_per_node 次游走，按起点顺序把够长的路径写入 output_file；返回 路径长度 -> 条数
+    """
+    global _worker_snapshot
+    snap = load_snapshot(snapshot_path)
+    indexed = [snap.index_of(eid) for eid in start_element_ids]
+    missing = sum(idx is None for idx in indexed)
+    if missing:
+        print(f"  {missing} 个起点不在快照中，已跳过")
+    starts = np.repeat(np.array([idx for idx in indexed if idx is not None], dtype=np.int64), walks_per_node)
+
+    chunks = [starts[i : i + WALK_CHUNK_SIZE] for i in range(0, len(starts), WALK_CHUNK_SIZE)]
+    streams = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(chunk, ss, max_length, min_length, lambda_val) for chunk, ss in zip(chunks, streams)]
+
+    counts: Counter = Counter()
+    done = 0
+    with open(output_file, "w", encoding="utf-8") as f_out:
+        if workers <= 1 or len(tasks) <= 1:
+            _worker_snapshot = snap
+            results = map(_walk_chunk, tasks)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(snapshot_path,))
+            results = executor.map(_walk_chunk, tasks)
+        try:
+            for i, (chunk, (lines, chunk_counts)) in enumerate(zip(chunks, results)):
+                if lines:
+                    f_out.write("\n".join(lines) + "\n")
+                counts.update(chunk_counts)
+                done += len(chunk)
+                if (i + 1) % 10 == 0 or i + 1 == len(chunks):
+                    print(f"  处理进度: {done}/{len(starts)} | 有效路径: {sum(counts.values())}")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    return counts
+
+
+# ---------------- 基准测试 ----------------
+
+def benchmark(snapshot_path: str, num_walks: int, workers: int, seed: int = 0):
+    snap = load_snapshot(snapshot_path)
+    starts = np.random.default_rng(seed).integers(0, snap.num_nodes, size=num_walks)
+    started = time.perf_counter()
+    nodes, types, lengths = sample_walks(snap, starts, np.random.default_rng(seed))
+    elapsed = time.perf_counter() - started
+    print(f"单进程采样 {num_walks} 次游走: {elapsed:.2f}s（{num_walks / elapsed:,.0f} 次/秒），"
+          f"平均路径长度 {lengths.mean():.2f}")
+    started = time.perf_counter()
+    ids = [snap.element_id(int(i)) for i in starts]
+    counts = run_walks(snapshot_path, ids, os.devnull, seed=seed, workers=workers)
+    elapsed = time.perf_counter() - started
+    print(f"{workers} 个进程采样并输出 JSONL: {elapsed:.2f}s（{num_walks / elapsed:,.0f} 次/秒），"
+          f"有效路径 {sum(counts.values())}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="在图快照上做内存 CSR 反向游走基准测试")
+    parser.add_argument("snapshot")
+    parser.add_argument("--walks", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=WALK_WORKERS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.snapshot, args.walks, args.workers, args.seed)
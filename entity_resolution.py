@@ -0,0 +1,310 @@
+# 实体消歧：在图谱导入前把同一实体的不同写法归并到一个规范名
+# 1. 表层规范化：NFKC（全角转半角）、去书名号/引号、去常见前缀（如“中华人民共和国”）
+#    规范化后相同的名字直接归为一组
+# 2. 同一标签内对规范化名字的字符 n-gram 做 MinHash + LSH 分桶，只比较同桶候选（避免 O(n²)），
+#    Jaccard 相似度达到阈值、且序号/编号一致的用并查集合并（“第一百二十条”与“第一百二十一条”、
+#    “解释（一）”与“解释（二）”只差一个编号，Jaccard 很高但是不同的法律/条文）
+# 3. 每组选出现次数最多的原始写法作为规范名（次数相同取最长），输出 (标签, 原名) -> 规范名 映射；
+#    映射按标签隔离，同一写法在不同标签下各自归入本标签的规范名
+import argparse
+import json
+import re
+import unicodedata
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# === 配置区 ===
+NGRAM_SIZE = 2  # 字符 n-gram 长度
+NUM_PERM = 64  # MinHash 签名长度
+LSH_BANDS = 16  # LSH 分段数（每段 NUM_PERM // LSH_BANDS 行），相似度约 (1/b)^(1/r) 以上的名字大概率同桶
+JACCARD_THRESHOLD = 0.8  # 候选对的 n-gram Jaccard 相似度阈值
+MAX_BUCKET_SIZE = 200  # 过大的桶（高频 n-gram 组合）只与桶内首个名字比较，避免退化为两两比较
+MIN_KEY_LENGTH = 2  # 去前缀后短于此长度则保留前缀，避免“中华人民共和国”本身被清空
+COMMON_PREFIXES = ("中华人民共和国", "中国")
+STRIP_CHARS = "《》〈〉「」『』“”‘’\"'<>"
+MAPPING_VERSION = 2  # 映射文件格式版本；v2 起按标签保存
+
+# 序号/编号：阿拉伯数字；第…条/款/项等、括号内、修正案后的中文数字
+_CN_DIGITS = "零〇一二两三四五六七八九"
+_CN_NUMERAL = f"[{_CN_DIGITS}十百千万]+"
+_NUMBER_RE = re.compile(
+    rf"\d+|第({_CN_NUMERAL})|\(({_CN_NUMERAL})\)|修正案({_CN_NUMERAL})|({_CN_NUMERAL})[条款项章节编目]"
+)
+_CN_DIGIT_VALUES = {ch: i for i, ch in enumerate("零一二三四五六七八九")} | {"〇": 0, "两": 2}
+_CN_UNITS = {"十": 10, "百": 100, "千": 1000}
+
+# MinHash 哈希族 h(x) = (a * x + b) mod p，p 为大于 2^32 的素数，uint64 运算不溢出
+_MINHASH_PRIME = np.uint64(4294967311)
+
+
+def normalize_surface(name: str, prefixes: Iterable[str] = COMMON_PREFIXES) -> str:
+    key = unicodedata.normalize("NFKC", name)
+    key = "".join(ch for ch in key if ch not in STRIP_CHARS and not ch.isspace())
+    for prefix in prefixes:
+        if key.startswith(prefix) and len(key) - len(prefix) >= MIN_KEY_LENGTH:
+            key = key[len(prefix) :]
+            break
+    return key.lower()
+
+
+# 中文数字转整数：一百二十一 -> 121，十二 -> 12；不含单位的按位读（二〇二一 -> 2021）
+def chinese_numeral(text: str) -> int:
+    if not any(ch in _CN_UNITS or ch == "万" for ch in text):
+        return int("".join(str(_CN_DIGIT_VALUES[ch]) for ch in text))
+    total, section, digit = 0, 0, 0
+    for ch in text:
+        if ch == "万":
+            total += (section + digit) * 10000
+            section, digit = 0, 0
+        elif ch in _CN_UNITS:
+            section += (digit or 1) * _CN_UNITS[ch]
+            digit = 0
+        else:
+            digit = _CN_DIGIT_VALUES[ch]
+    return total + section + digit
+
+
+# 规范化名字中的序号/编号（按出现顺序，中文数字转为整数）；编号不同的名字不合并
+def numeric_tokens(key: str) -> Tuple[int, ...]:
+    numbers = []
+    for m in _NUMBER_RE.finditer(key):
+        cn = next((g for g in m.groups() if g), None)
+        numbers.append(chinese_numeral(cn) if cn else int(m.group()))
+    return tuple(numbers)
+
+
+def char_ngrams(text: str, n: int = NGRAM_SIZE) -> set:
+    if len(text) <= n:
+        return {text}
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, shingles: set) -> np.ndarray:
+        x = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((self.a * x + self.b) % _MINHASH_PRIME).min(axis=1)
+
+
+class EntityResolver:
+    def __init__(
+        self,
+        ngram_size: int = NGRAM_SIZE,
+        num_perm: int = NUM_PERM,
+        bands: int = LSH_BANDS,
+        threshold: float = JACCARD_THRESHOLD,
+        prefixes: Iterable[str] = COMMON_PREFIXES,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm 必须是 bands 的整数倍")
+        self.ngram_size = ngram_size
+        self.bands = bands
+        self.threshold = threshold
+        self.prefixes = tuple(prefixes)
+        self.hasher = MinHasher(num_perm, seed)
+        # 标签 -> 原始名字 -> 出现次数
+        self.counts: Dict[str, Counter] = defaultdict(Counter)
+        self.mapping: Dict[Tuple[str, str], str] = {}
+        self.clusters: List[Tuple[str, str, List[str]]] = []
+        # 标签 -> 规范化键 -> 规范名
+        self._key_index: Dict[str, Dict[str, str]] = defaultdict(dict)
+
+    def add(self, label: str, name: str, count: int = 1):
+        self.counts[label][name] += count
+
+    # 对每个标签分别聚类，生成映射
+    def build(self) -> "EntityResolver":
+        self.mapping = {}
+        self.clusters = []
+        self._key_index = defaultdict(dict)
+        for label, counts in self.counts.items():
+            keys = self._key_index[label]
+            for members in self._cluster_label(counts):
+                canonical = max(members, key=lambda n: (counts[n], len(n), n))
+                for name in members:
+                    keys.setdefault(normalize_surface(name, self.prefixes), canonical)
+                    if name != canonical:
+                        self.mapping[(label, name)] = canonical
+                if len(members) > 1:
+                    self.clusters.append((label, canonical, sorted(members)))
+        return self
+
+    def _cluster_label(self, counts: Counter) -> List[List[str]]:
+        # 规范化后相同的名字先归为一组，LSH 只在不同的规范化键之间进行
+        by_key: Dict[str, List[str]] = defaultdict(list)
+        for name in counts:
+            by_key[normalize_surface(name, self.prefixes)].append(name)
+        keys = list(by_key)
+        uf = UnionFind(len(keys))
+
+        shingles = [char_ngrams(k, self.ngram_size) for k in keys]
+        numbers = [numeric_tokens(k) for k in keys]
+        rows = self.hasher.a.shape[0] // self.bands
+        buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        for i, sh in enumerate(shingles):
+            if len(keys[i]) <= self.ngram_size:
+                continue  # 过短的名字只做精确匹配
+            sig = self.hasher.signature(sh)
+            for band in range(self.bands):
+                buckets[(band, sig[band * rows : (band + 1) * rows].tobytes())].append(i)
+
+        seen = set()
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) > MAX_BUCKET_SIZE:
+                pairs = ((members[0], j) for j in members[1:])
+            else:
+                pairs = ((members[x], members[y]) for x in range(len(members)) for y in range(x + 1, len(members)))
+            for i, j in pairs:
+                if (i, j) in seen or uf.find(i) == uf.find(j):
+                    continue
+                seen.add((i, j))
+                if numbers[i] != numbers[j]:
+                    continue
+                if jaccard(shingles[i], shingles[j]) >= self.threshold:
+                    uf.union(i, j)
+
+        groups: Dict[int, List[str]] = defaultdict(list)
+        for i, key in enumerate(keys):
+            groups[uf.find(i)].extend(by_key[key])
+        return list(groups.values())
+
+    # (标签, 原名) -> 规范名；该标签下未见过的写法按规范化键匹配，仍找不到时原样返回
+    def canonical(self, label: str, name: str) -> str:
+        mapped = self.mapping.get((label, name))
+        if mapped is not None:
+            return mapped
+        keys = self._key_index.get(label)
+        if not keys:
+            return name
+        return keys.get(normalize_surface(name, self.prefixes), name)
+
+    # 标签未知的名字（如只作为关系端点出现、不在标签索引中）：规范化键只在一个标签下出现时返回 (标签, 规范名)
+    def lookup(self, name: str) -> Tuple[str, str] | None:
+        key = normalize_surface(name, self.prefixes)
+        found = [(label, keys[key]) for label, keys in self._key_index.items() if key in keys]
+        return found[0] if len(found) == 1 else None
+
+    def save(self, path: str):
+        mapping: Dict[str, Dict[str, str]] = defaultdict(dict)
+        for (label, name), canonical in self.mapping.items():
+            mapping[label][name] = canonical
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": MAPPING_VERSION,
+                    "mapping": mapping,
+                    "keys": self._key_index,
+                    "prefixes": list(self.prefixes),
+                    "clusters": [{"label": l, "canonical": c, "members": m} for l, c, m in self.clusters],
+                },
+                f,
+                ensure_ascii=False,
+                indent=1,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "EntityResolver":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MAPPING_VERSION:
+            raise ValueError(f"{path}: 映射文件版本 {data.get('version')} 不含标签信息，请重新生成")
+        resolver = cls(prefixes=data.get("prefixes", COMMON_PREFIXES))
+        resolver.mapping = {
+            (label, name): canonical for label, names in data["mapping"].items() for name, canonical in names.items()
+        }
+        resolver._key_index = defaultdict(dict, data.get("keys", {}))
+        resolver.clusters = [(c["label"], c["canonical"], c["members"]) for c in data.get("clusters", [])]
+        return resolver
+
+
+# 回归检查：(写法 A, 写法 B, 是否应合并)
+REGRESSION_PAIRS = (
+    ("最高人民法院关于审理刑事案件适用法律若干问题的解释（一）", "最高人民法院关于审理刑事案件适用法律若干问题的解释（二）", False),
+    (
+        "最高人民法院关于适用《中华人民共和国刑事诉讼法》的解释第一百二十条",
+        "最高人民法院关于适用《中华人民共和国刑事诉讼法》的解释第一百二十一条",
+        False,
+    ),
+    ("中华人民共和国刑法修正案（十一）", "中华人民共和国刑法修正案（十二）", False),
+    ("《中华人民共和国刑法》", "中华人民共和国刑法", True),
+    ("最高人民法院关于审理刑事案件适用法律若干问题的解释（一）", "最高人民法院关于审理刑事案件适用法律若干问题解释（一）", True),
+)
+
+
+def self_check() -> bool:
+    ok = True
+    for a, b, expected in REGRESSION_PAIRS:
+        resolver = EntityResolver()
+        resolver.add("法律", a)
+        resolver.add("法律", b)
+        resolver.build()
+        merged = resolver.canonical("法律", a) == resolver.canonical("法律", b)
+        if merged != expected:
+            ok = False
+        print(f"{'通过' if merged == expected else '失败'}: {a} / {b} -> {'合并' if merged else '不合并'}")
+    return ok
+
+
+def main():
+    # 延迟导入，避免 json2neo4j 导入本模块时形成循环
+    from json2neo4j import entity_key, iter_items
+
+    parser = argparse.ArgumentParser(description="抽取结果实体消歧，输出 (标签, 原名) -> 规范名 映射")
+    parser.add_argument("--data", help="抽取结果 JSON / JSONL 文件")
+    parser.add_argument("--out", default="canonical_names.json", help="映射输出文件")
+    parser.add_argument("--threshold", type=float, default=JACCARD_THRESHOLD, help="n-gram Jaccard 阈值")
+    parser.add_argument("--self-check", action="store_true", help="只运行回归检查（编号不同的条文/解释不应合并）")
+    args = parser.parse_args()
+    if args.self_check:
+        raise SystemExit(0 if self_check() else 1)
+    if not args.data:
+        parser.error("需要 --data")
+
+    resolver = EntityResolver(threshold=args.threshold)
+    for item in iter_items(args.data):
+        key = entity_key(item)
+        if key is not None:
+            resolver.add(*key)
+    resolver.build()
+    resolver.save(args.out)
+
+    total = sum(len(c) for c in resolver.counts.values())
+    print(f"实体名 {total} 个，归并 {len(resolver.mapping)} 个到 {len(resolver.clusters)} 个规范名，映射已写入 {args.out}")
+    for label, canonical, members in sorted(resolver.clusters, key=lambda c: -len(c[2]))[:20]:
+        print(f"  [{label}] {canonical} <- {', '.join(m for m in members if m != canonical)}")
+
+
+if __name__ == "__main__":
+    main()
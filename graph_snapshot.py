@@ -0,0 +1,404 @@
+# 图快照：只读、可内存映射的紧凑图格式，供 rare_node / cross_doc_walk 反复读取而不必访问 Neo4j
+# 目录结构（版本 FORMAT_VERSION）：
+#   meta.json             格式名、版本、节点/边数、标签与关系类型码表
+#   out_indptr.npy        出边 CSR 行指针 (int64, n+1)；out_indices/out_types 为终点与关系类型码
+#   in_indptr.npy         入边 CSR 行指针 (int64, n+1)；in_indices/in_types 为起点与关系类型码
+#   node_label.npy        节点标签码 (uint16)
+#   node_flags.npy        节点标记位 (uint8)：bit0 有 detailed_definition，bit1 有 function
+#   node_element_id.npy   element_id 在字符串表中的编号 (int64)
+#   node_name.npy         name 的字符串编号 (int64，-1 表示无)
+#   node_doc.npy          document_id 的字符串编号 (int64，-1 表示无)
+#   node_doc_count.npy    节点出现过的文档数 (uint32，取 document_ids，缺省时按 document_id 计 0/1)；v2 起
+#   strings.bin / strings_offsets.npy   字符串表：UTF-8 拼接 + 偏移 (int64, m+1)
+#   props.bin / props_offsets.npy       每个节点属性的 JSON，按偏移索引 (int64, n+1)
+# 所有数组以 np.load(mmap_mode="r") 打开，加载只读元数据，多个进程可共享同一份页缓存
+import argparse
+import json
+import os
+import shutil
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from graph_store import GraphStore
+
+FORMAT_NAME = "kite-graph-snapshot"
+FORMAT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+FLAG_HAS_DEF = 1
+FLAG_HAS_FUNC = 2
+
+
+# 字符串表：相同字符串只存一份
+class _StringTable:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.offsets = array("q", [0])
+        self.chunks: List[bytes] = []
+
+    def add(self, s) -> int:
+        if s is None:
+            return -1
+        s = str(s)
+        sid = self.ids.get(s)
+        if sid is None:
+            data = s.encode("utf-8")
+            sid = self.ids[s] = len(self.chunks)
+            self.chunks.append(data)
+            self.offsets.append(self.offsets[-1] + len(data))
+        return sid
+
+
+def _csr(rows: np.ndarray, cols: np.ndarray, types: np.ndarray, n: int):
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order].astype(np.int64), types[order]
+
+
+def _node_flags(props: Dict[str, Any]) -> int:
+    flags = 0
+    if (props.get("detailed_definition") or "") != "":
+        flags |= FLAG_HAS_DEF
+    if (props.get("function") or "") != "":
+        flags |= FLAG_HAS_FUNC
+    return flags
+
+
+# 写出快照。nodes 逐个给出 (element_id, label, properties, [(终点 element_id, 关系类型), ...])，
+# 即每个节点连同其出边一起流式到达；终点可以是之后才出现的节点
+def write_snapshot(path: str, nodes: Iterable[Tuple[str, str, Dict[str, Any], List[Tuple[str, str]]]]) -> Dict[str, Any]:
+    strings = _StringTable()
+    labels: Dict[str, int] = {}
+    edge_types: Dict[str, int] = {}
+    node_element = array("q")
+    node_name = array("q")
+    node_doc = array("q")
+    node_label = array("H")
+    node_flags = array("B")
+    node_doc_count = array("I")
+    documents = set()
+    edge_src = array("q")
+    edge_dst_sid = array("q")
+    edge_type = array("H")
+    props_offsets = array("q", [0])
+
+    tmp = path.rstrip("/\\") + ".tmp"
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+
+    with open(os.path.join(tmp, "props.bin"), "wb") as props_out:
+        for idx, (element_id, label, props, out_edges) in enumerate(nodes):
+            props = props or {}
+            node_element.append(strings.add(element_id))
+            node_name.append(strings.add(props.get("name")))
+            node_doc.append(strings.add(props.get("document_id")))
+            node_label.append(labels.setdefault(label or "Unknown", len(labels)))
+            node_flags.append(_node_flags(props))
+            doc_ids = props.get("document_ids") or ([props["document_id"]] if props.get("document_id") else [])
+            node_doc_count.append(len(doc_ids))
+            documents.update(map(str, doc_ids))
+            blob = json.dumps(props, ensure_ascii=False, default=str).encode("utf-8")  # 时间等类型转为字符串
+            props_out.write(blob)
+            props_offsets.append(props_offsets[-1] + len(blob))
+            for dst, rel_type in out_edges:
+                if dst is None:
+                    continue
+                edge_src.append(idx)
+                edge_dst_sid.append(strings.add(dst))
+                edge_type.append(edge_types.setdefault(rel_type, len(edge_types)))
+
+    n = len(node_element)
+    # element_id 的字符串编号 -> 节点下标，用于解析边的终点
+    sid_to_node = np.full(len(strings.chunks), -1, dtype=np.int64)
+    sid_to_node[np.frombuffer(node_element, dtype=np.int64)] = np.arange(n, dtype=np.int64)
+    src = np.frombuffer(edge_src, dtype=np.int64)
+    dst = sid_to_node[np.frombuffer(edge_dst_sid, dtype=np.int64)] if len(edge_dst_sid) else np.zeros(0, np.int64)
+    types = np.frombuffer(edge_type, dtype=np.uint16)
+    keep = dst >= 0  # 终点不在快照中的边（导出期间被删除）丢弃
+    src, dst, types = src[keep], dst[keep], types[keep]
+
+    out_indptr, out_indices, out_types = _csr(src, dst, types, n)
+    in_indptr, in_indices, in_types = _csr(dst, src, types, n)
+
+    arrays = {
+        "out_indptr": out_indptr,
+        "out_indices": out_indices,
+        "out_types": out_types,
+        "in_indptr": in_indptr,
+        "in_indices": in_indices,
+        "in_types": in_types,
+        "node_label": np.frombuffer(node_label, dtype=np.uint16),
+        "node_flags": np.frombuffer(node_flags, dtype=np.uint8),
+        "node_element_id": np.frombuffer(node_element, dtype=np.int64),
+        "node_name": np.frombuffer(node_name, dtype=np.int64),
+        "node_doc": np.frombuffer(node_doc, dtype=np.int64),
+        "node_doc_count": np.frombuffer(node_doc_count, dtype=np.uint32),
+        "strings_offsets": np.frombuffer(strings.offsets, dtype=np.int64),
+        "props_offsets": np.frombuffer(props_offsets, dtype=np.int64),
+    }
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, name + ".npy"), arr)
+    with open(os.path.join(tmp, "strings.bin"), "wb") as f:
+        for chunk in strings.chunks:
+            f.write(chunk)
+
+    meta = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "num_nodes": n,
+        "num_edges": int(len(src)),
+        "num_documents": len(documents),
+        "labels": sorted(labels, key=labels.get),
+        "edge_types": sorted(edge_types, key=edge_types.get),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+
+    # 写完整个目录后再替换，读者不会看到半成品
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp, path)
+    return meta
+
+
+# ---------------- 导出 ----------------
+
+# 从 Neo4j 导出：一条流式查询，每行一个节点及其全部出边
+NEO4J_EXPORT_QUERY = """
+MATCH (n)
+OPTIONAL MATCH (n)-[r]->(m)
+RETURN elementId(n) AS element_id,
+       labels(n) AS labels,
+       properties(n) AS props,
+       collect([elementId(m), type(r)]) AS out_edges
+"""
+
+
+def export_from_neo4j(uri: str, auth: Tuple[str, str], path: str) -> Dict[str, Any]:
+    from neo4j import GraphDatabase
+
+    def rows():
+        with GraphDatabase.driver(uri, auth=auth) as driver, driver.session() as session:
+            for rec in session.run(NEO4J_EXPORT_QUERY):
+                labels = rec["labels"]
+                yield rec["element_id"], labels[0] if labels else None, dict(rec["props"] or {}), rec["out_edges"]
+
+    return write_snapshot(path, rows())
+
+
+# 从内嵌 SQLite 图导出（element_id 与 SQLiteGraphStore 一致，为节点行号字符串）
+def export_from_sqlite(sqlite_path: str, path: str) -> Dict[str, Any]:
+    import sqlite3
+
+    conn = sqlite3.connect(sqlite_path)
+    try:
+        out_edges: Dict[int, List[Tuple[str, str]]] = {}
+        for src, dst, rel_type in conn.execute("SELECT src, dst, type FROM edges ORDER BY id"):
+            out_edges.setdefault(src, []).append((str(dst), rel_type))
+
+        def rows():
+            for node_id, label, name, props in conn.execute("SELECT id, label, name, props FROM nodes ORDER BY id"):
+                props = json.loads(props)
+                props["name"] = name
+                yield str(node_id), label, props, out_edges.get(node_id, [])
+
+        return write_snapshot(path, rows())
+    finally:
+        conn.close()
+
+
+# ---------------- 加载 ----------------
+
+class GraphSnapshot(GraphStore):
+    ARRAYS = (
+        "out_indptr", "out_indices", "out_types", "in_indptr", "in_indices", "in_types",
+        "node_label", "node_flags", "node_element_id", "node_name", "node_doc",
+        "strings_offsets", "props_offsets",
+    )
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT_NAME or self.meta.get("version") not in READABLE_VERSIONS:
+            raise ValueError(f"{path}: 不支持的快照格式 {self.meta.get('format')} v{self.meta.get('version')}")
+        self.path = path
+        self.num_nodes = self.meta["num_nodes"]
+        self.labels: List[str] = self.meta["labels"]
+        self.edge_types: List[str] = self.meta["edge_types"]
+        for name in self.ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, name + ".npy"), mmap_mode="r"))
+        self.strings_blob = self._map_blob("strings.bin")
+        self.props_blob = self._map_blob("props.bin")
+        self._index: Dict[str, int] | None = None
+        self._key_index: Dict[Tuple[str, str], int] | None = None
+        self._doc_count: np.ndarray | None = None
+
+    def _map_blob(self, name: str) -> np.ndarray:
+        file = os.path.join(self.path, name)
+        if os.path.getsize(file) == 0:
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(file, dtype=np.uint8, mode="r")
+
+    def string(self, sid: int) -> str | None:
+        if sid < 0:
+            return None
+        start, end = self.strings_offsets[sid], self.strings_offsets[sid + 1]
+        return self.strings_blob[start:end].tobytes().decode("utf-8")
+
+    def element_id(self, idx: int) -> str:
+        return self.string(int(self.node_element_id[idx]))
+
+    def name(self, idx: int) -> str | None:
+        return self.string(int(self.node_name[idx]))
+
+    def document_id(self, idx: int) -> str | None:
+        return self.string(int(self.node_doc[idx]))
+
+    def label(self, idx: int) -> str:
+        return self.labels[int(self.node_label[idx])]
+
+    def properties(self, idx: int) -> Dict[str, Any]:
+        start, end = self.props_offsets[idx], self.props_offsets[idx + 1]
+        return json.loads(self.props_blob[start:end].tobytes().decode("utf-8"))
+
+    # element_id -> 节点下标；首次使用时构建
+    def index_of(self, element_id: str) -> int | None:
+        if self._index is None:
+            self._index = {self.element_id(i): i for i in range(self.num_nodes)}
+        return self._index.get(element_id)
+
+    # (标签, name) -> 节点下标；首次使用时构建，没有 name 的节点不在其中
+    def index_of_key(self, label: str, name: str) -> int | None:
+        if self._key_index is None:
+            self._key_index = {}
+            for i in range(self.num_nodes):
+                node_name = self.name(i)
+                if node_name is not None:
+                    self._key_index[(self.label(i), node_name)] = i
+        return self._key_index.get((label, name))
+
+    # 每个节点出现过的文档数；v1 快照没有该数组，首次使用时从属性中计算
+    def doc_counts(self) -> np.ndarray:
+        if self._doc_count is None:
+            file = os.path.join(self.path, "node_doc_count.npy")
+            if os.path.exists(file):
+                self._doc_count = np.load(file, mmap_mode="r")
+            else:
+                counts = np.zeros(self.num_nodes, dtype=np.uint32)
+                for i in range(self.num_nodes):
+                    props = self.properties(i)
+                    counts[i] = len(props.get("document_ids") or ([1] if props.get("document_id") else []))
+                self._doc_count = counts
+        return self._doc_count
+
+    # 快照中不同文档的数量；v1 快照按 document_id 去重估计
+    def num_documents(self) -> int:
+        if "num_documents" in self.meta:
+            return self.meta["num_documents"]
+        return len(set(np.asarray(self.node_doc)[np.asarray(self.node_doc) >= 0].tolist()))
+
+    def in_degrees(self) -> np.ndarray:
+        return np.diff(self.in_indptr)
+
+    def out_degrees(self) -> np.ndarray:
+        return np.diff(self.out_indptr)
+
+    # ---------- GraphStore 接口（只读） ----------
+
+    def import_graph(self, entities_by_label, rel_groups, batch_size=None, workers=None):
+        raise TypeError(f"图快照 {self.path} 只读，不能写入；请导入到 Neo4j/SQLite 后重新导出快照")
+
+    def _degree_record(self, idx: int, name: str, in_degree: int, out_degree: int) -> Dict[str, Any]:
+        flags = int(self.node_flags[idx])
+        return {
+            "element_id": self.element_id(idx),
+            "name": name,
+            "labels": [self.label(idx)],
+            "in_degree": in_degree,
+            "out_degree": out_degree,
+            "total_degree": in_degree + out_degree,
+            "has_def": bool(flags & FLAG_HAS_DEF),
+            "has_func": bool(flags & FLAG_HAS_FUNC),
+        }
+
+    def node_degrees(self):
+        in_deg, out_deg = self.in_degrees(), self.out_degrees()
+        for i in range(self.num_nodes):
+            name = self.name(i)
+            if name is None:
+                continue
+            yield self._degree_record(i, name, int(in_deg[i]), int(out_deg[i]))
+
+    # 度数直接取自入边/出边 CSR 的 indptr 差值
+    def degrees_of(self, keys):
+        for label, name in keys:
+            idx = self.index_of_key(label, name)
+            if idx is None:
+                continue
+            in_degree = int(self.in_indptr[idx + 1] - self.in_indptr[idx])
+            out_degree = int(self.out_indptr[idx + 1] - self.out_indptr[idx])
+            yield self._degree_record(idx, name, in_degree, out_degree)
+
+    def get_node(self, element_id):
+        idx = self.index_of(element_id)
+        if idx is None:
+            return None
+        return {"element_id": element_id, "labels": [self.label(idx)], "properties": self.properties(idx)}
+
+    def in_neighbors(self, element_id, exclude=()):
+        idx = self.index_of(element_id)
+        if idx is None:
+            return []
+        exclude = set(exclude)
+        start, end = self.in_indptr[idx], self.in_indptr[idx + 1]
+        result = []
+        for src, t in zip(self.in_indices[start:end].tolist(), self.in_types[start:end].tolist()):
+            source_id = self.element_id(src)
+            if source_id in exclude:
+                continue
+            result.append({"source_id": source_id, "doc_id": self.document_id(src), "rel_type": self.edge_types[t]})
+        return result
+
+
+def load_snapshot(path: str) -> GraphSnapshot:
+    return GraphSnapshot(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出 / 查看图快照")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="从 Neo4j 或内嵌 SQLite 图导出快照")
+    exp.add_argument("--source", choices=("neo4j", "sqlite"), default="neo4j")
+    exp.add_argument("--uri", default=os.getenv("NEO4J_URI", "bolt://localhost:7687"))
+    exp.add_argument("--user", default=os.getenv("NEO4J_USER", "neo4j"))
+    exp.add_argument("--password", default=os.getenv("NEO4J_PASSWORD", "your password"))
+    exp.add_argument("--sqlite-path", default="kite_graph.db")
+    exp.add_argument("--out", default="kite_graph.snapshot", help="快照目录")
+    info = sub.add_parser("info", help="打印快照元数据")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        started = time.perf_counter()
+        if args.source == "neo4j":
+            meta = export_from_neo4j(args.uri, (args.user, args.password), args.out)
+        else:
+            meta = export_from_sqlite(args.sqlite_path, args.out)
+        print(f"快照已写入 {args.out}: {meta['num_nodes']} 个节点，{meta['num_edges']} 条边，"
+              f"{len(meta['labels'])} 个标签，{len(meta['edge_types'])} 种关系，"
+              f"{time.perf_counter() - started:.2f}s")
+    else:
+        started = time.perf_counter()
+        snap = load_snapshot(args.path)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(json.dumps(snap.meta, ensure_ascii=False, indent=1))
+        print(f"加载耗时 {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
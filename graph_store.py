@@ -0,0 +1,393 @@
+# 图存储抽象：导入、度数统计、节点属性获取、入边邻居查询
+# - Neo4jGraphStore: 现有 Neo4j 驱动 + Cypher
+# - SQLiteGraphStore: 内嵌存储，SQLite 节点/边表 + 内存邻接索引，无需 Neo4j 即可跑通整条合成流程
+#   （CI、笔记本、小规模实验）
+import json
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+# 节点度数统计结果字段（与 rare_node 的 Cypher 查询一致）
+DEGREE_FIELDS = ("element_id", "name", "labels", "in_degree", "out_degree", "total_degree", "has_def", "has_func")
+
+
+class GraphStore(ABC):
+    # 写入规范化并聚合后的实体与关系（normalize_items 的输出）；返回 (节点行数, 关系行数)
+    # batch_size / workers 为空时使用 json2neo4j 的默认配置；只读存储抛出 TypeError
+    @abstractmethod
+    def import_graph(
+        self,
+        entities_by_label: Dict[str, List[Dict[str, Any]]],
+        rel_groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]],
+        batch_size: int | None = None,
+        workers: int | None = None,
+    ) -> Tuple[int, int]:
+        ...
+
+    # 逐个返回带 name 的节点的度数与属性标记，字段见 DEGREE_FIELDS
+    @abstractmethod
+    def node_degrees(self) -> Iterator[Dict[str, Any]]:
+        ...
+
+    # 只统计给定 (标签, name) 节点的度数，字段同 node_degrees；不存在的节点不返回（增量重算用）
+    @abstractmethod
+    def degrees_of(self, keys: Iterable[Tuple[str, str]]) -> Iterator[Dict[str, Any]]:
+        ...
+
+    # 按 element_id 获取节点：{"element_id", "labels", "properties"}；不存在时返回 None
+    @abstractmethod
+    def get_node(self, element_id: str) -> Dict[str, Any] | None:
+        ...
+
+    # 指向该节点、且起点不在 exclude 中的入边：[{"source_id", "doc_id", "rel_type"}]
+    @abstractmethod
+    def in_neighbors(self, element_id: str, exclude: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        ...
+
+    # 批量获取节点：{element_id: 节点}，不存在的节点不返回；默认逐个调用 get_node
+    def get_nodes(self, element_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        nodes = {}
+        for element_id in element_ids:
+            node = self.get_node(element_id)
+            if node is not None:
+                nodes[element_id] = node
+        return nodes
+
+    # 批量入边查询：frontier 为 [(element_id, exclude)]，返回与之对齐的候选列表；默认逐个调用 in_neighbors
+    def in_neighbors_batch(self, frontier: List[Tuple[str, Iterable[str]]]) -> List[List[Dict[str, Any]]]:
+        return [self.in_neighbors(element_id, exclude) for element_id, exclude in frontier]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class Neo4jGraphStore(GraphStore):
+    def __init__(self, uri: str, auth: Tuple[str, str], create_constraints: bool = True):
+        from neo4j import GraphDatabase
+
+        self.driver = GraphDatabase.driver(uri, auth=auth)
+        self.create_constraints = create_constraints
+
+    def import_graph(self, entities_by_label, rel_groups, batch_size: int | None = None, workers: int | None = None):
+        # 延迟导入，避免与 json2neo4j 循环导入
+        from json2neo4j import BATCH_SIZE, IMPORT_WORKERS, StreamingImporter
+
+        with StreamingImporter(
+            self.driver, batch_size or BATCH_SIZE, workers or IMPORT_WORKERS, self.create_constraints
+        ) as importer:
+            for label, rows in entities_by_label.items():
+                for row in rows:
+                    importer.add_entity(label, row)
+            for group, rows in rel_groups.items():
+                for row in rows:
+                    importer.add_relation(group, row)
+        return importer.node_count, importer.rel_count
+
+    # COUNT {} 子查询走节点度数存储（GetDegree），无需逐条展开关系再聚合
+    DEGREE_RETURN = """
+        WITH n, COUNT { (n)<--() } AS in_degree, COUNT { (n)-->() } AS out_degree
+        RETURN
+            elementId(n) AS element_id,
+            n.name AS name,
+            labels(n) AS labels,
+            in_degree,
+            out_degree,
+            in_degree + out_degree AS total_degree,
+            coalesce(n.detailed_definition, '') <> '' AS has_def,
+            coalesce(n.function, '') <> '' AS has_func
+        """
+
+    def node_degrees(self):
+        query = "MATCH (n) WHERE n.name IS NOT NULL" + self.DEGREE_RETURN
+        with self.driver.session() as session:
+            for rec in session.run(query):
+                yield dict(rec)
+
+    # 按标签分组，MATCH 走 name 唯一约束的索引
+    def degrees_of(self, keys):
+        names_by_label: Dict[str, List[str]] = defaultdict(list)
+        for label, name in keys:
+            names_by_label[label].append(name)
+        with self.driver.session() as session:
+            for label, names in names_by_label.items():
+                query = f"UNWIND $names AS name MATCH (n:`{label}` {{name: name}})" + self.DEGREE_RETURN
+                for rec in session.run(query, names=names):
+                    yield dict(rec)
+
+    def get_node(self, element_id):
+        with self.driver.session() as session:
+            record = session.run(
+                """
+                MATCH (n)
+                WHERE elementId(n) = $element_id
+                RETURN elementId(n) AS element_id, labels(n) AS labels, properties(n) AS properties
+                """,
+                element_id=element_id,
+            ).single()
+        if not record:
+            return None
+        return {
+            "element_id": record["element_id"],
+            "labels": list(record["labels"] or []),
+            "properties": record["properties"] or {},
+        }
+
+    def in_neighbors(self, element_id, exclude=()):
+        with self.driver.session() as session:
+            result = session.run(
+                """
+                MATCH (prev)-[r]->(curr)
+                WHERE elementId(curr) = $current_element_id
+                  AND NOT (elementId(prev) IN $visited)
+                RETURN elementId(prev) AS source_id, prev.document_id AS doc_id, type(r) AS rel_type
+                """,
+                current_element_id=element_id,
+                visited=list(exclude),
+            )
+            return [dict(rec) for rec in result]
+
+    # 以下批量查询各一次往返：UNWIND 展开整批 elementId，按 NodeByElementIdSeek 定位
+    def get_nodes(self, element_ids):
+        with self.driver.session() as session:
+            result = session.run(
+                """
+                UNWIND $element_ids AS element_id
+                MATCH (n)
+                WHERE elementId(n) = element_id
+                RETURN elementId(n) AS element_id, labels(n) AS labels, properties(n) AS properties
+                """,
+                element_ids=list(element_ids),
+            )
+            return {
+                rec["element_id"]: {
+                    "element_id": rec["element_id"],
+                    "labels": list(rec["labels"] or []),
+                    "properties": rec["properties"] or {},
+                }
+                for rec in result
+            }
+
+    def in_neighbors_batch(self, frontier):
+        candidates: List[List[Dict[str, Any]]] = [[] for _ in frontier]
+        with self.driver.session() as session:
+            result = session.run(
+                """
+                UNWIND $frontier AS w
+                MATCH (prev)-[r]->(curr)
+                WHERE elementId(curr) = w.element_id
+                  AND NOT (elementId(prev) IN w.visited)
+                RETURN w.idx AS idx, elementId(prev) AS source_id, prev.document_id AS doc_id, type(r) AS rel_type
+                """,
+                frontier=[
+                    {"idx": i, "element_id": element_id, "visited": list(exclude)}
+                    for i, (element_id, exclude) in enumerate(frontier)
+                ],
+            )
+            for rec in result:
+                candidates[rec["idx"]].append(
+                    {"source_id": rec["source_id"], "doc_id": rec["doc_id"], "rel_type": rec["rel_type"]}
+                )
+        return candidates
+
+    def close(self):
+        self.driver.close()
+
+
+# 属性合并规则与 Neo4j 导入一致：属性按顺序覆盖，document_ids 求并集，occurrences 累加
+def _merge_props(props: Dict[str, Any], row: Dict[str, Any], props_key: str) -> Dict[str, Any]:
+    merged = dict(props)
+    merged.update(row[props_key])
+    doc_ids = dict.fromkeys(props.get("document_ids") or [])
+    doc_ids.update(dict.fromkeys(row.get("document_ids", ())))
+    merged["document_ids"] = list(doc_ids)
+    merged["occurrences"] = (props.get("occurrences") or 0) + row.get("occurrences", 0)
+    return merged
+
+
+class SQLiteGraphStore(GraphStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS nodes (
+        id INTEGER PRIMARY KEY,
+        label TEXT NOT NULL,
+        name TEXT NOT NULL,
+        props TEXT NOT NULL DEFAULT '{}',
+        UNIQUE (label, name)
+    );
+    CREATE TABLE IF NOT EXISTS edges (
+        id INTEGER PRIMARY KEY,
+        src INTEGER NOT NULL REFERENCES nodes(id),
+        dst INTEGER NOT NULL REFERENCES nodes(id),
+        type TEXT NOT NULL,
+        props TEXT NOT NULL DEFAULT '{}',
+        UNIQUE (src, type, dst)
+    );
+    CREATE INDEX IF NOT EXISTS edges_dst ON edges (dst);
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(self.SCHEMA)
+        self._adjacency: Dict[int, List[Tuple[int, str]]] | None = None
+        self._doc_ids: Dict[int, Any] = {}
+
+    # ---------- 写入 ----------
+
+    def _node_id(self, label: str, name: str) -> int:
+        row = self.conn.execute("SELECT id FROM nodes WHERE label = ? AND name = ?", (label, name)).fetchone()
+        if row:
+            return row[0]
+        return self.conn.execute("INSERT INTO nodes (label, name) VALUES (?, ?)", (label, name)).lastrowid
+
+    def upsert_node(self, label: str, row: Dict[str, Any]):
+        cur = self.conn.execute(
+            "SELECT id, props FROM nodes WHERE label = ? AND name = ?", (label, row["name"])
+        ).fetchone()
+        if cur is None:
+            props = _merge_props({}, row, "props")
+            self.conn.execute(
+                "INSERT INTO nodes (label, name, props) VALUES (?, ?, ?)",
+                (label, row["name"], json.dumps(props, ensure_ascii=False)),
+            )
+        else:
+            props = _merge_props(json.loads(cur[1]), row, "props")
+            self.conn.execute("UPDATE nodes SET props = ? WHERE id = ?", (json.dumps(props, ensure_ascii=False), cur[0]))
+
+    def upsert_relation(self, group: Tuple[str, str, str], row: Dict[str, Any]):
+        src_label, tgt_label, rel_type = group
+        src = self._node_id(src_label, row["source_name"])
+        dst = self._node_id(tgt_label, row["target_name"])
+        cur = self.conn.execute(
+            "SELECT id, props FROM edges WHERE src = ? AND type = ? AND dst = ?", (src, rel_type, dst)
+        ).fetchone()
+        if cur is None:
+            props = _merge_props({}, row, "rel_props")
+            self.conn.execute(
+                "INSERT INTO edges (src, dst, type, props) VALUES (?, ?, ?, ?)",
+                (src, dst, rel_type, json.dumps(props, ensure_ascii=False)),
+            )
+        else:
+            props = _merge_props(json.loads(cur[1]), row, "rel_props")
+            self.conn.execute("UPDATE edges SET props = ? WHERE id = ?", (json.dumps(props, ensure_ascii=False), cur[0]))
+
+    def import_graph(self, entities_by_label, rel_groups, batch_size=None, workers=None):
+        node_count = rel_count = 0
+        with self.conn:
+            for label, rows in entities_by_label.items():
+                for row in rows:
+                    self.upsert_node(label, row)
+                    node_count += 1
+            for group, rows in rel_groups.items():
+                for row in rows:
+                    self.upsert_relation(group, row)
+                    rel_count += 1
+        self._adjacency = None
+        return node_count, rel_count
+
+    # ---------- 查询 ----------
+
+    @staticmethod
+    def _degree_record(node_id: int, label: str, name: str, props: str, i: int, o: int) -> Dict[str, Any]:
+        props = json.loads(props)
+        return {
+            "element_id": str(node_id),
+            "name": name,
+            "labels": [label],
+            "in_degree": i,
+            "out_degree": o,
+            "total_degree": i + o,
+            "has_def": (props.get("detailed_definition") or "") != "",
+            "has_func": (props.get("function") or "") != "",
+        }
+
+    def node_degrees(self):
+        in_deg = dict(self.conn.execute("SELECT dst, COUNT(*) FROM edges GROUP BY dst"))
+        out_deg = dict(self.conn.execute("SELECT src, COUNT(*) FROM edges GROUP BY src"))
+        for node_id, label, name, props in self.conn.execute("SELECT id, label, name, props FROM nodes"):
+            yield self._degree_record(node_id, label, name, props, in_deg.get(node_id, 0), out_deg.get(node_id, 0))
+
+    # 逐个节点查询：入度走 edges_dst 索引，出度走 UNIQUE (src, type, dst) 索引的前缀
+    def degrees_of(self, keys):
+        for label, name in keys:
+            row = self.conn.execute(
+                "SELECT id, props FROM nodes WHERE label = ? AND name = ?", (label, name)
+            ).fetchone()
+            if row is None:
+                continue
+            (i,) = self.conn.execute("SELECT COUNT(*) FROM edges WHERE dst = ?", (row[0],)).fetchone()
+            (o,) = self.conn.execute("SELECT COUNT(*) FROM edges WHERE src = ?", (row[0],)).fetchone()
+            yield self._degree_record(row[0], label, name, row[1], i, o)
+
+    def get_node(self, element_id):
+        row = self.conn.execute("SELECT id, label, name, props FROM nodes WHERE id = ?", (int(element_id),)).fetchone()
+        if row is None:
+            return None
+        props = json.loads(row[3])
+        props["name"] = row[2]
+        return {"element_id": str(row[0]), "labels": [row[1]], "properties": props}
+
+    # 内存邻接索引：终点 -> [(起点, 关系类型)]，以及节点 document_id；首次查询时一次性构建
+    def _ensure_adjacency(self):
+        if self._adjacency is not None:
+            return
+        adjacency: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+        for src, dst, rel_type in self.conn.execute("SELECT src, dst, type FROM edges ORDER BY id"):
+            adjacency[dst].append((src, rel_type))
+        self._doc_ids = {
+            node_id: json.loads(props).get("document_id")
+            for node_id, props in self.conn.execute("SELECT id, props FROM nodes")
+        }
+        self._adjacency = adjacency
+
+    def in_neighbors(self, element_id, exclude=()):
+        self._ensure_adjacency()
+        exclude = set(exclude)
+        return [
+            {"source_id": str(src), "doc_id": self._doc_ids.get(src), "rel_type": rel_type}
+            for src, rel_type in self._adjacency.get(int(element_id), ())
+            if str(src) not in exclude
+        ]
+
+    def close(self):
+        self.conn.close()
+
+
+# 受影响节点清单：导入写入或删除过的节点键 (标签, name)，包括关系两端（度数随关系增删而变化）。
+# json2neo4j 每次导入后与已有清单取并集写出，rare_node --incremental 消费后清空
+def load_touched_nodes(path: str) -> Set[Tuple[str, str]]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {tuple(key) for key in json.load(f)["nodes"]}
+
+
+def save_touched_nodes(path: str, keys: Iterable[Tuple[str, str]], merge: bool = True):
+    keys = set(keys) | (load_touched_nodes(path) if merge else set())
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"nodes": sorted(keys)}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# 按后端名称打开图存储：neo4j 使用 uri/auth，sqlite 与 snapshot（graph_snapshot 只读快照目录）使用 path
+def open_store(backend: str, uri: str | None = None, auth: Tuple[str, str] | None = None, path: str = ":memory:") -> GraphStore:
+    if backend == "neo4j":
+        return Neo4jGraphStore(uri, auth)
+    if backend == "snapshot":
+        from graph_snapshot import load_snapshot
+
+        return load_snapshot(path)
+    if backend == "sqlite":
+        if path != ":memory:" and not os.path.exists(path):
+            print(f"SQLite 图文件 {path} 不存在，将新建空图")
+        return SQLiteGraphStore(path)
+    raise ValueError(f"未知的图存储后端: {backend}")
@@ -1,10 +1,35 @@
 # 安装并导入依赖（如未安装 neo4j 请先在终端运行：pip install neo4j）
+import argparse
+import csv
+import hashlib
+import itertools
 import json
 import os
-from collections import defaultdict
-from typing import Dict, List, Tuple, Any, Set
+import random
+import re
+import shlex
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple, Any, Set
 
 from neo4j import GraphDatabase
+from neo4j.exceptions import TransientError
+
+from entity_resolution import EntityResolver
+from graph_store import SQLiteGraphStore, save_touched_nodes
+
+# 导入引擎配置
+BATCH_SIZE = 1000  # 每个事务写入的行数，过大会撑爆服务端事务内存
+IMPORT_WORKERS = 4  # 并行会话数
+MAX_RETRIES = 5  # 瞬时错误最大重试次数
+RETRY_BASE_DELAY = 0.5  # 重试退避基数（秒），按 2^n 增长并加随机抖动
+READ_CHUNK_SIZE = 1 << 20  # 流式读取 JSON 的块大小（字符数）
+MAX_PENDING_BATCHES_PER_WORKER = 4  # 每个会话最多排队的批次数，限制内存占用
+UNRESOLVED_LABEL = "Entity"  # 找不到同名实体的关系端点使用的标签
 
 # 属性清洗：支持列表与复杂类型，确保 Neo4j 兼容
 def sanitize_value(val):
@@ -125,26 +150,202 @@ def resolve_name(attrs: Dict[str, Any], text: str | None) -> str | None:
     return None
 
 
-# 读取与规范化 JSON，分出实体与关系并做属性清洗；支持 source/target/relation 为列表
-def normalize_items(items: List[Dict[str, Any]]):
-    entities_by_label: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-    name_to_label: Dict[str, str] = {}
-    all_labels: Set[str] = set()
+# 实体条目的 (标签, 名字)；非实体或无法确定名字时返回 None
+def entity_key(item: Dict[str, Any]) -> Tuple[str, str] | None:
+    if item.get("class") != "Entity":
+        return None
+    attrs = item.get("attributes") or {}
+    name = resolve_name(attrs, item.get("text"))
+    if not name:
+        return None
+    return attrs.get("entity_type") or UNRESOLVED_LABEL, name
 
-    rel_groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
 
+# 名字 -> 标签索引：默认在内存 dict 中；超大语料可指定 sqlite 文件放在磁盘上
+# 同名实体出现多个标签时以最后出现的为准（与逐条覆盖 name_to_label 的结果一致），并计入冲突数
+class LabelIndex:
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.conflicts = 0
+        self._mem: Dict[str, str] | None = None
+        self._db: sqlite3.Connection | None = None
+        if path is None:
+            self._mem = {}
+        else:
+            if os.path.exists(path):
+                os.remove(path)
+            self._db = sqlite3.connect(path)
+            self._db.execute("PRAGMA journal_mode=OFF")
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.execute("CREATE TABLE labels (name TEXT PRIMARY KEY, label TEXT NOT NULL) WITHOUT ROWID")
+        self._pending: List[Tuple[str, str]] = []
+
+    def add(self, name: str, label: str):
+        if self._mem is not None:
+            old = self._mem.get(name)
+            if old is not None and old != label:
+                self.conflicts += 1
+            self._mem[name] = label
+            return
+        self._pending.append((name, label))
+        if len(self._pending) >= BATCH_SIZE:
+            self._flush()
+
+    # 先插入新名字，再按出现顺序覆盖已有名字；被改写的行数即标签冲突数
+    def _flush(self):
+        if not self._pending:
+            return
+        self._db.executemany("INSERT OR IGNORE INTO labels (name, label) VALUES (?, ?)", self._pending)
+        before = self._db.total_changes
+        self._db.executemany(
+            "UPDATE labels SET label = ? WHERE name = ? AND label != ?",
+            [(label, name, label) for name, label in self._pending],
+        )
+        self.conflicts += self._db.total_changes - before
+        self._db.commit()
+        self._pending = []
+
+    def get(self, name: str) -> str | None:
+        if self._mem is not None:
+            return self._mem.get(name)
+        self._flush()
+        row = self._db.execute("SELECT label FROM labels WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def __len__(self) -> int:
+        if self._mem is not None:
+            return len(self._mem)
+        self._flush()
+        return self._db.execute("SELECT COUNT(*) FROM labels").fetchone()[0]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+# 第一遍：扫描全部实体，建立完整的 名字 -> 标签 索引
+# 传入 doc_hashes 时顺带计算每个 document_id 的内容哈希（按条目出现顺序累积规范化 JSON）；
+# 传入 resolver 时顺带统计各标签下的实体名，供实体消歧聚类；
+# 传入 doc_names 时记录每个文档的实体 (标签, 名字) 与关系端点名，供 fold_resolution 把消歧结果并入文档哈希
+def build_label_index(
+    items: Iterable[Dict[str, Any]],
+    path: str | None = None,
+    doc_hashes: Dict[str, str] | None = None,
+    resolver: EntityResolver | None = None,
+    doc_names: Dict[str, Tuple[Set[Tuple[str, str]], Set[str]]] | None = None,
+) -> LabelIndex:
+    index = LabelIndex(path)
+    hashers: Dict[str, Any] = {}
     for item in items:
+        key = entity_key(item)
+        if key is not None:
+            index.add(key[1], key[0])
+            if resolver is not None:
+                resolver.add(*key)
+        if doc_names is not None:
+            entities, endpoints = doc_names.setdefault(document_key(item), (set(), set()))
+            if key is not None:
+                entities.add(key)
+            elif item.get("class") == "Relation":
+                attrs = item.get("attributes") or {}
+                endpoints.update(ensure_name_list(attrs.get("source_entity")))
+                endpoints.update(ensure_name_list(attrs.get("target_entity")))
+        if doc_hashes is not None:
+            doc = document_key(item)
+            h = hashers.get(doc)
+            if h is None:
+                h = hashers[doc] = hashlib.sha1()
+            h.update(json.dumps(item, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+            h.update(b"\n")
+    if doc_hashes is not None:
+        doc_hashes.update((doc, h.hexdigest()) for doc, h in hashers.items())
+    return index
+
+
+# 实体消歧时文档的导入结果还取决于映射：把文档内实体名与关系端点解析后的 (标签, 名字) 并入文档哈希，
+# 映射随输入变化（如同组写法的出现次数改变导致规范名漂移）时，受影响的未改动文档在 --delta 下也会重新导入
+def fold_resolution(
+    doc_hashes: Dict[str, str],
+    doc_names: Dict[str, Tuple[Set[Tuple[str, str]], Set[str]]],
+    normalizer: "ItemNormalizer",
+):
+    for doc, (entities, endpoints) in doc_names.items():
+        resolved = {(label, normalizer.resolver.canonical(label, name)) for label, name in entities}
+        for name in endpoints:
+            label, name = normalizer.endpoint_key(name)
+            resolved.add((label or UNRESOLVED_LABEL, name))
+        h = hashlib.sha1(doc_hashes[doc].encode("utf-8"))
+        h.update(json.dumps(sorted(resolved), ensure_ascii=False).encode("utf-8"))
+        doc_hashes[doc] = h.hexdigest()
+
+
+# 条目所属文档；缺少 document_id 的条目归入空字符串文档
+def document_key(item: Dict[str, Any]) -> str:
+    doc_id = item.get("document_id")
+    return "" if doc_id is None else str(doc_id)
+
+
+# 单次出现的溯源字段：出现该行的文档列表与出现次数（聚合时求并集 / 累加）
+def provenance(doc_id) -> Dict[str, Any]:
+    return {"document_ids": [doc_id] if doc_id else [], "occurrences": 1}
+
+
+# 有状态的逐条规范化器：分出实体与关系并做属性清洗；支持 source/target/relation 为列表
+# 传入 label_index（第一遍建立的完整索引）时，关系端点按全量索引解析，与实体出现的先后无关；
+# 否则端点标签取自此前已见到的同名实体。找不到同名实体的端点记为 UNRESOLVED_LABEL 并计入 unresolved
+# 传入 resolver 时实体名替换为本标签下的规范名；关系端点先按原名解析标签，再替换为该标签下的规范名，
+# 索引中没有的端点名按规范化键在各标签的聚类中查找（只在一个标签下命中时采用）
+class ItemNormalizer:
+    def __init__(self, label_index: LabelIndex | None = None, resolver: EntityResolver | None = None):
+        self.label_index = label_index
+        self.resolver = resolver
+        self.name_to_label: Dict[str, str] = {}
+        self.all_labels: Set[str] = set()
+        self.unresolved: Counter = Counter()
+
+    # 端点 -> (标签, 名字)，不计数；找不到标签时标签为 None
+    def endpoint_key(self, name: str) -> Tuple[str | None, str]:
+        if self.label_index is not None:
+            label = self.label_index.get(name)
+        else:
+            label = self.name_to_label.get(name)
+        if self.resolver is not None:
+            if label is not None:
+                return label, self.resolver.canonical(label, name)
+            found = self.resolver.lookup(name)
+            if found is not None:
+                return found
+        return label, name
+
+    # 解析一组端点并去重；找不到标签的端点记为 UNRESOLVED_LABEL 并计入 unresolved
+    def resolve_endpoints(self, names: List[str]) -> List[Tuple[str, str]]:
+        endpoints = []
+        for name in names:
+            label, resolved = self.endpoint_key(name)
+            if label is None:
+                self.unresolved[name] += 1
+                label = UNRESOLVED_LABEL
+            endpoints.append((label, resolved))
+        return list(dict.fromkeys(endpoints))
+
+    # 返回 (实体行 [(label, row)], 关系行 [((src_label, tgt_label, rel_type), row)])
+    def normalize(self, item: Dict[str, Any]):
+        entity_rows: List[Tuple[str, Dict[str, Any]]] = []
+        rel_rows: List[Tuple[Tuple[str, str, str], Dict[str, Any]]] = []
+
         cls = item.get("class")
         attrs = dict(item.get("attributes") or {})
         doc_id = item.get("document_id")
         text = item.get("text")
 
         if cls == "Entity":
-            label = attrs.get("entity_type") or "Entity"
-            name = resolve_name(attrs, text)
-            if not name:
+            key = entity_key(item)
+            if key is None:
                 # 跳过无法确定名字的实体
-                continue
+                return entity_rows, rel_rows
+            label, raw_name = key
+            name = raw_name if self.resolver is None else self.resolver.canonical(label, raw_name)
 
             # props 去除类型与 name 字段
             props = {k: v for k, v in attrs.items() if k not in ("entity_type", "name")}
@@ -173,9 +374,10 @@ def normalize_items(items: List[Dict[str, Any]]):
             # 属性清洗
             props = sanitize_props(props)
 
-            entities_by_label[label].append({"name": name, "props": props})
-            name_to_label[name] = label
-            all_labels.add(label)
+            entity_rows.append((label, {"name": name, "props": props, **provenance(doc_id)}))
+            if self.label_index is None:
+                self.name_to_label[raw_name] = label
+            self.all_labels.add(label)
 
         elif cls == "Relation":
             rel_type_val = attrs.get("relation_type")
@@ -184,7 +386,7 @@ def normalize_items(items: List[Dict[str, Any]]):
             tgt_names = ensure_name_list(attrs.get("target_entity"))
             # 只要任一为空，就跳过该条
             if not rel_types or not src_names or not tgt_names:
-                continue
+                return entity_rows, rel_rows
 
             # 关系属性（剔除三要素）
             rel_props = {
@@ -202,22 +404,104 @@ def normalize_items(items: List[Dict[str, Any]]):
             rel_props = sanitize_props(rel_props)
 
             # 展开列表：所有 src × tgt × rel_type 组合
+            src_endpoints = self.resolve_endpoints(src_names)
+            tgt_endpoints = self.resolve_endpoints(tgt_names)
             for rt in rel_types:
-                for src in src_names:
-                    for tgt in tgt_names:
-                        src_label = name_to_label.get(src, "Entity")
-                        tgt_label = name_to_label.get(tgt, "Entity")
-                        all_labels.add(src_label)
-                        all_labels.add(tgt_label)
-                        rel_groups[(src_label, tgt_label, rt)].append(
-                            {
-                                "source_name": src,
-                                "target_name": tgt,
-                                "rel_props": rel_props,
-                            }
+                for src_label, src in src_endpoints:
+                    for tgt_label, tgt in tgt_endpoints:
+                        self.all_labels.add(src_label)
+                        self.all_labels.add(tgt_label)
+                        rel_rows.append(
+                            (
+                                (src_label, tgt_label, rt),
+                                {
+                                    "source_name": src,
+                                    "target_name": tgt,
+                                    "rel_props": rel_props,
+                                    **provenance(doc_id),
+                                },
+                            )
                         )
 
-    return entities_by_label, rel_groups, all_labels
+        return entity_rows, rel_rows
+
+
+# 读取与规范化 JSON，分出实体与关系（一次性汇总到内存，离线导出使用）
+# 同名实体、同一 (起点, 终点, 类型) 的关系在此聚合为一行，溯源保存在 document_ids / occurrences 中
+def normalize_items(items: Iterable[Dict[str, Any]], normalizer: ItemNormalizer | None = None):
+    entities: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+    rels: Dict[Tuple[str, str, str], Dict[Tuple[str, str], Dict[str, Any]]] = defaultdict(dict)
+    normalizer = normalizer or ItemNormalizer()
+
+    for item in items:
+        entity_rows, rel_rows = normalizer.normalize(item)
+        for label, row in entity_rows:
+            accumulate_row(entities[label], row["name"], row, "props")
+        for key, row in rel_rows:
+            accumulate_row(rels[key], (row["source_name"], row["target_name"]), row, "rel_props")
+
+    entities_by_label = defaultdict(list, {label: finish_rows(rows) for label, rows in entities.items()})
+    rel_groups = defaultdict(list, {key: finish_rows(rows) for key, rows in rels.items()})
+    return entities_by_label, rel_groups, normalizer.all_labels
+
+
+# 流式读取抽取结果：.jsonl 逐行解析；JSON 数组按块读取、逐个对象 raw_decode，内存占用与文件大小无关
+def iter_items(path: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        buf = f.read(chunk_size)
+        eof = not buf
+        pos = 0
+
+        def skip(chars: str):
+            nonlocal buf, pos, eof
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+
+        skip(" \t\r\n\ufeff")
+        if pos >= len(buf):
+            return
+        if buf[pos] != "[":
+            # 非数组：按 JSON Lines（每行一个对象）逐行处理；已读入的块补齐到行尾，其余行从文件流式读取
+            head = (buf[pos:] + f.readline()).split("\n")
+            for line in itertools.chain(head, f):
+                if line.strip():
+                    yield json.loads(line)
+            return
+        pos += 1
+
+        while True:
+            skip(" \t\r\n,")
+            if pos >= len(buf):
+                raise ValueError(f"{path}: JSON 数组未闭合")
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # 对象跨越了块边界：丢弃已消费部分并读入下一块
+                more = f.read(chunk_size)
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield obj
+            pos = end
+            if pos >= chunk_size:
+                buf, pos = buf[pos:], 0
 
 
 # 可选：为每个标签创建 name 唯一约束，提升 MERGE 性能
@@ -239,64 +523,822 @@ def create_unique_constraints(session, labels: Set[str]):
             pass
 
 
-# 批量导入实体（按标签分组 UNWIND）
-def import_entities(session, entities_by_label: Dict[str, List[Dict[str, Any]]]) -> int:
-    total = 0
-    for label, rows in entities_by_label.items():
-        if not rows:
-            continue
-        q = f"""
-        UNWIND $rows AS row
-        MERGE (n:`{label}` {{name: row.name}})
-        SET n += row.props
-        """
-        session.run(q, rows=rows)
-        total += len(rows)
-    return total
+# ---------------- 批量并行导入引擎 ----------------
 
+# 将行按 batch_size 切分
+def chunked(rows: List[Any], size: int) -> Iterator[List[Any]]:
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
 
-# 批量导入关系（按 起点标签/终点标签/关系类型 分组 UNWIND）
+
+# 稳定分区：同一节点键总是落在同一分区（crc32 不受 PYTHONHASHSEED 影响）
+def partition_of(key: str, partitions: int) -> int:
+    return zlib.crc32(key.encode("utf-8")) % partitions
+
+
+# 单批写入：自动提交事务，遇到瞬时错误（死锁、锁超时、集群切主等）指数退避重试
+def run_batch(driver, query: str, rows: List[Dict[str, Any]], max_retries: int = MAX_RETRIES) -> int:
+    for attempt in range(max_retries + 1):
+        try:
+            with driver.session() as session:
+                session.run(query, rows=rows).consume()
+            return len(rows)
+        except TransientError as e:
+            if attempt == max_retries:
+                raise
+            delay = RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random())
+            print(f"瞬时错误，{delay:.2f}s 后重试（第 {attempt + 1} 次）: {e.code}")
+            time.sleep(delay)
+    return 0
+
+
+# 吞吐统计：按分组（标签 / 关系类型）记录行数与墙钟时间
+class ThroughputReport:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, key: str, rows: int, started: float, finished: float):
+        with self._lock:
+            st = self._stats.setdefault(key, {"rows": 0, "start": started, "end": finished})
+            st["rows"] += rows
+            st["start"] = min(st["start"], started)
+            st["end"] = max(st["end"], finished)
+
+    def print_summary(self, title: str):
+        print(f"{title}:")
+        for key, st in sorted(self._stats.items(), key=lambda kv: -kv[1]["rows"]):
+            elapsed = max(st["end"] - st["start"], 1e-9)
+            print(f"  {key:<40} {int(st['rows']):>10} 行  {elapsed:>8.2f}s  {st['rows'] / elapsed:>10.1f} 行/秒")
+
+
+# 将 row 聚合进 acc[ident]：属性按顺序覆盖（与逐行 SET += props 一致），
+# document_ids 按首次出现顺序求并集，occurrences 累加；首次出现时复制，避免修改共享的属性字典
+# 聚合期间 document_ids 保存为有序 dict（高频实体的并集不再逐行扫描列表），输出前由 finish_rows 转回列表
+def accumulate_row(acc: Dict[Any, Dict[str, Any]], ident, row: Dict[str, Any], props_key: str):
+    cur = acc.get(ident)
+    if cur is None:
+        cur = acc[ident] = dict(row)
+        cur[props_key] = dict(row[props_key])
+        cur["document_ids"] = dict.fromkeys(row["document_ids"])
+        return
+    cur[props_key].update(row[props_key])
+    cur["document_ids"].update(dict.fromkeys(row["document_ids"]))
+    cur["occurrences"] += row["occurrences"]
+
+
+# 聚合结果转为输出行：document_ids 转回列表
+def finish_rows(acc: Dict[Any, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    rows = list(acc.values())
+    for row in rows:
+        row["document_ids"] = list(row["document_ids"])
+    return rows
+
+
+# 同名实体行聚合为一行
+def merge_entity_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    merged: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        accumulate_row(merged, row["name"], row, "props")
+    return finish_rows(merged)
+
+
+# 同一 (起点, 终点) 的关系行聚合为一行
+def merge_rel_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for row in rows:
+        accumulate_row(merged, (row["source_name"], row["target_name"]), row, "rel_props")
+    return finish_rows(merged)
+
+
+# 批量导入实体（按标签分组 UNWIND，分批并行）
+def import_entities(
+    driver,
+    entities_by_label: Dict[str, List[Dict[str, Any]]],
+    batch_size: int = BATCH_SIZE,
+    workers: int = IMPORT_WORKERS,
+    report: ThroughputReport | None = None,
+) -> int:
+    with StreamingImporter(driver, batch_size, workers, node_report=report) as importer:
+        for label, rows in entities_by_label.items():
+            for row in rows:
+                importer.add_entity(label, row)
+    return importer.node_count
+
+
+# 关系端点中没有实体行的节点，补为空属性的实体行，使关系阶段只需 MERGE 到已存在的节点
+def add_missing_endpoints(
+    entities_by_label: Dict[str, List[Dict[str, Any]]],
+    rel_groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]],
+) -> int:
+    known = {(label, row["name"]) for label, rows in entities_by_label.items() for row in rows}
+    added = 0
+    for (src_label, tgt_label, _), rows in rel_groups.items():
+        for row in rows:
+            for key in ((src_label, row["source_name"]), (tgt_label, row["target_name"])):
+                if key not in known:
+                    known.add(key)
+                    entities_by_label[key[0]].append(
+                        {"name": key[1], "props": {}, "document_ids": [], "occurrences": 0}
+                    )
+                    added += 1
+    return added
+
+
+# 批量导入关系（按 起点标签/终点标签/关系类型 分组 UNWIND，分批并行）
 def import_relations(
-    session,
+    driver,
     rel_groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]],
+    batch_size: int = BATCH_SIZE,
+    workers: int = IMPORT_WORKERS,
+    report: ThroughputReport | None = None,
 ) -> int:
-    total = 0
-    for (src_label, tgt_label, rel_type), rows in rel_groups.items():
-        if not rows:
+    with StreamingImporter(driver, batch_size, workers, rel_report=report) as importer:
+        for key, rows in rel_groups.items():
+            for row in rows:
+                importer.add_relation(key, row)
+    return importer.rel_count
+
+
+# 流式导入器：逐行接收实体/关系，按 (分组, 分区) 缓冲，攒满 batch_size 即提交写入
+# - 节点按 标签+name 哈希分区，关系按 (起点分区, 终点分区) 分桶，每个分区由单线程执行器串行写入：
+#   同一节点/同一桶的批次按到达顺序执行（与逐行 SET n += props 结果一致）
+# - 关系查询同时 MERGE 并锁定起点与终点，批次执行前按分区号升序获取所涉分区的锁：
+#   所涉分区不相交的批次并发执行，共享分区（如指向同一枢纽节点）的批次排队，不会互相死锁；
+#   其余瞬时错误由 run_batch 重试
+# - 关系查询用 MERGE 创建端点，无需预先补建端点节点
+# - 缓冲区内同一节点/关系先聚合为一行；跨批次的溯源由查询合并（document_ids 求并集，occurrences 累加），
+#   结果与全量聚合后写入一致，重复三元组的 MERGE 次数按重复倍数下降
+# - 排队批次数有上限，读取速度超过写入速度时阻塞生产者，内存占用与输入大小无关
+class StreamingImporter:
+    NODE_QUERY = """
+    UNWIND $rows AS row
+    MERGE (n:`{label}` {{name: row.name}})
+    SET n += row.props,
+        n.document_ids = coalesce(n.document_ids, [])
+            + [d IN row.document_ids WHERE NOT d IN coalesce(n.document_ids, [])],
+        n.occurrences = coalesce(n.occurrences, 0) + row.occurrences
+    """
+    REL_QUERY = """
+    UNWIND $rows AS row
+    MERGE (a:`{src_label}` {{name: row.source_name}})
+    MERGE (b:`{tgt_label}` {{name: row.target_name}})
+    MERGE (a)-[r:`{rel_type}`]->(b)
+    SET r += row.rel_props,
+        r.document_ids = coalesce(r.document_ids, [])
+            + [d IN row.document_ids WHERE NOT d IN coalesce(r.document_ids, [])],
+        r.occurrences = coalesce(r.occurrences, 0) + row.occurrences
+    """
+
+    def __init__(
+        self,
+        driver,
+        batch_size: int = BATCH_SIZE,
+        workers: int = IMPORT_WORKERS,
+        create_constraints: bool = False,
+        node_report: ThroughputReport | None = None,
+        rel_report: ThroughputReport | None = None,
+    ):
+        self.driver = driver
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.create_constraints = create_constraints
+        self.node_report = node_report
+        self.rel_report = rel_report
+        self.node_count = 0
+        self.rel_count = 0
+        self.labels: Set[str] = set()
+        self._buffers: Dict[Tuple[Any, ...], Dict[Any, Dict[str, Any]]] = {}
+        self._executors = [ThreadPoolExecutor(max_workers=1) for _ in range(self.workers)]
+        self._pending = threading.BoundedSemaphore(self.workers * MAX_PENDING_BATCHES_PER_WORKER)
+        self._partition_locks = [threading.Lock() for _ in range(self.workers)]
+        self._lock = threading.Lock()
+        self._errors: List[BaseException] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(flush=exc_type is None)
+        return False
+
+    # 首次出现的标签先创建唯一约束，再写入该标签的数据
+    def ensure_label(self, label: str):
+        if label in self.labels:
+            return
+        self.labels.add(label)
+        if self.create_constraints:
+            with self.driver.session() as session:
+                create_unique_constraints(session, {label})
+
+    def add_entity(self, label: str, row: Dict[str, Any]):
+        self.ensure_label(label)
+        part = partition_of(f"{label}\x1f{row['name']}", self.workers)
+        self._add(("node", label, (part,)), row["name"], row, "props")
+
+    def add_relation(self, group: Tuple[str, str, str], row: Dict[str, Any]):
+        src_label, tgt_label, _ = group
+        self.ensure_label(src_label)
+        self.ensure_label(tgt_label)
+        parts = (
+            partition_of(f"{src_label}\x1f{row['source_name']}", self.workers),
+            partition_of(f"{tgt_label}\x1f{row['target_name']}", self.workers),
+        )
+        self._add(("rel", group, parts), (row["source_name"], row["target_name"]), row, "rel_props")
+
+    # 缓冲区按 节点名 / (起点, 终点) 聚合，去重后的行数达到 batch_size 即提交
+    def _add(self, key: Tuple[Any, ...], ident, row: Dict[str, Any], props_key: str):
+        buf = self._buffers.setdefault(key, {})
+        accumulate_row(buf, ident, row, props_key)
+        if len(buf) >= self.batch_size:
+            del self._buffers[key]
+            self._submit(key, finish_rows(buf))
+
+    def _submit(self, key: Tuple[Any, ...], rows: List[Dict[str, Any]]):
+        self._raise_errors()
+        kind, group, parts = key
+        locks = [self._partition_locks[p] for p in sorted(set(parts))]
+        if kind == "node":
+            query = self.NODE_QUERY.format(label=group)
+            stat_key, report = group, self.node_report
+        else:
+            src_label, tgt_label, rel_type = group
+            query = self.REL_QUERY.format(src_label=src_label, tgt_label=tgt_label, rel_type=rel_type)
+            stat_key, report = rel_type, self.rel_report
+
+        def task() -> int:
+            for lock in locks:
+                lock.acquire()
+            try:
+                started = time.perf_counter()
+                n = run_batch(self.driver, query, rows)
+            finally:
+                for lock in reversed(locks):
+                    lock.release()
+            if report is not None:
+                report.record(stat_key, n, started, time.perf_counter())
+            with self._lock:
+                if kind == "node":
+                    self.node_count += n
+                else:
+                    self.rel_count += n
+            return n
+
+        self._pending.acquire()
+        fut = self._executors[parts[0]].submit(task)
+        fut.add_done_callback(self._on_done)
+
+    def _on_done(self, fut):
+        self._pending.release()
+        exc = fut.exception()
+        if exc is not None:
+            with self._lock:
+                self._errors.append(exc)
+
+    def _raise_errors(self):
+        with self._lock:
+            if self._errors:
+                raise self._errors[0]
+
+    # 提交剩余缓冲；节点批次先于关系批次提交
+    def flush(self):
+        keys = sorted(self._buffers, key=lambda k: k[0] != "node")
+        for key in keys:
+            self._submit(key, finish_rows(self._buffers.pop(key)))
+
+    def close(self, flush: bool = True):
+        try:
+            if flush:
+                self.flush()
+        finally:
+            for ex in self._executors:
+                ex.shutdown(wait=True)
+        self._raise_errors()
+
+
+# ---------------- 增量导入：按文档内容哈希只写入变化部分 ----------------
+
+# 清单（manifest）记录每个文档的内容哈希及其贡献的节点/关系键与出现次数：
+#   {"version": 2, "documents": {doc_id: {"hash": ..., "nodes": [[label, name, occurrences], ...],
+#                                          "rels": [[src_label, src, rel_type, tgt_label, tgt, occurrences], ...]}}}
+# 节点键包含关系端点（出现次数为 0），因此被任何保留文档引用的节点都不会被删除
+MANIFEST_VERSION = 2
+
+
+def load_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"{path}: 不支持的清单版本 {manifest.get('version')}")
+    return manifest["documents"]
+
+
+# 先写临时文件再原子替换，导入中断时旧清单保持完整
+def save_manifest(path: str, documents: Dict[str, Dict[str, Any]]):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "documents": documents}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# 对比清单与本次输入：返回 (新增或内容变化的文档, 已不存在的文档)
+def plan_delta(old_docs: Dict[str, Dict[str, Any]], doc_hashes: Dict[str, str]) -> Tuple[Set[str], Set[str]]:
+    changed = {doc for doc, h in doc_hashes.items() if old_docs.get(doc, {}).get("hash") != h}
+    removed = set(old_docs) - set(doc_hashes)
+    return changed, removed
+
+
+# 记录单个文档贡献的节点与关系键及各自的出现次数
+class Contributions:
+    def __init__(self):
+        self.nodes: Counter = Counter()
+        self.rels: Counter = Counter()
+
+    def add(self, entity_rows, rel_rows):
+        for label, row in entity_rows:
+            self.nodes[(label, row["name"])] += row["occurrences"]
+        for (src_label, tgt_label, rel_type), row in rel_rows:
+            src, tgt = row["source_name"], row["target_name"]
+            self.nodes[(src_label, src)] += 0
+            self.nodes[(tgt_label, tgt)] += 0
+            self.rels[(src_label, src, rel_type, tgt_label, tgt)] += row["occurrences"]
+
+    def to_manifest(self, doc_hash: str) -> Dict[str, Any]:
+        return {
+            "hash": doc_hash,
+            "nodes": sorted([*key, n] for key, n in self.nodes.items()),
+            "rels": sorted([*key, n] for key, n in self.rels.items()),
+        }
+
+
+# 计算需要删除的键：旧版本（变化或消失的文档）贡献过、但已没有任何文档再贡献的节点与关系
+def stale_contributions(
+    old_docs: Dict[str, Dict[str, Any]],
+    new_docs: Dict[str, Dict[str, Any]],
+    dropped: Set[str],
+) -> Tuple[Set[Tuple[str, ...]], Set[Tuple[str, ...]]]:
+    old_nodes: Set[Tuple[str, ...]] = set()
+    old_rels: Set[Tuple[str, ...]] = set()
+    for doc in dropped:
+        entry = old_docs.get(doc)
+        if entry:
+            old_nodes.update(tuple(e[:-1]) for e in entry["nodes"])
+            old_rels.update(tuple(e[:-1]) for e in entry["rels"])
+    for entry in new_docs.values():
+        if not old_nodes and not old_rels:
+            break
+        old_nodes.difference_update(tuple(e[:-1]) for e in entry["nodes"])
+        old_rels.difference_update(tuple(e[:-1]) for e in entry["rels"])
+    return old_nodes, old_rels
+
+
+# 撤回文档旧版本的溯源：从 document_ids 中移除该文档、occurrences 减去其出现次数；
+# 标量 document_id 指向该文档时改为剩余文档中的最后一个。需在重新写入这些文档之前执行
+def retract_documents(
+    driver,
+    old_docs: Dict[str, Dict[str, Any]],
+    docs: Set[str],
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    node_groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    rel_groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+    for doc in docs:
+        entry = old_docs.get(doc)
+        if not entry:
             continue
+        for label, name, n in entry["nodes"]:
+            if n:
+                node_groups[label].append({"name": name, "document_id": doc, "occurrences": n})
+        for src_label, src, rel_type, tgt_label, tgt, n in entry["rels"]:
+            rel_groups[(src_label, tgt_label, rel_type)].append(
+                {"source_name": src, "target_name": tgt, "document_id": doc, "occurrences": n}
+            )
+
+    retract = """
+        WITH {var}, row, [d IN coalesce({var}.document_ids, []) WHERE d <> row.document_id] AS ids
+        SET {var}.document_ids = ids,
+            {var}.occurrences = coalesce({var}.occurrences, 0) - row.occurrences,
+            {var}.document_id = CASE WHEN {var}.document_id = row.document_id THEN last(ids) ELSE {var}.document_id END
+        """
+    count = 0
+    for label, rows in node_groups.items():
         q = f"""
         UNWIND $rows AS row
-        MERGE (a:`{src_label}` {{name: row.source_name}})
-        MERGE (b:`{tgt_label}` {{name: row.target_name}})
-        MERGE (a)-[r:`{rel_type}`]->(b)
-        SET r += row.rel_props
+        MATCH (n:`{label}` {{name: row.name}})
+        """ + retract.format(var="n")
+        for batch in chunked(rows, batch_size):
+            count += run_batch(driver, q, batch)
+    for (src_label, tgt_label, rel_type), rows in rel_groups.items():
+        q = f"""
+        UNWIND $rows AS row
+        MATCH (a:`{src_label}` {{name: row.source_name}})-[r:`{rel_type}`]->(b:`{tgt_label}` {{name: row.target_name}})
+        """ + retract.format(var="r")
+        for batch in chunked(rows, batch_size):
+            count += run_batch(driver, q, batch)
+    return count
+
+
+# 删除过期贡献：先删关系，再 DETACH DELETE 节点（节点已无任何文档引用，其上剩余关系同样过期）
+def delete_contributions(
+    driver,
+    node_keys: Set[Tuple[str, ...]],
+    rel_keys: Set[Tuple[str, ...]],
+    batch_size: int = BATCH_SIZE,
+) -> Tuple[int, int]:
+    rel_groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+    for src_label, src, rel_type, tgt_label, tgt in rel_keys:
+        rel_groups[(src_label, tgt_label, rel_type)].append({"source_name": src, "target_name": tgt})
+    rel_count = 0
+    for (src_label, tgt_label, rel_type), rows in rel_groups.items():
+        q = f"""
+        UNWIND $rows AS row
+        MATCH (a:`{src_label}` {{name: row.source_name}})-[r:`{rel_type}`]->(b:`{tgt_label}` {{name: row.target_name}})
+        DELETE r
+        """
+        for batch in chunked(rows, batch_size):
+            rel_count += run_batch(driver, q, batch)
+
+    node_groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for label, name in node_keys:
+        node_groups[label].append({"name": name})
+    node_count = 0
+    for label, rows in node_groups.items():
+        q = f"""
+        UNWIND $rows AS row
+        MATCH (n:`{label}` {{name: row.name}})
+        DETACH DELETE n
         """
-        session.run(q, rows=rows)
-        total += len(rows)
-    return total
+        for batch in chunked(rows, batch_size):
+            node_count += run_batch(driver, q, batch)
+    return node_count, rel_count
+
+
+# ---------------- 离线导出：neo4j-admin import CSV ----------------
 
-# 数据与连接配置（按需修改）
+# 数组元素分隔符（U+001F 单元分隔符，正常文本中不会出现）
+CSV_ARRAY_DELIMITER = "\x1f"
+
+_CSV_SCALAR_TYPES = ((bool, "boolean"), (int, "long"), (float, "double"), (str, "string"))
+
+
+def _csv_scalar_type(v) -> str:
+    for py_type, csv_type in _CSV_SCALAR_TYPES:
+        if isinstance(v, py_type):
+            return csv_type
+    return "string"
+
+
+# 由 sanitize_value 的输出推断列类型；类型不一致时退化为 string / string[]
+def infer_csv_type(values: List[Any]) -> str:
+    kinds = set()
+    for v in values:
+        if v is None:
+            continue
+        if isinstance(v, list):
+            elem = {_csv_scalar_type(e) for e in v} or {"string"}
+            kinds.add((elem.pop() if len(elem) == 1 else "string") + "[]")
+        else:
+            kinds.add(_csv_scalar_type(v))
+    if not kinds:
+        return "string"
+    if len(kinds) == 1:
+        return kinds.pop()
+    if kinds <= {"long", "double"}:
+        return "double"
+    if kinds <= {"long[]", "double[]"}:
+        return "double[]"
+    if all(k.endswith("[]") for k in kinds):
+        return "string[]"
+    return "string"
+
+
+def format_csv_value(v, csv_type: str) -> str:
+    if v is None:
+        return ""
+    if csv_type.endswith("[]"):
+        if not isinstance(v, list):
+            v = [v]
+        return CSV_ARRAY_DELIMITER.join(format_csv_value(e, csv_type[:-2]) for e in v)
+    if isinstance(v, list):
+        return json.dumps(v, ensure_ascii=False)
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    return str(v)
+
+
+# 表头中的属性名不能含 ':'
+def _csv_prop_name(key: str) -> str:
+    return key.replace(":", "_")
+
+
+def _csv_file_name(*parts: str) -> str:
+    return "__".join(re.sub(r"[^\w\-]+", "_", p) for p in parts) + ".csv"
+
+
+def _write_csv(path: str, header: List[str], rows: Iterable[List[str]]) -> int:
+    n = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            n += 1
+    return n
+
+
+def _prop_columns(props_list: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    keys: Dict[str, List[Any]] = {}
+    for props in props_list:
+        for k, v in props.items():
+            keys.setdefault(k, []).append(v)
+    return [(k, infer_csv_type(vals)) for k, vals in keys.items()]
+
+
+# 属性 + 溯源数组，作为 CSV 的属性列
+def _with_provenance(row: Dict[str, Any], props_key: str) -> Dict[str, Any]:
+    return {**row[props_key], "document_ids": row["document_ids"], "occurrences": row["occurrences"]}
+
+
+# 导出节点与关系 CSV：每个标签独立 ID 空间（name 在标签内唯一，与 MERGE 语义一致），
+# 同一 (起点, 终点, 类型) 的关系聚合为一行，与 MERGE (a)-[r]->(b) 加溯源合并的结果一致
+def export_csv(
+    entities_by_label: Dict[str, List[Dict[str, Any]]],
+    rel_groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]],
+    out_dir: str,
+) -> Tuple[List[str], List[str], int, int]:
+    os.makedirs(out_dir, exist_ok=True)
+    node_files, rel_files = [], []
+    node_count = rel_count = 0
+
+    for label, rows in sorted(entities_by_label.items()):
+        rows = merge_entity_rows(rows)
+        if not rows:
+            continue
+        props_list = [_with_provenance(r, "props") for r in rows]
+        columns = _prop_columns(props_list)
+        header = [f"name:ID({label})", ":LABEL"] + [f"{_csv_prop_name(k)}:{t}" for k, t in columns]
+        path = os.path.abspath(os.path.join(out_dir, _csv_file_name("nodes", label)))
+        node_count += _write_csv(
+            path,
+            header,
+            (
+                [r["name"], label] + [format_csv_value(props.get(k), t) for k, t in columns]
+                for r, props in zip(rows, props_list)
+            ),
+        )
+        node_files.append(path)
+
+    for (src_label, tgt_label, rel_type), rows in sorted(rel_groups.items()):
+        merged = {
+            (r["source_name"], r["target_name"]): _with_provenance(r, "rel_props") for r in merge_rel_rows(rows)
+        }
+        if not merged:
+            continue
+        columns = _prop_columns(list(merged.values()))
+        header = [f":START_ID({src_label})", f":END_ID({tgt_label})", ":TYPE"] + [
+            f"{_csv_prop_name(k)}:{t}" for k, t in columns
+        ]
+        path = os.path.abspath(os.path.join(out_dir, _csv_file_name("rels", src_label, rel_type, tgt_label)))
+        rel_count += _write_csv(
+            path,
+            header,
+            (
+                [src, tgt, rel_type] + [format_csv_value(props.get(k), t) for k, t in columns]
+                for (src, tgt), props in merged.items()
+            ),
+        )
+        rel_files.append(path)
+
+    return node_files, rel_files, node_count, rel_count
+
+
+# 生成 neo4j-admin（5.x）离线导入命令；4.x 请改用 `neo4j-admin import --database=<db>`
+def build_import_command(node_files: List[str], rel_files: List[str], database: str = "neo4j") -> str:
+    parts = [
+        "neo4j-admin database import full",
+        database,
+        "--overwrite-destination=true",
+        "--id-type=string",
+        "--array-delimiter=U+001F",
+        "--multiline-fields=true",
+    ]
+    parts += [f"--nodes={shlex.quote(p)}" for p in node_files]
+    parts += [f"--relationships={shlex.quote(p)}" for p in rel_files]
+    return " \\\n  ".join(parts)
+
+
+# 报告未解析的关系端点（没有任何同名实体，只能以 UNRESOLVED_LABEL 建节点）
+def report_unresolved(unresolved: Counter, limit: int = 20):
+    if not unresolved:
+        print("关系端点全部解析到实体标签")
+        return
+    print(f"未解析的关系端点: {len(unresolved)} 个名字，共 {sum(unresolved.values())} 次，"
+          f"以 `{UNRESOLVED_LABEL}` 标签建节点；出现最多的:")
+    for name, n in unresolved.most_common(limit):
+        print(f"  {name}\t{n}")
+
+
+# 数据与连接配置（按需修改，亦可通过命令行参数覆盖）
 DATA_PATH = "your data file"
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "your password")
 CREATE_CONSTRAINTS = True  # 是否创建唯一约束
 
-# 读取数据
-with open(DATA_PATH, "r", encoding="utf-8") as f:
-    items = json.load(f)
 
-# 规范化与分组（支持 source/target/relation 为列表）
-entities_by_label, rel_groups, all_labels = normalize_items(items)
+def main():
+    parser = argparse.ArgumentParser(description="将抽取结果 JSON 导入 Neo4j")
+    parser.add_argument("--mode", choices=("cypher", "export-csv", "sqlite"), default="cypher",
+                        help="cypher: 在线 MERGE 导入; export-csv: 导出 neo4j-admin 离线导入 CSV; "
+                             "sqlite: 写入内嵌 SQLite 图（无需 Neo4j）")
+    parser.add_argument("--sqlite-path", default="kite_graph.db", help="sqlite 模式的图文件")
+    parser.add_argument("--data", default=DATA_PATH, help="抽取结果 JSON 文件")
+    parser.add_argument("--out-dir", default="neo4j_import", help="export-csv 模式的输出目录")
+    parser.add_argument("--database", default="neo4j", help="export-csv 模式导入命令中的目标数据库")
+    parser.add_argument("--uri", default=NEO4J_URI)
+    parser.add_argument("--user", default=NEO4J_USER)
+    parser.add_argument("--password", default=NEO4J_PASSWORD)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="每个事务写入的行数")
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS, help="并行会话数")
+    parser.add_argument("--no-constraints", action="store_true", help="不创建 name 唯一约束")
+    parser.add_argument("--label-index", default=None,
+                        help="名字->标签索引的 sqlite 文件路径（超大语料使用；默认在内存中）")
+    parser.add_argument("--delta", action="store_true",
+                        help="增量导入：只写入新增/变化文档，并删除变化或消失文档的过期贡献")
+    parser.add_argument("--manifest", default=None,
+                        help="文档哈希清单路径（默认 <data>.manifest.json）。cypher 模式在 --delta、指定本参数"
+                             "或默认清单已存在时记录并更新清单；否则全量导入不记录文档贡献，内存与语料规模无关")
+    parser.add_argument("--resolve-entities", action="store_true",
+                        help="导入前做实体消歧（规范化 + MinHash/LSH 聚类），同一实体的不同写法归并为一个节点")
+    parser.add_argument("--canonical-map", default=None,
+                        help="规范名映射文件：配合 --resolve-entities 时写出本次映射，否则读取已有映射并应用")
+    parser.add_argument("--touched-out", default=None,
+                        help="受影响节点清单路径（默认 <data>.touched.json），导入后与已有清单合并写出，"
+                             "供 rare_node.py --incremental 使用；cypher 模式不记录清单时需显式指定才写出")
+    args = parser.parse_args()
+    if args.delta and args.mode != "cypher":
+        parser.error("--delta 仅支持 cypher 模式")
+    manifest_path = args.manifest or args.data + ".manifest.json"
+    touched_path = args.touched_out or args.data + ".touched.json"
+    # cypher 模式只在需要时记录文档贡献与清单（每个文档的节点/关系键会保留到导入结束）
+    track = args.mode == "cypher" and (args.delta or args.manifest is not None or os.path.exists(manifest_path))
+
+    # 第一遍：建立完整的 名字 -> 标签 索引，关系端点不再依赖实体出现的先后；记录清单时同时计算文档哈希
+    started = time.perf_counter()
+    doc_hashes: Dict[str, str] | None = {} if track else None
+    resolver = EntityResolver() if args.resolve_entities else None
+    doc_names = {} if doc_hashes is not None and (args.resolve_entities or args.canonical_map) else None
+    label_index = build_label_index(iter_items(args.data), args.label_index, doc_hashes, resolver, doc_names)
+    print(f"标签索引: {len(label_index)} 个实体名，标签冲突 {label_index.conflicts} 次，"
+          f"{time.perf_counter() - started:.2f}s")
+    if resolver is not None:
+        started = time.perf_counter()
+        resolver.build()
+        print(f"实体消歧: 归并 {len(resolver.mapping)} 个名字到 {len(resolver.clusters)} 个规范名，"
+              f"{time.perf_counter() - started:.2f}s")
+        if args.canonical_map:
+            resolver.save(args.canonical_map)
+            print(f"规范名映射已写入 {args.canonical_map}")
+    elif args.canonical_map:
+        resolver = EntityResolver.load(args.canonical_map)
+        print(f"已加载规范名映射 {args.canonical_map}: {len(resolver.mapping)} 个名字")
+    normalizer = ItemNormalizer(label_index, resolver)
+    if doc_names is not None:
+        fold_resolution(doc_hashes, doc_names, normalizer)
+        doc_names = None
+
+    if args.mode == "export-csv":
+        # 离线模式：不连接数据库；CSV 需按标签/关系分组写出，规范化结果汇总在内存中
+        entities_by_label, rel_groups, all_labels = normalize_items(iter_items(args.data), normalizer)
+        label_index.close()
+        report_unresolved(normalizer.unresolved)
+        endpoint_count = add_missing_endpoints(entities_by_label, rel_groups)
+        node_files, rel_files, node_count, rel_count = export_csv(entities_by_label, rel_groups, args.out_dir)
+        command = build_import_command(node_files, rel_files, args.database)
+        script_path = os.path.join(args.out_dir, "import.sh")
+        with open(script_path, "w", encoding="utf-8") as f:
+            f.write("#!/bin/sh\n# 需先停止目标数据库\n" + command + "\n")
+        print(f"导出完成 -> 节点: {node_count}（其中关系端点补建 {endpoint_count}），关系: {rel_count}")
+        print(f"CSV 目录: {os.path.abspath(args.out_dir)}，导入命令已写入 {script_path}:")
+        print(command)
+        print("导入并启动数据库后，建议为各标签创建 name 唯一约束，例如:")
+        for label in sorted(all_labels):
+            print(f"  CREATE CONSTRAINT `{label}_name_unique` IF NOT EXISTS FOR (n:`{label}`) REQUIRE n.name IS UNIQUE;")
+        return
+
+    if args.mode == "sqlite":
+        # 内嵌模式：规范化结果汇总在内存中后写入 SQLite 图
+        entities_by_label, rel_groups, all_labels = normalize_items(iter_items(args.data), normalizer)
+        label_index.close()
+        started = time.perf_counter()
+        with SQLiteGraphStore(args.sqlite_path) as store:
+            node_count, rel_count = store.import_graph(entities_by_label, rel_groups)
+        print(f"导入完成 -> SQLite 图 {args.sqlite_path}，节点行: {node_count}，关系: {rel_count}，"
+              f"标签: {len(all_labels)}，耗时 {time.perf_counter() - started:.2f}s")
+        touched = {(label, row["name"]) for label, rows in entities_by_label.items() for row in rows}
+        for (src_label, tgt_label, _), rows in rel_groups.items():
+            for row in rows:
+                touched.add((src_label, row["source_name"]))
+                touched.add((tgt_label, row["target_name"]))
+        save_touched_nodes(touched_path, touched)
+        print(f"受影响节点 {len(touched)} 个，清单已写入 {touched_path}")
+        report_unresolved(normalizer.unresolved)
+        return
+
+    create_constraints = CREATE_CONSTRAINTS and not args.no_constraints
+    workers = args.workers
+    if not create_constraints and workers > 1:
+        # 无唯一约束时并发 MERGE 同一节点可能产生重复节点，退化为单会话
+        print("未创建唯一约束，并发 MERGE 可能产生重复节点，改为单会话导入")
+        workers = 1
+
+    # 增量模式：只处理新增或内容变化的文档；全量模式重新写入全部文档
+    # 记录清单时两种模式都先按旧清单撤回将被重写文档的溯源，保证 document_ids / occurrences 不重复累计；
+    # 不记录清单时（changed 为 None）直接流式写入全部条目，只在指定 --touched-out 时收集受影响节点
+    old_docs = load_manifest(manifest_path) if track else {}
+    changed: Set[str] | None = None
+    removed: Set[str] = set()
+    if args.delta:
+        changed, removed = plan_delta(old_docs, doc_hashes)
+        print(f"增量导入: 共 {len(doc_hashes)} 个文档，新增/变化 {len(changed)}，"
+              f"未变化 {len(doc_hashes) - len(changed)}，已删除 {len(removed)}")
+    elif track:
+        changed = set(doc_hashes)
+    contributions: Dict[str, Contributions] = defaultdict(Contributions)
+    touched: Set[Tuple[str, str]] = set()
+    collect_touched = changed is None and args.touched_out is not None
+
+    # 连接并流式导入：逐条读取、规范化，攒满批次即写入
+    driver = GraphDatabase.driver(args.uri, auth=(args.user, args.password))
+    node_report = ThroughputReport()
+    rel_report = ThroughputReport()
+    deleted_nodes = deleted_rels = 0
+    started = time.perf_counter()
+    try:
+        if changed is not None:
+            retracted = retract_documents(driver, old_docs, (changed | removed) & set(old_docs), args.batch_size)
+            if retracted:
+                print(f"撤回旧版本溯源: {retracted} 行")
+        with StreamingImporter(
+            driver, args.batch_size, workers, create_constraints, node_report, rel_report
+        ) as importer:
+            for item in iter_items(args.data):
+                doc = document_key(item)
+                if changed is not None and doc not in changed:
+                    continue
+                entity_rows, rel_rows = normalizer.normalize(item)
+                if changed is not None:
+                    contributions[doc].add(entity_rows, rel_rows)
+                elif collect_touched:
+                    touched.update((label, row["name"]) for label, row in entity_rows)
+                    for (src_label, tgt_label, _), row in rel_rows:
+                        touched.add((src_label, row["source_name"]))
+                        touched.add((tgt_label, row["target_name"]))
+                for label, row in entity_rows:
+                    importer.add_entity(label, row)
+                for group, row in rel_rows:
+                    importer.add_relation(group, row)
+
+        if changed is None:
+            if collect_touched:
+                save_touched_nodes(touched_path, touched)
+        else:
+            # 新清单 = 未重写文档的旧条目 + 本次写入文档的新条目；
+            # 全量模式下输入中已不存在的文档仍留在图中，保留其条目，留待之后的增量导入删除
+            documents = {doc: entry for doc, entry in old_docs.items() if doc not in changed and doc not in removed}
+            for doc in changed:
+                documents[doc] = contributions[doc].to_manifest(doc_hashes[doc])
+            node_keys, rel_keys = stale_contributions(old_docs, documents, changed | removed)
+            deleted_nodes, deleted_rels = delete_contributions(driver, node_keys, rel_keys, args.batch_size)
+            save_manifest(manifest_path, documents)
+
+            # 受影响节点：重写/删除文档的旧贡献与新贡献（均含关系两端）
+            for doc in changed | removed:
+                touched.update((label, name) for label, name, _ in old_docs.get(doc, {}).get("nodes", ()))
+                if doc in contributions:
+                    touched.update(contributions[doc].nodes)
+            save_touched_nodes(touched_path, touched)
+    finally:
+        driver.close()
+        label_index.close()
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    node_count, rel_count = importer.node_count, importer.rel_count
 
-# 连接并导入
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-with driver.session() as session:
-    if CREATE_CONSTRAINTS:
-        create_unique_constraints(session, all_labels)
+    node_report.print_summary("节点导入吞吐（按标签）")
+    rel_report.print_summary("关系导入吞吐（按关系类型）")
+    print(
+        f"导入完成 -> 节点行: {node_count}，关系: {rel_count}，标签: {len(importer.labels)}，"
+        f"耗时 {elapsed:.2f}s，{(node_count + rel_count) / elapsed:.1f} 行/秒"
+    )
+    if changed is not None:
+        print(f"删除过期贡献 -> 节点: {deleted_nodes}，关系: {deleted_rels}")
+        print(f"文档清单已写入 {manifest_path}")
+    if changed is not None or collect_touched:
+        print(f"受影响节点 {len(touched)} 个，清单已写入 {touched_path}")
+    report_unresolved(normalizer.unresolved)
 
-    node_count = import_entities(session, entities_by_label)
-    rel_count = import_relations(session, rel_groups)
 
-driver.close()
-print(f"导入完成 -> 节点: {node_count}, 关系: {rel_count}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
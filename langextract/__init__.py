@@ -67,11 +67,13 @@ _LAZY_MODULES = {
     "data": "langextract.data",
     "data_lib": "langextract.data_lib",
     "debug_utils": "langextract.core.debug_utils",
+    "example_selection": "langextract.example_selection",
     "exceptions": "langextract.exceptions",
     "factory": "langextract.factory",
     "inference": "langextract.inference",
     "io": "langextract.io",
     "progress": "langextract.progress",
+    "prompt_budget": "langextract.prompt_budget",
     "prompting": "langextract.prompting",
     "providers": "langextract.providers",
     "resolver": "langextract.resolver",
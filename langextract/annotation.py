@@ -26,25 +26,164 @@ Usage example:
 from __future__ import annotations
 
 from collections.abc import Iterable, Iterator
+from concurrent import futures
 import itertools
 import time
+from typing import Any
 
 from absl import logging
 
 from langextract import chunking
+from langextract import example_selection
 from langextract import progress
+from langextract import prompt_budget as prompt_budget_lib
 from langextract import prompting
 from langextract import resolver as resolver_lib
 from langextract.core import base_model
 from langextract.core import data
 from langextract.core import exceptions
 from langextract.core import format_handler as fh
+from langextract.core import tokenizer
 
 
 class DocumentRepeatError(exceptions.LangExtractError):
   """Exception raised when identical document ids are present."""
 
 
+# Compact, picklable form of an aligned extraction returned by resolve
+# workers: (extraction_class, extraction_text, token_start, token_end,
+# char_start, char_end, alignment_status, extraction_index, group_index,
+# description, attributes).
+_ExtractionRecord = tuple[
+    str,
+    str,
+    int | None,
+    int | None,
+    int | None,
+    int | None,
+    str | None,
+    int | None,
+    int | None,
+    str | None,
+    dict | None,
+]
+
+# Resolver and keyword arguments installed in each resolve worker process.
+_worker_resolver: resolver_lib.AbstractResolver | None = None
+_worker_kwargs: dict[str, Any] = {}
+
+
+def _extraction_to_record(extraction: data.Extraction) -> _ExtractionRecord:
+  """Packs an aligned extraction into a compact record."""
+  token_interval = extraction.token_interval
+  char_interval = extraction.char_interval
+  return (
+      extraction.extraction_class,
+      extraction.extraction_text,
+      token_interval.start_index if token_interval else None,
+      token_interval.end_index if token_interval else None,
+      char_interval.start_pos if char_interval else None,
+      char_interval.end_pos if char_interval else None,
+      (
+          extraction.alignment_status.value
+          if extraction.alignment_status
+          else None
+      ),
+      extraction.extraction_index,
+      extraction.group_index,
+      extraction.description,
+      extraction.attributes,
+  )
+
+
+def _extraction_from_record(record: _ExtractionRecord) -> data.Extraction:
+  """Rebuilds an aligned extraction from a compact record."""
+  (
+      extraction_class,
+      extraction_text,
+      token_start,
+      token_end,
+      char_start,
+      char_end,
+      alignment_status,
+      extraction_index,
+      group_index,
+      description,
+      attributes,
+  ) = record
+  return data.Extraction(
+      extraction_class=extraction_class,
+      extraction_text=extraction_text,
+      token_interval=(
+          tokenizer.TokenInterval(start_index=token_start, end_index=token_end)
+          if token_start is not None
+          else None
+      ),
+      char_interval=(
+          data.CharInterval(start_pos=char_start, end_pos=char_end)
+          if char_start is not None or char_end is not None
+          else None
+      ),
+      alignment_status=(
+          data.AlignmentStatus(alignment_status) if alignment_status else None
+      ),
+      extraction_index=extraction_index,
+      group_index=group_index,
+      description=description,
+      attributes=attributes,
+  )
+
+
+def _init_resolve_worker(
+    resolver: resolver_lib.AbstractResolver, kwargs: dict[str, Any]
+) -> None:
+  """Installs the resolver and its keyword arguments in a worker process."""
+  global _worker_resolver, _worker_kwargs
+  if isinstance(resolver, resolver_lib.Resolver):
+    # Drop the counters pickled with the parent's resolver; the parent
+    # already holds them.
+    resolver.take_stats()
+  _worker_resolver = resolver
+  _worker_kwargs = kwargs
+
+
+def _resolve_and_align_chunk(
+    model_output: str,
+    chunk_text: str,
+    token_offset: int,
+    char_offset: int,
+) -> tuple[list[_ExtractionRecord], resolver_lib.ResolverStats | None]:
+  """Resolves and aligns one chunk's model output in a worker process.
+
+  Args:
+    model_output: Top scored model output for the chunk.
+    chunk_text: Text of the chunk the output was produced for.
+    token_offset: Token index of the chunk start within its document.
+    char_offset: Character index of the chunk start within its document.
+
+  Returns:
+    Compact records of the aligned extractions, in resolver order, and the
+    resolver counters accumulated for the chunk, to be merged into the parent
+    resolver (None for resolvers without counters).
+  """
+  assert _worker_resolver is not None, "Resolve worker not initialized."
+  extractions = _worker_resolver.resolve(model_output, **_worker_kwargs)
+  aligned_extractions = _worker_resolver.align(
+      extractions,
+      chunk_text,
+      token_offset,
+      char_offset,
+      **_worker_kwargs,
+  )
+  records = [_extraction_to_record(e) for e in aligned_extractions]
+  stats = (
+      _worker_resolver.take_stats()
+      if isinstance(_worker_resolver, resolver_lib.Resolver)
+      else None
+  )
+  return records, stats
+
+
 def _merge_non_overlapping_extractions(
     all_extractions: list[Iterable[data.Extraction]],
 ) -> list[data.Extraction]:
@@ -167,6 +306,9 @@ class Annotator:
       attribute_suffix: str = data.ATTRIBUTE_SUFFIX,
       fence_output: bool = False,
       format_handler: fh.FormatHandler | None = None,
+      resolve_max_workers: int | None = None,
+      example_selector: example_selection.ExampleSelector | None = None,
+      prompt_budget: prompt_budget_lib.PromptBudget | None = None,
   ):
     """Initializes Annotator.
 
@@ -174,15 +316,26 @@ class Annotator:
       language_model: Model which performs language model inference.
       prompt_template: Structured prompt template where the answer is expected
         to be formatted text (YAML or JSON).
-      format_type: The format type for the output (YAML or JSON).
+      format_type: The format type for the output (YAML, JSON or COMPACT).
       attribute_suffix: Suffix to append to attribute keys in the output.
       fence_output: Whether to expect/generate fenced output (```json or
         ```yaml). When True, the model is prompted to generate fenced output and
         the resolver expects it. When False, raw JSON/YAML is expected.
         Defaults to False. If format_handler is provided, it takes precedence.
       format_handler: Optional FormatHandler for managing format-specific logic.
+      resolve_max_workers: Number of worker processes used to resolve and align
+        the model output of each chunk. None or values below 2 resolve and
+        align on the calling thread. Useful when inference is fast enough that
+        resolution becomes the bottleneck; the resolver and the keyword
+        arguments passed to annotate must be picklable.
+      example_selector: Optional selector choosing the few-shot examples
+        rendered for each chunk. None renders all examples.
+      prompt_budget: Optional PromptBudget that measures every prompt by
+        section, drops examples to respect its token ceiling and logs a
+        run-level summary when annotation finishes.
     """
     self._language_model = language_model
+    self._resolve_max_workers = resolve_max_workers
 
     if format_handler is None:
       format_handler = fh.FormatHandler(
@@ -196,6 +349,8 @@ class Annotator:
     self._prompt_generator = prompting.QAPromptGenerator(
         template=prompt_template,
         format_handler=format_handler,
+        example_selector=example_selector,
+        prompt_budget=prompt_budget,
     )
 
     logging.debug(
@@ -267,6 +422,10 @@ class Annotator:
           **kwargs,
       )
 
+    budget = self._prompt_generator.prompt_budget
+    if budget is not None:
+      logging.info("%s", budget.summary())
+
   def _annotate_documents_single_pass(
       self,
       documents: Iterable[data.Document],
@@ -299,42 +458,33 @@ class Annotator:
 
     chars_processed = 0
 
-    for index, batch in enumerate(progress_bar):
-      logging.info("Processing batch %d with length %d", index, len(batch))
-
-      batch_prompts: list[str] = []
-      for text_chunk in batch:
-        batch_prompts.append(
-            self._prompt_generator.render(
-                question=text_chunk.chunk_text,
-                additional_context=text_chunk.additional_context,
-            )
-        )
-
-      # Show what we're currently processing
-      if debug and progress_bar:
-        batch_size = sum(len(chunk.chunk_text) for chunk in batch)
-        desc = progress.format_extraction_progress(
-            model_info,
-            current_chars=batch_size,
-            processed_chars=chars_processed,
-        )
-        progress_bar.set_description(desc)
-
-      batch_scored_outputs = self._language_model.infer(
-          batch_prompts=batch_prompts,
-          **kwargs,
+    resolve_pool = None
+    if self._resolve_max_workers and self._resolve_max_workers > 1:
+      resolve_pool = futures.ProcessPoolExecutor(
+          max_workers=self._resolve_max_workers,
+          initializer=_init_resolve_worker,
+          initargs=(resolver, {"debug": debug, **kwargs}),
+      )
+      logging.info(
+          "Resolving chunks with %d worker processes.",
+          self._resolve_max_workers,
       )
 
-      # Update total processed
-      if debug:
-        for chunk in batch:
-          if chunk.document_text:
-            char_interval = chunk.char_interval
-            chars_processed += char_interval.end_pos - char_interval.start_pos
+    try:
+      for index, batch in enumerate(progress_bar):
+        logging.info("Processing batch %d with length %d", index, len(batch))
+
+        batch_prompts: list[str] = []
+        for text_chunk in batch:
+          batch_prompts.append(
+              self._prompt_generator.render(
+                  question=text_chunk.chunk_text,
+                  additional_context=text_chunk.additional_context,
+              )
+          )
 
-        # Update progress bar with final processed count
-        if progress_bar:
+        # Show what we're currently processing
+        if debug and progress_bar:
           batch_size = sum(len(chunk.chunk_text) for chunk in batch)
           desc = progress.format_extraction_progress(
               model_info,
@@ -343,53 +493,112 @@ class Annotator:
           )
           progress_bar.set_description(desc)
 
-      for text_chunk, scored_outputs in zip(batch, batch_scored_outputs):
-        logging.debug("Processing chunk: %s", text_chunk)
-        if not scored_outputs:
-          logging.error(
-              "No scored outputs for chunk with ID %s.", text_chunk.document_id
-          )
-          raise exceptions.InferenceOutputError(
-              "No scored outputs from language model."
-          )
-        while curr_document.document_id != text_chunk.document_id:
-          logging.info(
-              "Completing annotation for document ID %s.",
-              curr_document.document_id,
-          )
-          annotated_doc = data.AnnotatedDocument(
-              document_id=curr_document.document_id,
-              extractions=annotated_extractions,
-              text=curr_document.text,
-          )
-          yield annotated_doc
-          annotated_extractions.clear()
+        batch_scored_outputs = self._language_model.infer(
+            batch_prompts=batch_prompts,
+            **kwargs,
+        )
 
-          curr_document = next(doc_iter, None)
-          assert curr_document is not None, (
-              f"Document should be defined for {text_chunk} per"
-              " _document_chunk_iterator(...) specifications."
-          )
+        # Update total processed
+        if debug:
+          for chunk in batch:
+            if chunk.document_text:
+              char_interval = chunk.char_interval
+              chars_processed += (
+                  char_interval.end_pos - char_interval.start_pos
+              )
+
+          # Update progress bar with final processed count
+          if progress_bar:
+            batch_size = sum(len(chunk.chunk_text) for chunk in batch)
+            desc = progress.format_extraction_progress(
+                model_info,
+                current_chars=batch_size,
+                processed_chars=chars_processed,
+            )
+            progress_bar.set_description(desc)
+
+        # Fan the whole batch out to the resolve workers up front; results
+        # are consumed below in chunk order.
+        chunk_futures: list[futures.Future | None] = [None] * len(batch)
+        if resolve_pool is not None:
+          batch_scored_outputs = list(batch_scored_outputs)
+          chunk_futures = [
+              resolve_pool.submit(
+                  _resolve_and_align_chunk,
+                  scored_outputs[0].output,
+                  text_chunk.chunk_text,
+                  text_chunk.token_interval.start_index,
+                  text_chunk.char_interval.start_pos,
+              )
+              if scored_outputs
+              else None
+              for text_chunk, scored_outputs in zip(
+                  batch, batch_scored_outputs
+              )
+          ]
+
+        for text_chunk, scored_outputs, chunk_future in zip(
+            batch, batch_scored_outputs, chunk_futures
+        ):
+          logging.debug("Processing chunk: %s", text_chunk)
+          if not scored_outputs:
+            logging.error(
+                "No scored outputs for chunk with ID %s.",
+                text_chunk.document_id,
+            )
+            raise exceptions.InferenceOutputError(
+                "No scored outputs from language model."
+            )
+          while curr_document.document_id != text_chunk.document_id:
+            logging.info(
+                "Completing annotation for document ID %s.",
+                curr_document.document_id,
+            )
+            annotated_doc = data.AnnotatedDocument(
+                document_id=curr_document.document_id,
+                extractions=annotated_extractions,
+                text=curr_document.text,
+            )
+            yield annotated_doc
+            annotated_extractions.clear()
 
-        top_inference_result = scored_outputs[0].output
-        logging.debug("Top inference result: %s", top_inference_result)
+            curr_document = next(doc_iter, None)
+            assert curr_document is not None, (
+                f"Document should be defined for {text_chunk} per"
+                " _document_chunk_iterator(...) specifications."
+            )
 
-        annotated_chunk_extractions = resolver.resolve(
-            top_inference_result, debug=debug, **kwargs
-        )
-        chunk_text = text_chunk.chunk_text
-        token_offset = text_chunk.token_interval.start_index
-        char_offset = text_chunk.char_interval.start_pos
-
-        aligned_extractions = resolver.align(
-            annotated_chunk_extractions,
-            chunk_text,
-            token_offset,
-            char_offset,
-            **kwargs,
-        )
+          if chunk_future is not None:
+            records, stats = chunk_future.result()
+            if stats is not None:
+              resolver.merge_stats(stats)
+            annotated_extractions.extend(
+                _extraction_from_record(record) for record in records
+            )
+            continue
+
+          top_inference_result = scored_outputs[0].output
+          logging.debug("Top inference result: %s", top_inference_result)
+
+          annotated_chunk_extractions = resolver.resolve(
+              top_inference_result, debug=debug, **kwargs
+          )
+          chunk_text = text_chunk.chunk_text
+          token_offset = text_chunk.token_interval.start_index
+          char_offset = text_chunk.char_interval.start_pos
+
+          aligned_extractions = resolver.align(
+              annotated_chunk_extractions,
+              chunk_text,
+              token_offset,
+              char_offset,
+              **kwargs,
+          )
 
-        annotated_extractions.extend(aligned_extractions)
+          annotated_extractions.extend(aligned_extractions)
+    finally:
+      if resolve_pool is not None:
+        resolve_pool.shutdown(cancel_futures=True)
 
     progress_bar.close()
 
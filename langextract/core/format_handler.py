@@ -16,6 +16,8 @@
 
 from __future__ import annotations
 
+import collections
+import dataclasses
 import json
 import re
 from typing import Mapping, Sequence
@@ -26,11 +28,46 @@ import yaml
 from langextract.core import data
 from langextract.core import exceptions
 
+# Optional accelerated JSON decoder; the stdlib decoder is used without it.
+try:
+  import orjson  # type: ignore[import-not-found]
+except ImportError:
+  orjson = None
+
 ExtractionValueType = str | int | float | dict | list | None
 
+# libyaml-backed loader when PyYAML was built with it.
+_YAML_SAFE_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 _JSON_FORMAT = "json"
 _YAML_FORMAT = "yaml"
 _YML_FORMAT = "yml"
+_COMPACT_FORMAT = "compact"
+_TEXT_FORMAT = "text"
+_TXT_FORMAT = "txt"
+
+# Compact format: fields are separated by "|", attribute fields are
+# "key=value". A backslash escapes "|", itself, line breaks and "=" in keys,
+# and marks string values that would otherwise read as JSON. Non-string
+# attribute values (lists, mappings) are JSON-encoded.
+_COMPACT_FIELD_SEP = "|"
+_COMPACT_KEY_SEP = "="
+_COMPACT_ESCAPE = "\\"
+_COMPACT_ESCAPES = {"n": "\n", "r": "\r"}
+_COMPACT_JSON_PREFIXES = ("[", "{")
+
+# Joins the head and tail of an abbreviated extraction_text in span-anchor
+# mode, e.g. "The court held...without merit.".
+_SPAN_ANCHOR_MARKER = "..."
+
+# Span table of dedupe_example_spans: extraction texts repeated within an
+# example are emitted once under this key (or as "@1=..." compact lines) and
+# referenced as "@1", "@2", ... by the extractions.
+_SPANS_KEY = "spans"
+_SPAN_REF_FORMAT = "@{}"
+_COMPACT_SPAN_LINE_RE = re.compile(r"^(@\d+)=(.*)$")
+# Shorter texts are not worth a table entry.
+_MIN_DEDUPED_SPAN_CHARS = 16
 
 _FENCE_START = r"```"
 _LANGUAGE_TAG = r"(?P<lang>[A-Za-z0-9_+-]+)?"
@@ -43,6 +80,30 @@ _FENCE_RE = re.compile(
     re.MULTILINE,
 )
 
+# Opening fence with optional language tag, used when salvaging output whose
+# closing fence was cut off.
+_OPEN_FENCE_RE = re.compile(_FENCE_START + _LANGUAGE_TAG + r"[ \t]*\n?")
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+@dataclasses.dataclass(frozen=True)
+class SalvageResult:
+  """Extractions recovered from output that failed the strict parse.
+
+  Attributes:
+    items: Complete extraction mappings, in output order.
+    dropped: Number of partial or malformed items that were discarded.
+  """
+
+  items: list[dict[str, ExtractionValueType]]
+  dropped: int = 0
+
+  @property
+  def salvaged(self) -> int:
+    """Number of recovered extractions."""
+    return len(self.items)
+
 
 class FormatHandler:
   """Handles all format-specific logic for prompts and parsing.
@@ -51,7 +112,7 @@ class FormatHandler:
   including fence detection, wrapper management, and parsing.
 
   Attributes:
-    format_type: The output format ('json' or 'yaml').
+    format_type: The output format ('json', 'yaml' or 'compact').
     use_wrapper: Whether to wrap extractions in a container dictionary.
     wrapper_key: The key name for the container dictionary (e.g., creates
       {"extractions": [...]} instead of just [...]).
@@ -59,6 +120,10 @@ class FormatHandler:
     attribute_suffix: Suffix for attribute fields in extractions.
     strict_fences: Whether to enforce strict fence validation.
     allow_top_level_list: Whether to allow top-level lists in parsing.
+    span_anchor_length: When set, long extraction texts in examples are
+      abbreviated to their first and last span_anchor_length characters.
+    dedupe_example_spans: Whether extraction texts repeated within an example
+      are rendered once in a span table and referenced from the extractions.
   """
 
   def __init__(
@@ -70,11 +135,15 @@ class FormatHandler:
       attribute_suffix: str = data.ATTRIBUTE_SUFFIX,
       strict_fences: bool = False,
       allow_top_level_list: bool = True,
+      span_anchor_length: int | None = None,
+      dedupe_example_spans: bool = False,
   ) -> None:
     """Initialize format handler.
 
     Args:
-      format_type: Output format type enum.
+      format_type: Output format type enum. COMPACT renders one line per
+        extraction ("class|text|key=value|...") and ignores the wrapper
+        settings.
       use_wrapper: Whether to wrap extractions in a container dictionary.
         True: {"extractions": [...]}, False: [...]
       wrapper_key: Key name for the container dictionary. When use_wrapper=True:
@@ -87,7 +156,19 @@ class FormatHandler:
         with model output variations.
       allow_top_level_list: Allow top-level list when not strict and
         wrapper not required.
+      span_anchor_length: If set, example extraction texts longer than twice
+        this many characters are rendered as "<head>...<tail>" so the model
+        learns to emit a short anchor instead of repeating a long span. The
+        resolver expands anchors back to the source span (see
+        expand_span_anchor). None renders texts verbatim.
+      dedupe_example_spans: If True, an extraction text that occurs more than
+        once in an example is rendered once in a "spans" table (compact
+        format: "@1=..." lines) and the extractions refer to it as "@1".
+        Requires a wrapper for JSON/YAML. Parsing resolves such references
+        whether or not this is set, so plain answers parse as before.
     """
+    if span_anchor_length is not None and span_anchor_length < 1:
+      raise ValueError("span_anchor_length must be a positive integer.")
     self.format_type = format_type
     self.use_wrapper = use_wrapper
     if use_wrapper:
@@ -100,6 +181,8 @@ class FormatHandler:
     self.attribute_suffix = attribute_suffix
     self.strict_fences = strict_fences
     self.allow_top_level_list = allow_top_level_list
+    self.span_anchor_length = span_anchor_length
+    self.dedupe_example_spans = dedupe_example_spans
 
   def __repr__(self) -> str:
     return (
@@ -108,7 +191,9 @@ class FormatHandler:
         f"wrapper_key={self.wrapper_key!r}, use_fences={self.use_fences}, "
         f"attribute_suffix={self.attribute_suffix!r}, "
         f"strict_fences={self.strict_fences}, "
-        f"allow_top_level_list={self.allow_top_level_list})"
+        f"allow_top_level_list={self.allow_top_level_list}, "
+        f"span_anchor_length={self.span_anchor_length}, "
+        f"dedupe_example_spans={self.dedupe_example_spans})"
     )
 
   def format_extraction_example(
@@ -122,18 +207,39 @@ class FormatHandler:
     Returns:
       Formatted string for the prompt
     """
+    texts = [self._anchor_text(ext.extraction_text) for ext in extractions]
+    spans = {}
+    if self.dedupe_example_spans and (
+        self.format_type == data.FormatType.COMPACT
+        or (self.use_wrapper and self.wrapper_key)
+    ):
+      spans = _build_span_table(texts)
+      refs = {text: ref for ref, text in spans.items()}
+      texts = [refs.get(text, text) for text in texts]
+
+    if self.format_type == data.FormatType.COMPACT:
+      lines = [f"{ref}={_escape_compact(text)}" for ref, text in spans.items()]
+      lines.extend(
+          _format_compact_line(ext.extraction_class, text, ext.attributes)
+          for ext, text in zip(extractions, texts)
+      )
+      formatted = "\n".join(lines)
+      return self._add_fences(formatted) if self.use_fences else formatted
+
     items = [
         {
-            ext.extraction_class: ext.extraction_text,
+            ext.extraction_class: text,
             f"{ext.extraction_class}{self.attribute_suffix}": (
                 ext.attributes or {}
             ),
         }
-        for ext in extractions
+        for ext, text in zip(extractions, texts)
     ]
 
     if self.use_wrapper and self.wrapper_key:
       payload = {self.wrapper_key: items}
+      if spans:
+        payload = {_SPANS_KEY: spans, **payload}
     else:
       payload = items
 
@@ -146,6 +252,53 @@ class FormatHandler:
 
     return self._add_fences(formatted) if self.use_fences else formatted
 
+  def expand_span_anchor(
+      self, extraction_text: str, source_text: str
+  ) -> str | None:
+    """Expands a "<head>...<tail>" anchor to the span it denotes.
+
+    The span starts at an occurrence of head and ends at the first occurrence
+    of tail after it; when head occurs several times before that tail, the
+    closest one is used, giving the shortest matching span.
+
+    Args:
+      extraction_text: Extraction text emitted by the model.
+      source_text: Text of the chunk the extraction came from.
+
+    Returns:
+      The expanded span of source_text, or None if extraction_text is not an
+      anchor, occurs verbatim in source_text, or cannot be verified against it.
+    """
+    if (
+        _SPAN_ANCHOR_MARKER not in extraction_text
+        or extraction_text in source_text
+    ):
+      return None
+    head, _, tail = extraction_text.partition(_SPAN_ANCHOR_MARKER)
+    head = head.strip()
+    tail = tail.strip()
+    if not head or not tail:
+      return None
+    first_head = source_text.find(head)
+    if first_head == -1:
+      return None
+    tail_start = source_text.find(tail, first_head + len(head))
+    if tail_start == -1:
+      return None
+    start = source_text.rfind(head, first_head, tail_start)
+    return source_text[start : tail_start + len(tail)]
+
+  def _anchor_text(self, extraction_text: str) -> str:
+    """Abbreviates a long extraction text in span-anchor mode."""
+    n = self.span_anchor_length
+    if (
+        n is None
+        or len(extraction_text) <= 2 * n + len(_SPAN_ANCHOR_MARKER)
+        or _SPAN_ANCHOR_MARKER in extraction_text
+    ):
+      return extraction_text
+    return extraction_text[:n] + _SPAN_ANCHOR_MARKER + extraction_text[-n:]
+
   def parse_output(
       self, text: str, *, strict: bool | None = None
   ) -> Sequence[Mapping[str, ExtractionValueType]]:
@@ -169,11 +322,15 @@ class FormatHandler:
 
     content = self._extract_content(text)
 
+    if self.format_type == data.FormatType.COMPACT:
+      items, _ = self._parse_compact_lines(_compact_lines(content))
+      return items
+
     try:
       if self.format_type == data.FormatType.YAML:
-        parsed = yaml.safe_load(content)
+        parsed = yaml.load(content, Loader=_YAML_SAFE_LOADER)
       else:
-        parsed = json.loads(content)
+        parsed = _loads_json(content)
     except (yaml.YAMLError, json.JSONDecodeError) as e:
       msg = (
           f"Failed to parse {self.format_type.value.upper()} content:"
@@ -195,6 +352,7 @@ class FormatHandler:
         self.use_wrapper or bool(strict)
     )
 
+    spans = None
     if isinstance(parsed, dict):
       if require_wrapper:
         if self.wrapper_key not in parsed:
@@ -202,11 +360,14 @@ class FormatHandler:
               f"Content must contain an '{self.wrapper_key}' key."
           )
         items = parsed[self.wrapper_key]
+        spans = parsed.get(_SPANS_KEY)
       else:
         if data.EXTRACTIONS_KEY in parsed:
           items = parsed[data.EXTRACTIONS_KEY]
+          spans = parsed.get(_SPANS_KEY)
         elif self.wrapper_key and self.wrapper_key in parsed:
           items = parsed[self.wrapper_key]
+          spans = parsed.get(_SPANS_KEY)
         else:
           items = [parsed]
     elif isinstance(parsed, list):
@@ -231,19 +392,247 @@ class FormatHandler:
           "The extractions must be a sequence (list) of mappings."
       )
 
+    # JSON object keys are always strings; only YAML needs the key check.
+    check_keys = self.format_type != data.FormatType.JSON
     for item in items:
       if not isinstance(item, dict):
         raise exceptions.FormatParseError(
             "Each item in the sequence must be a mapping."
         )
-      for k in item.keys():
-        if not isinstance(k, str):
-          raise exceptions.FormatParseError(
-              "All extraction keys must be strings (got a non-string key)."
-          )
+      if check_keys and not all(isinstance(k, str) for k in item):
+        raise exceptions.FormatParseError(
+            "All extraction keys must be strings (got a non-string key)."
+        )
 
+    if isinstance(spans, dict) and spans:
+      items = self._resolve_span_refs(items, spans)
     return items
 
+  def salvage_output(self, text: str) -> SalvageResult:
+    """Recovers complete extractions from truncated or malformed output.
+
+    Meant as a fallback after parse_output has failed, e.g. when the model
+    hit its token limit mid-array or emitted a trailing comma. An unclosed
+    fence is tolerated, and every extraction item that parses on its own is
+    kept. JSON items are decoded one object at a time until the first item
+    that does not decode; YAML items are split on the top-level "- " entries
+    of the extractions list. A YAML item cut off between two values cannot be
+    told apart from a complete one and is kept.
+
+    Args:
+      text: Raw model output.
+
+    Returns:
+      The recovered extractions and the number of items dropped.
+    """
+    content = self._salvage_content(text)
+    spans = None
+    if self.format_type == data.FormatType.COMPACT:
+      candidates, dropped = self._split_compact_items(text, content)
+    elif self.format_type == data.FormatType.YAML:
+      candidates, dropped = self._split_yaml_items(content)
+      spans = _salvage_yaml_spans(content)
+    else:
+      candidates, dropped = self._split_json_items(content)
+      spans = _salvage_json_spans(content)
+
+    items = []
+    for item in candidates:
+      if isinstance(item, dict) and all(isinstance(k, str) for k in item):
+        items.append(item)
+      else:
+        dropped += 1
+    if spans:
+      items = self._resolve_span_refs(items, spans)
+    return SalvageResult(items=items, dropped=dropped)
+
+  def _resolve_span_refs(
+      self,
+      items: list[dict[str, ExtractionValueType]],
+      spans: Mapping[object, object],
+  ) -> list[dict[str, ExtractionValueType]]:
+    """Replaces "@n" extraction texts with their entry in the span table."""
+    resolved = []
+    for item in items:
+      new_item = {}
+      for key, value in item.items():
+        if isinstance(value, str) and not (
+            self.attribute_suffix and key.endswith(self.attribute_suffix)
+        ):
+          span = spans.get(value)
+          if isinstance(span, str):
+            value = span
+        new_item[key] = value
+      resolved.append(new_item)
+    return resolved
+
+  def _salvage_content(self, text: str) -> str:
+    """Returns the body of the first fenced block, closed or not."""
+    if not text:
+      return ""
+    if self.use_fences:
+      opening = _OPEN_FENCE_RE.search(text)
+      if opening is not None:
+        text = text[opening.end() :]
+        closing = text.find(_FENCE_END)
+        if closing != -1:
+          text = text[:closing]
+    return text.strip()
+
+  def _split_json_items(self, content: str) -> tuple[list[object], int]:
+    """Decodes the objects of the extractions array one at a time."""
+    start = -1
+    key = self.wrapper_key or data.EXTRACTIONS_KEY
+    key_match = re.search(
+        re.escape(json.dumps(key)) + r"\s*:\s*\[", content
+    )
+    if key_match is not None:
+      start = key_match.end()
+    elif content.startswith("["):
+      start = 1
+    if start <= 0:
+      return [], 0
+
+    items = []
+    pos = start
+    length = len(content)
+    while True:
+      while pos < length and content[pos] in " \t\r\n,":
+        pos += 1
+      if pos >= length or content[pos] == "]":
+        return items, 0
+      try:
+        item, pos = _JSON_DECODER.raw_decode(content, pos)
+      except json.JSONDecodeError:
+        # Without a reliable item boundary, the rest of the array is lost.
+        return items, 1
+      items.append(item)
+
+  def _split_yaml_items(self, content: str) -> tuple[list[object], int]:
+    """Parses each top-level entry of the extractions list separately."""
+    lines = content.splitlines()
+    key = self.wrapper_key or data.EXTRACTIONS_KEY
+    key_re = re.compile(r"^\s*" + re.escape(key) + r"\s*:\s*$")
+    first = 0
+    for i, line in enumerate(lines):
+      if key_re.match(line):
+        first = i + 1
+        break
+
+    blocks: list[list[str]] = []
+    indent = None
+    for line in lines[first:]:
+      stripped = line.lstrip(" ")
+      if not stripped or stripped.startswith("#"):
+        if blocks:
+          blocks[-1].append(line)
+        continue
+      line_indent = len(line) - len(stripped)
+      if indent is None and (stripped == "-" or stripped.startswith("- ")):
+        indent = line_indent
+      if indent is None:
+        continue
+      if line_indent == indent and (
+          stripped == "-" or stripped.startswith("- ")
+      ):
+        blocks.append([line[indent:]])
+      elif line_indent > indent and blocks:
+        blocks[-1].append(line[indent:])
+      else:
+        break
+
+    items = []
+    dropped = 0
+    for block in blocks:
+      try:
+        parsed = yaml.load("\n".join(block), Loader=_YAML_SAFE_LOADER)
+      except yaml.YAMLError:
+        dropped += 1
+        continue
+      if isinstance(parsed, list) and len(parsed) == 1:
+        items.append(parsed[0])
+      else:
+        dropped += 1
+    return items, dropped
+
+  def _split_compact_items(
+      self, text: str, content: str
+  ) -> tuple[list[object], int]:
+    """Parses compact lines independently, skipping malformed ones."""
+    lines = _compact_lines(content)
+    dropped = 0
+    # A missing closing fence means generation stopped mid-line.
+    if (
+        lines
+        and self.use_fences
+        and _OPEN_FENCE_RE.search(text) is not None
+        and not _FENCE_RE.search(text)
+    ):
+      lines.pop()
+      dropped += 1
+    items, malformed = self._parse_compact_lines(lines, skip_malformed=True)
+    return items, dropped + malformed
+
+  def _parse_compact_lines(
+      self, lines: Sequence[str], skip_malformed: bool = False
+  ) -> tuple[list[dict[str, ExtractionValueType]], int]:
+    """Parses compact span-table and extraction lines.
+
+    Args:
+      lines: Non-blank lines of compact content.
+      skip_malformed: Count malformed lines instead of raising.
+
+    Returns:
+      The extraction items with span references resolved, and the number of
+      malformed lines skipped.
+
+    Raises:
+      FormatParseError: On a malformed line, unless skip_malformed is set.
+    """
+    spans = {}
+    items = []
+    malformed = 0
+    for line in lines:
+      span = _COMPACT_SPAN_LINE_RE.match(line)
+      if span is not None:
+        spans[span.group(1)] = _unescape_compact(span.group(2))
+        continue
+      try:
+        items.append(self._parse_compact_line(line))
+      except exceptions.FormatParseError:
+        if not skip_malformed:
+          raise
+        malformed += 1
+    if spans:
+      items = self._resolve_span_refs(items, spans)
+    return items, malformed
+
+  def _parse_compact_line(
+      self, line: str
+  ) -> dict[str, ExtractionValueType]:
+    """Parses one "class|text|key=value|..." line into an extraction item."""
+    fields = _split_unescaped(line, _COMPACT_FIELD_SEP)
+    if len(fields) < 2 or not fields[0].strip():
+      raise exceptions.FormatParseError(
+          f"Compact line must start with 'class|text': {line[:100]!r}"
+      )
+    extraction_class = _unescape_compact(fields[0].strip())
+    attributes = {}
+    for field in fields[2:]:
+      key_value = _split_unescaped(field, _COMPACT_KEY_SEP, maxsplit=1)
+      if len(key_value) != 2 or not key_value[0].strip():
+        raise exceptions.FormatParseError(
+            f"Compact attribute must be 'key=value': {field[:100]!r}"
+        )
+      key, raw_value = key_value
+      attributes[_unescape_compact(key.strip())] = _decode_compact_value(
+          raw_value
+      )
+    return {
+        extraction_class: _unescape_compact(fields[1]),
+        f"{extraction_class}{self.attribute_suffix}": attributes,
+    }
+
   def _add_fences(self, content: str) -> str:
     """Add code fences around content."""
     fence_type = self.format_type.value
@@ -274,11 +663,16 @@ class FormatHandler:
     if not self.use_fences:
       return text.strip()
 
+    # Unfenced output (e.g. a bare JSON object) needs no fence scan.
+    if not self.strict_fences and _FENCE_START not in text:
+      return text.strip()
+
     matches = list(_FENCE_RE.finditer(text))
 
     valid_tags = {
         data.FormatType.YAML: {_YAML_FORMAT, _YML_FORMAT},
         data.FormatType.JSON: {_JSON_FORMAT},
+        data.FormatType.COMPACT: {_COMPACT_FORMAT, _TEXT_FORMAT, _TXT_FORMAT},
     }
 
     candidates = [
@@ -327,6 +721,9 @@ class FormatHandler:
       "format_handler",
   })
 
+  # Non-legacy FormatHandler options accepted in resolver_params.
+  _HANDLER_OPTION_KEYS = ("span_anchor_length", "dedupe_example_spans")
+
   @classmethod
   def from_resolver_params(
       cls,
@@ -345,7 +742,8 @@ class FormatHandler:
     and will be removed in v2.0.0.
 
     Args:
-      resolver_params: May contain legacy keys or a 'format_handler'.
+      resolver_params: May contain legacy keys, FormatHandler options
+        ('span_anchor_length', 'dedupe_example_spans') or a 'format_handler'.
       base_format_type: Default format when not overridden.
       base_use_fences: Default fence usage from the model.
       base_attribute_suffix: Default attribute suffix.
@@ -360,6 +758,12 @@ class FormatHandler:
 
     if rp.get("format_handler") is not None:
       handler = rp.pop("format_handler")
+      for option in cls._HANDLER_OPTION_KEYS:
+        if rp.pop(option, None) is not None:
+          raise ValueError(
+              f"{option} cannot be combined with an explicit format_handler;"
+              " set it on the FormatHandler instead."
+          )
       for k in list(rp.keys()):
         if k in cls._LEGACY_FORMAT_KEYS:
           rp.pop(k, None)
@@ -372,6 +776,11 @@ class FormatHandler:
         "use_wrapper": base_use_wrapper,
         "wrapper_key": base_wrapper_key if base_use_wrapper else None,
     }
+    for option in cls._HANDLER_OPTION_KEYS:
+      if rp.get(option) is not None:
+        kwargs[option] = rp.pop(option)
+      else:
+        rp.pop(option, None)
 
     mapping = {
         "fence_output": "use_fences",
@@ -443,6 +852,8 @@ class FormatHandler:
       format_type = data.FormatType.JSON
     elif hasattr(format_type, "value"):
       pass
+    elif str(format_type).lower() == _COMPACT_FORMAT:
+      format_type = data.FormatType.COMPACT
     else:
       format_type = (
           data.FormatType.JSON
@@ -458,3 +869,164 @@ class FormatHandler:
         strict_fences=strict_fences,
         attribute_suffix=attribute_suffix,
     )
+
+
+def _loads_json(content: str) -> ExtractionValueType:
+  """Decodes JSON, preferring orjson when it is installed.
+
+  Input orjson rejects but the stdlib accepts (e.g. NaN or integers beyond 64
+  bits) is decoded with the stdlib parser, so results never depend on whether
+  orjson is available.
+
+  Args:
+    content: JSON text.
+
+  Returns:
+    The decoded value.
+
+  Raises:
+    json.JSONDecodeError: If the content is not valid JSON.
+  """
+  if orjson is not None:
+    try:
+      return orjson.loads(content)
+    except orjson.JSONDecodeError:
+      pass
+  return json.loads(content)
+
+
+def _escape_compact(value: str, specials: str = _COMPACT_FIELD_SEP) -> str:
+  """Backslash-escapes the escape char, line breaks and the given specials."""
+  out = []
+  for char in value:
+    if char == _COMPACT_ESCAPE or char in specials:
+      out.append(_COMPACT_ESCAPE + char)
+    elif char == "\n":
+      out.append(_COMPACT_ESCAPE + "n")
+    elif char == "\r":
+      out.append(_COMPACT_ESCAPE + "r")
+    else:
+      out.append(char)
+  return "".join(out)
+
+
+def _unescape_compact(value: str) -> str:
+  """Reverses _escape_compact."""
+  if _COMPACT_ESCAPE not in value:
+    return value
+  out = []
+  chars = iter(value)
+  for char in chars:
+    if char == _COMPACT_ESCAPE:
+      escaped = next(chars, "")
+      out.append(_COMPACT_ESCAPES.get(escaped, escaped))
+    else:
+      out.append(char)
+  return "".join(out)
+
+
+def _split_unescaped(
+    value: str, sep: str, maxsplit: int = -1
+) -> list[str]:
+  """Splits on sep where it is not backslash-escaped; keeps escapes."""
+  if _COMPACT_ESCAPE not in value:
+    return value.split(sep, maxsplit)
+  parts = []
+  start = 0
+  i = 0
+  while i < len(value) and maxsplit != 0:
+    char = value[i]
+    if char == _COMPACT_ESCAPE:
+      i += 2
+      continue
+    if char == sep:
+      parts.append(value[start:i])
+      start = i + 1
+      maxsplit -= 1
+    i += 1
+  parts.append(value[start:])
+  return parts
+
+
+def _format_compact_line(
+    extraction_class: str,
+    extraction_text: str,
+    attributes: Mapping[str, ExtractionValueType] | None,
+) -> str:
+  """Renders one extraction as "class|text|key=value|..."."""
+  fields = [_escape_compact(extraction_class), _escape_compact(extraction_text)]
+  for key, value in (attributes or {}).items():
+    if isinstance(value, str):
+      encoded = _escape_compact(value)
+      if encoded.startswith(_COMPACT_JSON_PREFIXES):
+        encoded = _COMPACT_ESCAPE + encoded
+    else:
+      encoded = _escape_compact(json.dumps(value, ensure_ascii=False))
+    fields.append(
+        _escape_compact(str(key), _COMPACT_FIELD_SEP + _COMPACT_KEY_SEP)
+        + _COMPACT_KEY_SEP
+        + encoded
+    )
+  return _COMPACT_FIELD_SEP.join(fields)
+
+
+def _decode_compact_value(raw_value: str) -> ExtractionValueType:
+  """Decodes an attribute value; JSON-looking values are decoded as JSON."""
+  if raw_value.startswith(_COMPACT_JSON_PREFIXES):
+    try:
+      return json.loads(_unescape_compact(raw_value))
+    except json.JSONDecodeError as e:
+      raise exceptions.FormatParseError(
+          f"Invalid JSON attribute value in compact line: {str(e)[:200]}"
+      ) from e
+  return _unescape_compact(raw_value)
+
+
+def _compact_lines(content: str) -> list[str]:
+  """Returns the non-blank lines of compact content."""
+  return [line for line in content.splitlines() if line.strip()]
+
+
+def _build_span_table(texts: Sequence[str]) -> dict[str, str]:
+  """Numbers the texts worth hoisting: repeated and not too short."""
+  counts = collections.Counter(texts)
+  spans = {}
+  for text in texts:
+    if (
+        counts[text] > 1
+        and len(text) >= _MIN_DEDUPED_SPAN_CHARS
+        and text not in spans.values()
+    ):
+      spans[_SPAN_REF_FORMAT.format(len(spans) + 1)] = text
+  return spans
+
+
+def _salvage_json_spans(content: str) -> dict[object, object] | None:
+  """Decodes the span table of possibly truncated JSON output."""
+  match = re.search(re.escape(json.dumps(_SPANS_KEY)) + r"\s*:\s*\{", content)
+  if match is None:
+    return None
+  try:
+    spans, _ = _JSON_DECODER.raw_decode(content, match.end() - 1)
+  except json.JSONDecodeError:
+    return None
+  return spans if isinstance(spans, dict) else None
+
+
+def _salvage_yaml_spans(content: str) -> dict[object, object] | None:
+  """Parses the top-level span table of possibly truncated YAML output."""
+  lines = content.splitlines()
+  for i, line in enumerate(lines):
+    if line.rstrip() == f"{_SPANS_KEY}:":
+      block = [line]
+      for following in lines[i + 1 :]:
+        if following.strip() and not following.startswith((" ", "\t")):
+          break
+        block.append(following)
+      try:
+        parsed = yaml.load("\n".join(block), Loader=_YAML_SAFE_LOADER)
+      except yaml.YAMLError:
+        return None
+      spans = parsed.get(_SPANS_KEY) if isinstance(parsed, dict) else None
+      return spans if isinstance(spans, dict) else None
+  return None
@@ -32,6 +32,8 @@ class FormatType(enum.Enum):
 
   YAML = 'yaml'
   JSON = 'json'
+  # One pipe-delimited line per extraction: class|text|key=value|...
+  COMPACT = 'compact'
 
 
 class ConstraintType(enum.Enum):
@@ -0,0 +1,208 @@
+# Copyright 2025 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-chunk selection of few-shot examples.
+
+By default every example of the prompt template is rendered in front of every
+chunk. An ExampleSelector attached to QAPromptGenerator instead picks the
+examples most relevant to the chunk being annotated, which keeps prompts short
+when the examples are long compared to the chunks.
+"""
+
+from __future__ import annotations
+
+import abc
+import collections
+from collections.abc import Callable, Sequence
+import math
+import re
+import threading
+import unicodedata
+
+from langextract import prompt_budget
+from langextract.core import data
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class ExampleSelector(abc.ABC):
+  """Chooses which few-shot examples to render for a chunk."""
+
+  @abc.abstractmethod
+  def select(
+      self,
+      question: str,
+      examples: Sequence[data.ExampleData],
+      render_example: Callable[[data.ExampleData], str],
+  ) -> list[data.ExampleData]:
+    """Returns the examples to include in the prompt for question.
+
+    Args:
+      question: Text of the chunk being annotated.
+      examples: All examples of the prompt template.
+      render_example: Renders an example exactly as it appears in the prompt,
+        for selectors that budget prompt size.
+
+    Returns:
+      The selected examples, most relevant first. The prompt renders them in
+      their template order and uses this order to decide which to drop first
+      under a prompt budget.
+    """
+
+
+class BM25ExampleSelector(ExampleSelector):
+  """Selects the top-k examples by character n-gram BM25 similarity.
+
+  Example texts are indexed once as bags of character n-grams, which works for
+  unsegmented CJK text as well as for English. Selections are cached per chunk
+  text in a bounded LRU cache, so repeated chunks and extraction passes do not
+  rescore.
+  """
+
+  def __init__(
+      self,
+      top_k: int = 2,
+      ngram_size: int = 2,
+      max_example_tokens: int | None = None,
+      token_counter: prompt_budget.TokenCounter = (
+          prompt_budget.approximate_token_count
+      ),
+      cache_size: int = 1024,
+      k1: float = 1.2,
+      b: float = 0.75,
+  ):
+    """Initializes the selector.
+
+    Args:
+      top_k: Maximum number of examples per chunk.
+      ngram_size: Length of the character n-grams used as index terms.
+      max_example_tokens: Budget for the rendered examples of a chunk.
+        Examples are added in relevance order while they fit; the most
+        relevant example is always kept so the output format stays
+        demonstrated. None disables the budget.
+      token_counter: Counts the tokens of a rendered example.
+      cache_size: Maximum number of chunk texts whose selection is cached.
+      k1: BM25 term-frequency saturation.
+      b: BM25 document-length normalization.
+    """
+    if top_k < 1:
+      raise ValueError("top_k must be at least 1.")
+    if ngram_size < 1:
+      raise ValueError("ngram_size must be at least 1.")
+    self.top_k = top_k
+    self.ngram_size = ngram_size
+    self.max_example_tokens = max_example_tokens
+    self.token_counter = token_counter
+    self.k1 = k1
+    self.b = b
+    self._cache_size = cache_size
+    self._cache: collections.OrderedDict[str, tuple[int, ...]] = (
+        collections.OrderedDict()
+    )
+    self._lock = threading.Lock()
+    self._indexed: tuple[int, ...] | None = None
+    self._doc_terms: list[collections.Counter[str]] = []
+    self._doc_lengths: list[int] = []
+    self._idf: dict[str, float] = {}
+    self._avg_length = 0.0
+    self._example_tokens: list[int | None] = []
+
+  def select(
+      self,
+      question: str,
+      examples: Sequence[data.ExampleData],
+      render_example: Callable[[data.ExampleData], str],
+  ) -> list[data.ExampleData]:
+    if len(examples) <= 1:
+      return list(examples)
+    with self._lock:
+      self._ensure_index(examples)
+      selected = self._cache.get(question)
+      if selected is None:
+        selected = self._rank(question, examples, render_example)
+        self._cache[question] = selected
+        while len(self._cache) > self._cache_size:
+          self._cache.popitem(last=False)
+      else:
+        self._cache.move_to_end(question)
+    return [examples[i] for i in selected]
+
+  def _ensure_index(self, examples: Sequence[data.ExampleData]) -> None:
+    """(Re)builds the BM25 index when the example set changes."""
+    key = tuple(id(ex) for ex in examples)
+    if key == self._indexed:
+      return
+    self._doc_terms = [self._terms(ex.text) for ex in examples]
+    self._doc_lengths = [sum(terms.values()) for terms in self._doc_terms]
+    self._avg_length = sum(self._doc_lengths) / len(examples) or 1.0
+    doc_freq = collections.Counter()
+    for terms in self._doc_terms:
+      doc_freq.update(terms.keys())
+    n = len(examples)
+    self._idf = {
+        term: math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        for term, df in doc_freq.items()
+    }
+    self._example_tokens = [None] * n
+    self._cache.clear()
+    self._indexed = key
+
+  def _rank(
+      self,
+      question: str,
+      examples: Sequence[data.ExampleData],
+      render_example: Callable[[data.ExampleData], str],
+  ) -> tuple[int, ...]:
+    """Returns the indices of the selected examples, most relevant first."""
+    query_terms = self._terms(question)
+    scores = []
+    for i, (terms, length) in enumerate(
+        zip(self._doc_terms, self._doc_lengths)
+    ):
+      norm = self.k1 * (1.0 - self.b + self.b * length / self._avg_length)
+      score = 0.0
+      for term in query_terms:
+        tf = terms.get(term)
+        if tf:
+          score += self._idf[term] * tf * (self.k1 + 1.0) / (tf + norm)
+      scores.append((-score, i))
+    scores.sort()
+
+    selected = []
+    used_tokens = 0
+    for _, i in scores:
+      if len(selected) == self.top_k:
+        break
+      if self.max_example_tokens is not None:
+        if self._example_tokens[i] is None:
+          self._example_tokens[i] = self.token_counter(
+              render_example(examples[i])
+          )
+        cost = self._example_tokens[i]
+        if selected and used_tokens + cost > self.max_example_tokens:
+          continue
+        used_tokens += cost
+      selected.append(i)
+    return tuple(selected)
+
+  def _terms(self, text: str) -> collections.Counter[str]:
+    """Returns the character n-gram counts of normalized text."""
+    text = _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text))
+    text = text.strip().lower()
+    n = self.ngram_size
+    if len(text) <= n:
+      return collections.Counter([text] if text else [])
+    return collections.Counter(
+        text[i : i + n] for i in range(len(text) - n + 1)
+    )
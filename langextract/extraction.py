@@ -22,8 +22,10 @@ from typing import cast
 import warnings
 
 from langextract import annotation
+from langextract import example_selection
 from langextract import factory
 from langextract import io
+from langextract import prompt_budget as prompt_budget_lib
 from langextract import prompt_validation as pv
 from langextract import prompting
 from langextract import resolver
@@ -59,6 +61,9 @@ def extract(
     prompt_validation_level: pv.PromptValidationLevel = pv.PromptValidationLevel.WARNING,
     prompt_validation_strict: bool = False,
     show_progress: bool = True,
+    resolve_max_workers: int | None = None,
+    example_selector: example_selection.ExampleSelector | None = None,
+    prompt_budget: prompt_budget_lib.PromptBudget | None = None,
 ) -> typing.Any:
   """Extracts structured information from text.
 
@@ -88,7 +93,9 @@ def extract(
         inference. Warning triggers when value differs from the legacy default
         (GeminiLanguageModel). This parameter will be removed in v2.0.0. Use
         the model, config, or model_id parameters instead.
-      format_type: The format type for the output (JSON or YAML).
+      format_type: The format type for the output (JSON, YAML or COMPACT).
+        COMPACT emits one "class|text|key=value|..." line per extraction,
+        which cuts generated tokens; it does not support schema constraints.
       max_char_buffer: Max number of characters for inference.
       temperature: The sampling temperature for generation. When None (default),
         uses the model's default temperature. Set to 0.0 for deterministic output
@@ -121,7 +128,22 @@ def extract(
         reduce recall. Default is True. 'fuzzy_alignment_threshold' (float):
         Minimum token overlap ratio for fuzzy match (0.0-1.0). Default is 0.75.
         'accept_match_lesser' (bool): Whether to accept partial exact matches.
-        Default is True.
+        Default is True. 'fuzzy_alignment_top_k' (int | None): Maximum number
+        of candidate windows scored per extraction during fuzzy alignment when
+        NumPy is installed. Default is None (score every viable candidate).
+        'alignment_cache_size' (int): Size of the resolver's LRU cache of
+        chunk alignments keyed by (chunk text, extraction texts), useful with
+        extraction_passes > 1 or repetitive corpora. Default is 0 (disabled).
+        'salvage_partial_output' (bool): Whether to recover the complete
+        extractions from truncated or malformed model output instead of
+        failing the chunk. Default is False. 'span_anchor_length' (int |
+        None): Render example extraction texts longer than twice this many
+        characters as "<head>...<tail>" anchors, which the resolver expands
+        back to the source span before alignment. Cuts output tokens when
+        extractions repeat whole sentences. Default is None (verbatim).
+        'dedupe_example_spans' (bool): Render an extraction text repeated
+        within an example once, in a span table referenced as "@1", shrinking
+        the examples every prompt carries. Default is False.
       language_model_params: Additional parameters for the language model.
       debug: Whether to enable debug logging. When True, enables detailed logging
         of function calls, arguments, return values, and timing for the langextract
@@ -150,6 +172,18 @@ def extract(
       prompt_validation_strict: When True and prompt_validation_level is ERROR,
         raises on non-exact matches (MATCH_FUZZY, MATCH_LESSER). Defaults to False.
       show_progress: Whether to show progress bar during extraction. Defaults to True.
+      resolve_max_workers: Number of worker processes used to parse and align
+        model outputs, one chunk per task. Useful when inference is fast (e.g.
+        a local server with large batches) and resolution on the main thread
+        becomes the bottleneck. Defaults to None (resolve on the main thread).
+      example_selector: An `example_selection.ExampleSelector` that picks the
+        examples rendered in front of each chunk, e.g.
+        `BM25ExampleSelector(top_k=1)` to send only the most similar example.
+        Defaults to None (every example is sent with every chunk).
+      prompt_budget: A `prompt_budget.PromptBudget` that reports per-section
+        character and token counts of every prompt, drops examples to respect
+        its max_prompt_tokens, and logs a histogram of prompt sizes with a
+        suggested max_char_buffer at the end of the run. Defaults to None.
 
   Returns:
       An AnnotatedDocument with the extracted information when input is a
@@ -318,6 +352,9 @@ def extract(
       language_model=language_model,
       prompt_template=prompt_template,
       format_handler=format_handler,
+      resolve_max_workers=resolve_max_workers,
+      example_selector=example_selector,
+      prompt_budget=prompt_budget,
   )
 
   if isinstance(text_or_documents, str):
@@ -0,0 +1,308 @@
+# Copyright 2025 Google LLC.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Prompt size accounting and budget enforcement.
+
+A PromptBudget attached to QAPromptGenerator measures every rendered prompt
+section by section (description, additional context, examples, the chunk
+itself and the fixed scaffolding between them), optionally drops examples to
+respect a token ceiling, and aggregates a run-level histogram that can be used
+to tune max_char_buffer against prefill cost.
+"""
+
+from __future__ import annotations
+
+import collections
+from collections.abc import Callable, Sequence
+import dataclasses
+import math
+import re
+import threading
+
+from absl import logging
+
+TokenCounter = Callable[[str], int]
+
+SECTION_DESCRIPTION = "description"
+SECTION_ADDITIONAL_CONTEXT = "additional_context"
+SECTION_EXAMPLES = "examples"
+SECTION_QUESTION = "question"
+SECTION_SCAFFOLDING = "scaffolding"
+
+_CJK_RE = re.compile(
+    r"[\u3000-\u303f\u3400-\u9fff\uf900-\ufaff\uff00-\uffef]"
+)
+
+
+def approximate_token_count(text: str) -> int:
+  """Estimates the number of LLM tokens in text without a tokenizer.
+
+  CJK characters count as one token each and the remaining characters as one
+  token per four, which is close to common BPE vocabularies for mixed
+  Chinese/English text.
+
+  Args:
+    text: Text to measure.
+
+  Returns:
+    Estimated token count.
+  """
+  cjk = len(_CJK_RE.findall(text))
+  return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+@dataclasses.dataclass(frozen=True)
+class SectionSize:
+  """Size of one prompt section.
+
+  Attributes:
+    chars: Number of characters.
+    tokens: Number of tokens according to the budget's token counter.
+  """
+
+  chars: int = 0
+  tokens: int = 0
+
+
+@dataclasses.dataclass(frozen=True)
+class PromptReport:
+  """Per-section breakdown of one rendered prompt.
+
+  Attributes:
+    sections: Size of each section, keyed by the SECTION_* names.
+    examples_kept: Number of examples rendered.
+    examples_dropped: Number of examples dropped to meet the budget.
+    over_budget: Whether the prompt exceeds max_prompt_tokens even after
+      dropping examples.
+  """
+
+  sections: dict[str, SectionSize]
+  examples_kept: int = 0
+  examples_dropped: int = 0
+  over_budget: bool = False
+
+  @property
+  def total_tokens(self) -> int:
+    return sum(size.tokens for size in self.sections.values())
+
+  @property
+  def total_chars(self) -> int:
+    return sum(size.chars for size in self.sections.values())
+
+
+class PromptBudget:
+  """Measures prompts and enforces an optional prompt token ceiling.
+
+  Token counts are the sum of the per-section counts, so with an approximate
+  counter they are estimates. Thread-safe; one instance accumulates the
+  statistics of a whole run.
+  """
+
+  def __init__(
+      self,
+      max_prompt_tokens: int | None = None,
+      token_counter: TokenCounter = approximate_token_count,
+      min_examples: int = 1,
+      histogram_bin_tokens: int = 256,
+  ):
+    """Initializes the budget.
+
+    Args:
+      max_prompt_tokens: Ceiling for the prompt size. Examples are dropped,
+        least important first, until the prompt fits, but never below
+        min_examples. None only measures.
+      token_counter: Counts the tokens of a string, e.g. a local tokenizer's
+        `lambda s: len(tok.encode(s))`. Defaults to approximate_token_count.
+      min_examples: Number of examples kept even when over budget, so the
+        output format stays demonstrated.
+      histogram_bin_tokens: Width of the prompt-size histogram bins.
+    """
+    if histogram_bin_tokens < 1:
+      raise ValueError("histogram_bin_tokens must be at least 1.")
+    self.max_prompt_tokens = max_prompt_tokens
+    self.token_counter = token_counter
+    self.min_examples = min_examples
+    self.histogram_bin_tokens = histogram_bin_tokens
+    self._lock = threading.Lock()
+    self._reset_stats()
+
+  def _reset_stats(self) -> None:
+    self._prompts = 0
+    self._over_budget = 0
+    self._examples_dropped = 0
+    self._section_chars: collections.Counter[str] = collections.Counter()
+    self._section_tokens: collections.Counter[str] = collections.Counter()
+    self._bins: collections.Counter[int] = collections.Counter()
+
+  def reset(self) -> None:
+    """Clears the accumulated run statistics."""
+    with self._lock:
+      self._reset_stats()
+
+  def measure(self, text: str) -> SectionSize:
+    """Returns the size of text."""
+    return SectionSize(chars=len(text), tokens=self.token_counter(text))
+
+  def fit(
+      self,
+      fixed_sections: dict[str, str],
+      examples: Sequence[str],
+      examples_heading: str,
+      priority: Sequence[int] | None = None,
+  ) -> tuple[list[int], PromptReport]:
+    """Decides which examples fit and records the resulting prompt.
+
+    Args:
+      fixed_sections: Rendered text of every section other than the examples,
+        keyed by SECTION_* name. Separators belong to SECTION_SCAFFOLDING.
+      examples: Rendered examples in prompt order.
+      examples_heading: Heading line rendered before the examples, including
+        its separator; counted as scaffolding while any example is kept.
+      priority: Indices into examples from most to least important, e.g. in
+        relevance order; examples are dropped from the end of this order.
+        Defaults to prompt order, i.e. the last example is dropped first.
+
+    Returns:
+      The indices of the examples to render, in prompt order, and the
+      prompt's report.
+    """
+    fixed = {name: self.measure(text) for name, text in fixed_sections.items()}
+    example_sizes = [self.measure(text) for text in examples]
+    heading = self.measure(examples_heading)
+    fixed_tokens = sum(size.tokens for size in fixed.values())
+    order = list(range(len(examples)) if priority is None else priority)
+    if sorted(order) != list(range(len(examples))):
+      raise ValueError("priority must be a permutation of the example indices.")
+
+    keep = len(examples)
+    example_tokens = sum(size.tokens for size in example_sizes)
+
+    def total(keep: int, example_tokens: int) -> int:
+      return fixed_tokens + example_tokens + (heading.tokens if keep else 0)
+
+    if self.max_prompt_tokens is not None:
+      floor = min(self.min_examples, len(examples))
+      while (
+          keep > floor
+          and total(keep, example_tokens) > self.max_prompt_tokens
+      ):
+        keep -= 1
+        example_tokens -= example_sizes[order[keep]].tokens
+    kept = sorted(order[:keep])
+
+    sections = dict(fixed)
+    sections[SECTION_EXAMPLES] = SectionSize(
+        chars=sum(example_sizes[i].chars for i in kept),
+        tokens=example_tokens,
+    )
+    if keep:
+      scaffolding = sections.get(SECTION_SCAFFOLDING, SectionSize())
+      sections[SECTION_SCAFFOLDING] = SectionSize(
+          chars=scaffolding.chars + heading.chars,
+          tokens=scaffolding.tokens + heading.tokens,
+      )
+    report = PromptReport(
+        sections=sections,
+        examples_kept=keep,
+        examples_dropped=len(examples) - keep,
+        over_budget=(
+            self.max_prompt_tokens is not None
+            and total(keep, example_tokens) > self.max_prompt_tokens
+        ),
+    )
+    self._record(report)
+    return kept, report
+
+  def _record(self, report: PromptReport) -> None:
+    with self._lock:
+      self._prompts += 1
+      self._over_budget += report.over_budget
+      self._examples_dropped += report.examples_dropped
+      for name, size in report.sections.items():
+        self._section_chars[name] += size.chars
+        self._section_tokens[name] += size.tokens
+      self._bins[report.total_tokens // self.histogram_bin_tokens] += 1
+    if report.over_budget:
+      logging.warning(
+          "Prompt of ~%d tokens exceeds max_prompt_tokens=%d with %d"
+          " example(s); consider a smaller max_char_buffer.",
+          report.total_tokens,
+          self.max_prompt_tokens,
+          report.examples_kept,
+      )
+
+  def histogram(self) -> list[tuple[int, int]]:
+    """Returns (bin start in tokens, prompt count) pairs, ascending."""
+    with self._lock:
+      return [
+          (bin_index * self.histogram_bin_tokens, count)
+          for bin_index, count in sorted(self._bins.items())
+      ]
+
+  def suggested_max_char_buffer(self) -> int | None:
+    """Estimates the largest max_char_buffer that keeps prompts in budget.
+
+    Based on the mean size of the non-chunk sections and the observed
+    characters per token of the chunks. Returns None without a budget or
+    before any prompt was measured.
+    """
+    with self._lock:
+      question_tokens = self._section_tokens[SECTION_QUESTION]
+      if (
+          self.max_prompt_tokens is None
+          or not self._prompts
+          or not question_tokens
+      ):
+        return None
+      total_tokens = sum(self._section_tokens.values())
+      other_tokens = (total_tokens - question_tokens) / self._prompts
+      chars_per_token = self._section_chars[SECTION_QUESTION] / question_tokens
+    budget_tokens = self.max_prompt_tokens - other_tokens
+    return max(0, int(budget_tokens * chars_per_token))
+
+  def summary(self) -> str:
+    """Returns a human-readable summary of the run's prompt sizes."""
+    with self._lock:
+      prompts = self._prompts
+      if not prompts:
+        return "No prompts measured."
+      lines = [
+          f"Prompt budget: {prompts} prompt(s),"
+          f" {self._over_budget} over budget,"
+          f" {self._examples_dropped} example(s) dropped."
+      ]
+      total_tokens = sum(self._section_tokens.values())
+      by_size = sorted(
+          self._section_tokens, key=self._section_tokens.get, reverse=True
+      )
+      for name in by_size:
+        tokens = self._section_tokens[name]
+        lines.append(
+            f"  {name:<20} {tokens / prompts:>9.1f} tokens/prompt"
+            f" {self._section_chars[name] / prompts:>9.1f} chars/prompt"
+            f" {100 * tokens / max(total_tokens, 1):>5.1f}%"
+        )
+    histogram = self.histogram()
+    peak = max(count for _, count in histogram)
+    lines.append("  prompt tokens histogram:")
+    for start, count in histogram:
+      bar = "#" * max(1, round(40 * count / peak))
+      lines.append(
+          f"  {start:>7}-{start + self.histogram_bin_tokens - 1:<7}"
+          f" {count:>6} {bar}"
+      )
+    suggestion = self.suggested_max_char_buffer()
+    if suggestion is not None:
+      lines.append(f"  suggested max_char_buffer: ~{suggestion}")
+    return "\n".join(lines)
@@ -19,9 +19,12 @@ import dataclasses
 import json
 import pathlib
 
+from absl import logging
 import pydantic
 import yaml
 
+from langextract import example_selection
+from langextract import prompt_budget
 from langextract.core import data
 from langextract.core import exceptions
 from langextract.core import format_handler
@@ -82,13 +85,22 @@ def read_prompt_template_structured_from_file(
 
 @dataclasses.dataclass
 class QAPromptGenerator:
-  """Generates question-answer prompts from the provided template."""
+  """Generates question-answer prompts from the provided template.
+
+  When example_selector is set, only the examples it selects for the question
+  are rendered, in template order; otherwise every template example is. When
+  prompt_budget is set, every rendered prompt is measured by section and
+  examples are dropped as needed to respect its token ceiling, least relevant
+  first when a selector ranked them and last first otherwise.
+  """
 
   template: PromptTemplateStructured
   format_handler: format_handler.FormatHandler
   examples_heading: str = "Examples"
   question_prefix: str = "Q: "
   answer_prefix: str = "A: "
+  example_selector: example_selection.ExampleSelector | None = None
+  prompt_budget: prompt_budget.PromptBudget | None = None
 
   def __str__(self) -> str:
     """Returns a string representation of the prompt with an empty question."""
@@ -127,11 +139,60 @@ class QAPromptGenerator:
     if additional_context:
       prompt_lines.append(f"{additional_context}\n")
 
-    if self.template.examples:
+    examples = self.template.examples
+    priority = None
+    if examples and self.example_selector is not None:
+      ranked = self.example_selector.select(
+          question, examples, self.format_example_as_text
+      )
+      position = {id(ex): i for i, ex in enumerate(examples)}
+      examples = sorted(ranked, key=lambda ex: position[id(ex)])
+      rank = {id(ex): r for r, ex in enumerate(ranked)}
+      priority = sorted(
+          range(len(examples)), key=lambda i: rank[id(examples[i])]
+      )
+
+    rendered_examples = [self.format_example_as_text(ex) for ex in examples]
+    if self.prompt_budget is not None:
+      kept = self._fit_prompt_budget(
+          question, additional_context, rendered_examples, priority
+      )
+      rendered_examples = [rendered_examples[i] for i in kept]
+
+    if rendered_examples:
       prompt_lines.append(self.examples_heading)
-      for ex in self.template.examples:
-        prompt_lines.append(self.format_example_as_text(ex))
+      prompt_lines.extend(rendered_examples)
 
     prompt_lines.append(f"{self.question_prefix}{question}")
     prompt_lines.append(self.answer_prefix)
     return "\n".join(prompt_lines)
+
+  def _fit_prompt_budget(
+      self,
+      question: str,
+      additional_context: str | None,
+      rendered_examples: list[str],
+      priority: list[int] | None = None,
+  ) -> list[int]:
+    """Returns the indices of the examples that fit and records the size."""
+    assert self.prompt_budget is not None
+    fixed_sections = {
+        # Each section owns the newline that joins it to the next line.
+        prompt_budget.SECTION_DESCRIPTION: f"{self.template.description}\n\n",
+        prompt_budget.SECTION_QUESTION: question,
+        prompt_budget.SECTION_SCAFFOLDING: (
+            f"{self.question_prefix}\n{self.answer_prefix}"
+        ),
+    }
+    if additional_context:
+      fixed_sections[prompt_budget.SECTION_ADDITIONAL_CONTEXT] = (
+          f"{additional_context}\n\n"
+      )
+    kept, report = self.prompt_budget.fit(
+        fixed_sections,
+        [f"{example}\n" for example in rendered_examples],
+        examples_heading=f"{self.examples_heading}\n",
+        priority=priority,
+    )
+    logging.debug("Prompt budget report: %s", report)
+    return kept
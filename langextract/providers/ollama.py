@@ -107,6 +107,12 @@ _DEFAULT_TEMPERATURE = 0.1
 _DEFAULT_TIMEOUT = 120
 _DEFAULT_KEEP_ALIVE = 5 * 60  # 5 minutes
 _DEFAULT_NUM_CTX = 2048
+# Ollama `format` values per output format. Formats without an entry (compact
+# line output) are requested as free text.
+_OLLAMA_FORMATS = {
+    core_types.FormatType.JSON: 'json',
+    core_types.FormatType.YAML: 'yaml',
+}
 
 # Pre-configured FormatHandler for consistent Ollama configuration
 # use_wrapper=True creates {"extractions": [...]} vs just [...]
@@ -263,9 +269,7 @@ class OllamaLanguageModel(base_model.BaseLanguageModel):
         response = self._ollama_query(
             prompt=prompt,
             model=self._model,
-            structured_output_format='json'
-            if self.format_type == core_types.FormatType.JSON
-            else 'yaml',
+            structured_output_format=_OLLAMA_FORMATS.get(self.format_type),
             model_url=self._model_url,
             **combined_kwargs,
         )
@@ -343,9 +347,7 @@ class OllamaLanguageModel(base_model.BaseLanguageModel):
     model = model or self._model
     model_url = model_url or self._model_url
     if structured_output_format is None and self.format_type is not None:
-      structured_output_format = (
-          'json' if self.format_type == core_types.FormatType.JSON else 'yaml'
-      )
+      structured_output_format = _OLLAMA_FORMATS.get(self.format_type)
 
     options: dict[str, Any] = {}
     if keep_alive is not None:
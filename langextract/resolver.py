@@ -23,10 +23,14 @@ from __future__ import annotations
 import abc
 import collections
 from collections.abc import Iterator, Mapping, Sequence
+import dataclasses
 import difflib
 import functools
+import hashlib
 import itertools
 import operator
+import threading
+import time
 from typing import Final
 
 from absl import logging
@@ -37,6 +41,12 @@ from langextract.core import format_handler as fh
 from langextract.core import schema
 from langextract.core import tokenizer
 
+# NumPy is optional; fuzzy alignment falls back to pure Python without it.
+try:
+  import numpy as np  # type: ignore[import-not-found]
+except ImportError:
+  np = None
+
 _FUZZY_ALIGNMENT_MIN_THRESHOLD = 0.75
 
 # Default suffix for extraction index keys (e.g., "entity_index")
@@ -46,6 +56,7 @@ ALIGNMENT_PARAM_KEYS: Final[frozenset[str]] = frozenset({
     "enable_fuzzy_alignment",
     "fuzzy_alignment_threshold",
     "accept_match_lesser",
+    "fuzzy_alignment_top_k",
 })
 
 
@@ -132,8 +143,8 @@ class AbstractResolver(abc.ABC):
   ) -> Iterator[data.Extraction]:
     """Aligns extractions with source text, setting token/char intervals and alignment status.
 
-    Uses exact matching first (difflib), then fuzzy alignment fallback if
-    enabled.
+    Uses exact matching first (direct substring search, then difflib), then
+    fuzzy alignment fallback if enabled.
 
     Alignment Status Results:
     - MATCH_EXACT: Perfect token-level match
@@ -166,6 +177,217 @@ class ResolverParsingError(exceptions.LangExtractError):
   """Error raised when content cannot be parsed as the given format."""
 
 
+@dataclasses.dataclass(frozen=True)
+class AlignmentCacheInfo:
+  """Statistics of a resolver's alignment cache.
+
+  Attributes:
+    hits: Number of chunks whose alignments were served from the cache.
+    misses: Number of chunks that had to be aligned.
+    maxsize: Maximum number of cached chunk alignments.
+    currsize: Current number of cached chunk alignments.
+  """
+
+  hits: int = 0
+  misses: int = 0
+  maxsize: int = 0
+  currsize: int = 0
+
+  @property
+  def hit_rate(self) -> float:
+    """Fraction of lookups served from the cache."""
+    total = self.hits + self.misses
+    return self.hits / total if total else 0.0
+
+
+@dataclasses.dataclass(frozen=True)
+class ParseStats:
+  """Timing and recovery counters of a resolver's model output parsing.
+
+  Attributes:
+    chunks: Number of model outputs parsed, including failed parses.
+    total_seconds: Wall time spent parsing across all chunks.
+    max_seconds: Slowest single parse.
+    last_seconds: Duration of the most recent parse.
+    salvaged_chunks: Outputs that failed the strict parse but yielded
+      extractions through salvage_partial_output.
+    salvaged_items: Extractions recovered from those outputs.
+    dropped_items: Partial or malformed items discarded while salvaging.
+  """
+
+  chunks: int = 0
+  total_seconds: float = 0.0
+  max_seconds: float = 0.0
+  last_seconds: float = 0.0
+  salvaged_chunks: int = 0
+  salvaged_items: int = 0
+  dropped_items: int = 0
+
+  @property
+  def mean_seconds(self) -> float:
+    """Average parse time per chunk."""
+    return self.total_seconds / self.chunks if self.chunks else 0.0
+
+
+@dataclasses.dataclass(frozen=True)
+class ResolverStats:
+  """Counters a resolve worker process hands back to the parent resolver.
+
+  Attributes:
+    cache_hits: Alignment cache hits since the counters were last taken.
+    cache_misses: Alignment cache misses since the counters were last taken.
+    parse: Parse counters since they were last taken.
+  """
+
+  cache_hits: int = 0
+  cache_misses: int = 0
+  parse: ParseStats = ParseStats()
+
+
+class _ParseStatsRecorder:
+  """Thread-safe accumulator behind Resolver.parse_stats."""
+
+  def __init__(self):
+    self._stats = ParseStats()
+    self._lock = threading.Lock()
+
+  def __getstate__(self) -> dict:
+    state = self.__dict__.copy()
+    del state["_lock"]
+    return state
+
+  def __setstate__(self, state: dict) -> None:
+    self.__dict__.update(state)
+    self._lock = threading.Lock()
+
+  def record(self, seconds: float) -> None:
+    with self._lock:
+      stats = self._stats
+      self._stats = dataclasses.replace(
+          stats,
+          chunks=stats.chunks + 1,
+          total_seconds=stats.total_seconds + seconds,
+          max_seconds=max(stats.max_seconds, seconds),
+          last_seconds=seconds,
+      )
+
+  def record_salvage(self, result: fh.SalvageResult) -> None:
+    with self._lock:
+      stats = self._stats
+      self._stats = dataclasses.replace(
+          stats,
+          salvaged_chunks=stats.salvaged_chunks + 1,
+          salvaged_items=stats.salvaged_items + result.salvaged,
+          dropped_items=stats.dropped_items + result.dropped,
+      )
+
+  def merge(self, other: ParseStats) -> None:
+    with self._lock:
+      stats = self._stats
+      self._stats = ParseStats(
+          chunks=stats.chunks + other.chunks,
+          total_seconds=stats.total_seconds + other.total_seconds,
+          max_seconds=max(stats.max_seconds, other.max_seconds),
+          last_seconds=(
+              other.last_seconds if other.chunks else stats.last_seconds
+          ),
+          salvaged_chunks=stats.salvaged_chunks + other.salvaged_chunks,
+          salvaged_items=stats.salvaged_items + other.salvaged_items,
+          dropped_items=stats.dropped_items + other.dropped_items,
+      )
+
+  def stats(self) -> ParseStats:
+    with self._lock:
+      return self._stats
+
+  def take(self) -> ParseStats:
+    """Returns the accumulated stats and resets them."""
+    with self._lock:
+      stats, self._stats = self._stats, ParseStats()
+      return stats
+
+  def reset(self) -> None:
+    with self._lock:
+      self._stats = ParseStats()
+
+
+# Cached alignment relative to the chunk: (token_start, token_end, status), or
+# None when the extraction could not be aligned.
+_CachedAlignment = tuple[int, int, data.AlignmentStatus] | None
+
+# Cached alignments of all extractions of a chunk, in extraction order.
+_CachedChunkAlignment = tuple[_CachedAlignment, ...]
+
+_CACHE_MISS = object()
+
+
+class _AlignmentCache:
+  """Thread-safe bounded LRU cache of alignments relative to their chunk."""
+
+  def __init__(self, maxsize: int):
+    self._maxsize = maxsize
+    self._entries: collections.OrderedDict[tuple, _CachedChunkAlignment] = (
+        collections.OrderedDict()
+    )
+    self._hits = 0
+    self._misses = 0
+    self._lock = threading.Lock()
+
+  def __getstate__(self) -> dict:
+    state = self.__dict__.copy()
+    del state["_lock"]
+    return state
+
+  def __setstate__(self, state: dict) -> None:
+    self.__dict__.update(state)
+    self._lock = threading.Lock()
+
+  def get(self, key: tuple) -> _CachedChunkAlignment | object:
+    """Returns the cached alignment for key, or _CACHE_MISS."""
+    with self._lock:
+      if key in self._entries:
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return self._entries[key]
+      self._misses += 1
+      return _CACHE_MISS
+
+  def put(self, key: tuple, value: _CachedChunkAlignment) -> None:
+    with self._lock:
+      self._entries[key] = value
+      self._entries.move_to_end(key)
+      while len(self._entries) > self._maxsize:
+        self._entries.popitem(last=False)
+
+  def info(self) -> AlignmentCacheInfo:
+    with self._lock:
+      return AlignmentCacheInfo(
+          hits=self._hits,
+          misses=self._misses,
+          maxsize=self._maxsize,
+          currsize=len(self._entries),
+      )
+
+  def take_counters(self) -> tuple[int, int]:
+    """Returns (hits, misses) and resets them, keeping the entries."""
+    with self._lock:
+      counters = (self._hits, self._misses)
+      self._hits = 0
+      self._misses = 0
+      return counters
+
+  def add_counters(self, hits: int, misses: int) -> None:
+    with self._lock:
+      self._hits += hits
+      self._misses += misses
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+      self._hits = 0
+      self._misses = 0
+
+
 class Resolver(AbstractResolver):
   """Resolver for YAML/JSON-based information extraction.
 
@@ -181,6 +403,8 @@ class Resolver(AbstractResolver):
       self,
       format_handler: fh.FormatHandler | None = None,
       extraction_index_suffix: str | None = None,
+      alignment_cache_size: int = 0,
+      salvage_partial_output: bool = False,
       **kwargs,  # Collect legacy parameters
   ):
     """Constructor.
@@ -189,6 +413,19 @@ class Resolver(AbstractResolver):
       format_handler: The format handler that knows how to parse output.
       extraction_index_suffix: Suffix identifying index keys that determine the
         ordering of extractions.
+      alignment_cache_size: Maximum number of chunk alignments kept in an LRU
+        cache keyed by the chunk's normalized text, the ordered extraction
+        texts and the alignment parameters. Exact and fuzzy placement depend
+        on the sibling extractions, so only a chunk whose whole extraction
+        list repeats, e.g. across extraction passes or boilerplate chunks,
+        skips re-alignment, and then gets the same spans as a fresh
+        alignment. 0 disables the cache. Each resolve worker process keeps
+        its own cache; its hit and miss counters are merged into
+        alignment_cache_info().
+      salvage_partial_output: When the model output fails to parse, e.g.
+        because generation stopped at max_tokens mid-array, recover the
+        complete extractions it contains instead of failing the chunk. Counts
+        of salvaged and dropped items are reported by parse_stats().
       **kwargs: Legacy parameters (fence_output, format_type, etc.) for backward
         compatibility. These will be used to create a FormatHandler if one is not
         provided. Support for these parameters will be removed in v2.0.0.
@@ -229,6 +466,46 @@ class Resolver(AbstractResolver):
     self.format_handler = format_handler
     self.extraction_index_suffix = extraction_index_suffix
     self._constraint = constraint
+    self._alignment_cache = (
+        _AlignmentCache(alignment_cache_size)
+        if alignment_cache_size > 0
+        else None
+    )
+    self.salvage_partial_output = salvage_partial_output
+    self._parse_stats = _ParseStatsRecorder()
+
+  def alignment_cache_info(self) -> AlignmentCacheInfo:
+    """Returns hit/miss counters of the alignment cache.
+
+    Hits and misses include those merged from resolve worker processes;
+    currsize is the size of this process's cache.
+    """
+    if self._alignment_cache is None:
+      return AlignmentCacheInfo()
+    return self._alignment_cache.info()
+
+  def parse_stats(self) -> ParseStats:
+    """Returns the accumulated timing of model output parsing."""
+    return self._parse_stats.stats()
+
+  def take_stats(self) -> ResolverStats:
+    """Returns the counters accumulated since the last call and resets them.
+
+    Used by resolve worker processes to hand their counters to the parent
+    resolver, which adds them with merge_stats(). Cached alignments are kept.
+    """
+    hits = misses = 0
+    if self._alignment_cache is not None:
+      hits, misses = self._alignment_cache.take_counters()
+    return ResolverStats(
+        cache_hits=hits, cache_misses=misses, parse=self._parse_stats.take()
+    )
+
+  def merge_stats(self, stats: ResolverStats) -> None:
+    """Adds counters taken from another resolver, e.g. a worker process."""
+    if self._alignment_cache is not None:
+      self._alignment_cache.add_counters(stats.cache_hits, stats.cache_misses)
+    self._parse_stats.merge(stats.parse)
 
   def resolve(
       self,
@@ -256,18 +533,45 @@ class Resolver(AbstractResolver):
     try:
       constraint = getattr(self, "_constraint", schema.Constraint())
       strict = getattr(constraint, "strict", False)
-      extraction_data = self.format_handler.parse_output(
-          input_text, strict=strict
-      )
+      parse_start = time.perf_counter()
+      try:
+        extraction_data = self.format_handler.parse_output(
+            input_text, strict=strict
+        )
+      finally:
+        parse_seconds = time.perf_counter() - parse_start
+        self._parse_stats.record(parse_seconds)
+        logging.debug(
+            "Parsed %d chars of %s output in %.3f ms.",
+            len(input_text),
+            self.format_handler.format_type.value,
+            parse_seconds * 1e3,
+        )
       logging.debug("Parsed content: %s", extraction_data)
 
     except exceptions.FormatError as e:
-      if suppress_parse_errors:
+      salvage = (
+          self.format_handler.salvage_output(input_text)
+          if self.salvage_partial_output
+          else None
+      )
+      if salvage is not None and salvage.items:
+        self._parse_stats.record_salvage(salvage)
+        logging.warning(
+            "Salvaged %d extraction(s) from unparseable output (%d dropped):"
+            " %s",
+            salvage.salvaged,
+            salvage.dropped,
+            e,
+        )
+        extraction_data = salvage.items
+      elif suppress_parse_errors:
         logging.exception(
             "Failed to parse input_text: %s, error: %s", input_text, e
         )
         return []
-      raise ResolverParsingError(str(e)) from e
+      else:
+        raise ResolverParsingError(str(e)) from e
 
     processed_extractions = self.extract_ordered_extractions(extraction_data)
 
@@ -284,13 +588,14 @@ class Resolver(AbstractResolver):
       enable_fuzzy_alignment: bool = True,
       fuzzy_alignment_threshold: float = _FUZZY_ALIGNMENT_MIN_THRESHOLD,
       accept_match_lesser: bool = True,
+      fuzzy_alignment_top_k: int | None = None,
       **kwargs,
   ) -> Iterator[data.Extraction]:
     """Aligns annotated extractions with source text.
 
-    This uses WordAligner which is based on Python's difflib SequenceMatcher to
-    match tokens in the source text with tokens from the annotated extractions.
-    If
+    This uses WordAligner, which first places verbatim extractions by direct
+    substring search and then uses Python's difflib SequenceMatcher to match
+    tokens in the source text with tokens from the remaining extractions. If
     the extraction order is significantly different from the source text order,
     difflib may skip some matches, leaving certain extractions unmatched.
 
@@ -304,6 +609,9 @@ class Resolver(AbstractResolver):
         alignment.
       accept_match_lesser: Whether to accept partial exact matches (MATCH_LESSER
         status).
+      fuzzy_alignment_top_k: Maximum number of candidate windows scored per
+        extraction during fuzzy alignment. None scores every candidate that
+        can still beat the best ratio.
       **kwargs: Additional parameters.
 
     Yields:
@@ -320,7 +628,26 @@ class Resolver(AbstractResolver):
     else:
       extractions_group = [extractions]
 
+    if self.format_handler.span_anchor_length is not None:
+      self._expand_span_anchors(extractions, source_text)
+
     aligner = WordAligner()
+
+    if self._alignment_cache is not None:
+      yield from self._align_with_cache(
+          aligner,
+          extractions,
+          source_text,
+          token_offset,
+          char_offset or 0,
+          enable_fuzzy_alignment=enable_fuzzy_alignment,
+          fuzzy_alignment_threshold=fuzzy_alignment_threshold,
+          accept_match_lesser=accept_match_lesser,
+          fuzzy_alignment_top_k=fuzzy_alignment_top_k,
+      )
+      logging.info("Completed alignment process for the provided source_text.")
+      return
+
     aligned_yaml_extractions = aligner.align_extractions(
         extractions_group,
         source_text,
@@ -329,6 +656,7 @@ class Resolver(AbstractResolver):
         enable_fuzzy_alignment=enable_fuzzy_alignment,
         fuzzy_alignment_threshold=fuzzy_alignment_threshold,
         accept_match_lesser=accept_match_lesser,
+        fuzzy_alignment_top_k=fuzzy_alignment_top_k,
     )
     logging.debug(
         "Aligned extractions count: %d",
@@ -341,6 +669,127 @@ class Resolver(AbstractResolver):
 
     logging.info("Completed alignment process for the provided source_text.")
 
+  def _expand_span_anchors(
+      self, extractions: Sequence[data.Extraction], source_text: str
+  ) -> None:
+    """Replaces "<head>...<tail>" extraction texts with their source span.
+
+    Anchors that cannot be verified against the chunk are left unchanged and
+    go through regular (fuzzy) alignment.
+
+    Args:
+      extractions: Extractions of one chunk, updated in place.
+      source_text: The text chunk the extractions came from.
+    """
+    expanded = 0
+    for extraction in extractions:
+      span = self.format_handler.expand_span_anchor(
+          extraction.extraction_text, source_text
+      )
+      if span is not None:
+        extraction.extraction_text = span
+        expanded += 1
+    if expanded:
+      logging.debug(
+          "Expanded %d of %d span anchors.", expanded, len(extractions)
+      )
+
+  def _align_with_cache(
+      self,
+      aligner: WordAligner,
+      extractions: Sequence[data.Extraction],
+      source_text: str,
+      token_offset: int,
+      char_offset: int,
+      **alignment_params,
+  ) -> Iterator[data.Extraction]:
+    """Aligns extractions, reusing the cached alignment of identical chunks.
+
+    The key covers the chunk and every extraction text in order, because the
+    aligner places each extraction relative to its siblings. Alignments are
+    cached relative to the chunk as token intervals. Char intervals are
+    rebuilt from the chunk's own tokens, so chunks that only differ in case or
+    whitespace share entries safely.
+
+    Args:
+      aligner: Aligner used for cache misses.
+      extractions: Annotated extractions.
+      source_text: The text chunk in which to align the extractions.
+      token_offset: The starting token index of the chunk.
+      char_offset: The starting character index of the chunk.
+      **alignment_params: Keyword arguments for WordAligner.align_extractions.
+
+    Yields:
+      Aligned extractions, in input order.
+    """
+    assert self._alignment_cache is not None
+    tokenized_text = tokenizer.tokenize(source_text)
+    normalized_text = " ".join(
+        source_text[t.char_interval.start_pos : t.char_interval.end_pos]
+        for t in tokenized_text.tokens
+    ).lower()
+    chunk_key = hashlib.blake2b(
+        normalized_text.encode("utf-8"), digest_size=16
+    ).digest()
+    params_key = tuple(sorted(alignment_params.items()))
+
+    def _apply(extraction: data.Extraction, cached: _CachedAlignment) -> None:
+      if cached is None:
+        extraction.token_interval = None
+        extraction.char_interval = None
+        extraction.alignment_status = None
+        return
+      start, end, status = cached
+      extraction.token_interval = tokenizer.TokenInterval(
+          start_index=start + token_offset,
+          end_index=end + token_offset,
+      )
+      extraction.char_interval = data.CharInterval(
+          start_pos=char_offset
+          + tokenized_text.tokens[start].char_interval.start_pos,
+          end_pos=char_offset
+          + tokenized_text.tokens[end - 1].char_interval.end_pos,
+      )
+      extraction.alignment_status = status
+
+    key = (
+        chunk_key,
+        tuple(extraction.extraction_text for extraction in extractions),
+        params_key,
+    )
+    cached_chunk = self._alignment_cache.get(key)
+    hit = cached_chunk is not _CACHE_MISS
+    if not hit:
+      aligner.align_extractions(
+          [list(extractions)],
+          source_text,
+          token_offset=0,
+          char_offset=0,
+          **alignment_params,
+      )
+      cached_chunk = tuple(
+          (
+              extraction.token_interval.start_index,
+              extraction.token_interval.end_index,
+              extraction.alignment_status,
+          )
+          if extraction.token_interval is not None
+          and extraction.alignment_status is not None
+          else None
+          for extraction in extractions
+      )
+      self._alignment_cache.put(key, cached_chunk)
+    for extraction, cached in zip(extractions, cached_chunk):
+      _apply(extraction, cached)
+
+    logging.debug(
+        "Alignment cache %s for %d extractions (%s).",
+        "hit" if hit else "miss",
+        len(extractions),
+        self._alignment_cache.info(),
+    )
+    yield from extractions
+
   def string_to_extraction_data(
       self,
       input_string: str,
@@ -478,29 +927,135 @@ class Resolver(AbstractResolver):
     return processed_extractions
 
 
+@dataclasses.dataclass(frozen=True)
+class _TokenIdIndex:
+  """Normalized source tokens of a chunk mapped to integer ids.
+
+  Attributes:
+    vocab: Mapping from normalized token to its integer id.
+    ids: Integer id of every source token, in source order.
+  """
+
+  vocab: dict[str, int]
+  ids: np.ndarray
+
+
+def _build_token_id_index(source_tokens: Sequence[str]) -> _TokenIdIndex:
+  """Maps the normalized source tokens to integer ids for vectorized scoring."""
+  vocab: dict[str, int] = {}
+  ids = [
+      vocab.setdefault(_normalize_token(token), len(vocab))
+      for token in source_tokens
+  ]
+  return _TokenIdIndex(vocab=vocab, ids=np.asarray(ids, dtype=np.int64))
+
+
+def _fuzzy_candidate_windows(
+    extraction_tokens_norm: Sequence[str],
+    token_index: _TokenIdIndex,
+    min_overlap: int,
+) -> Iterator[tuple[int, int, int]]:
+  """Yields fuzzy alignment candidate windows ordered by token overlap.
+
+  The overlap of a window is the size of the multiset intersection between the
+  extraction tokens and the window tokens, which is an upper bound on the
+  number of tokens SequenceMatcher can match. It is computed for all positions
+  of a window size at once from per-token cumulative counts over the source,
+  and candidates are generated lazily, one overlap tier at a time.
+
+  Args:
+    extraction_tokens_norm: Normalized extraction tokens.
+    token_index: Integer ids of the normalized source tokens.
+    min_overlap: Windows with a smaller overlap are discarded.
+
+  Yields:
+    (overlap, window_size, start_idx) tuples, highest overlap first. Ties are
+    ordered by window size, then start index, matching the scan order of the
+    pure Python path.
+  """
+  len_e = len(extraction_tokens_norm)
+  num_tokens = len(token_index.ids)
+  if not len_e or num_tokens < len_e:
+    return
+
+  extraction_counts = collections.Counter(extraction_tokens_norm)
+  term_ids = np.asarray(
+      [token_index.vocab.get(token, -1) for token in extraction_counts],
+      dtype=np.int64,
+  )
+  caps = np.asarray(list(extraction_counts.values()), dtype=np.int64)[:, None]
+  max_overlap = int(caps[term_ids >= 0].sum())
+
+  # prefix[k, p] counts occurrences of extraction term k in source[:p].
+  prefix = np.zeros((len(term_ids), num_tokens + 1), dtype=np.int64)
+  np.cumsum(
+      token_index.ids[None, :] == term_ids[:, None], axis=1, out=prefix[:, 1:]
+  )
+
+  def window_overlaps(window_size: int) -> np.ndarray:
+    window_counts = prefix[:, window_size:] - prefix[:, :-window_size]
+    return np.minimum(window_counts, caps).sum(axis=0)
+
+  # A window contains the smaller window at the same start, so the best
+  # overlap over all starts never decreases with the window size. Record the
+  # smallest window size reaching each overlap; larger sizes reach it too.
+  first_size: dict[int, int] = {}
+  best = min_overlap - 1
+  for window_size in range(len_e, num_tokens + 1):
+    top = int(window_overlaps(window_size).max())
+    while best < top:
+      best += 1
+      first_size[best] = window_size
+    if best >= max_overlap:
+      break
+
+  # Candidates are produced lazily, one overlap tier and window size at a
+  # time, so memory stays linear in the chunk length.
+  for overlap in range(best, min_overlap - 1, -1):
+    for window_size in range(first_size[overlap], num_tokens + 1):
+      (window_starts,) = np.nonzero(window_overlaps(window_size) == overlap)
+      for start_idx in window_starts.tolist():
+        yield overlap, window_size, start_idx
+
+
 class WordAligner:
   """Aligns words between two sequences of tokens using Python's difflib."""
 
-  def __init__(self):
-    """Initialize the WordAligner with difflib SequenceMatcher."""
-    self.matcher = difflib.SequenceMatcher(autojunk=False)
-    self.source_tokens: Sequence[str] | None = None
-    self.extraction_tokens: Sequence[str] | None = None
+  def __init__(self, use_numpy: bool = True):
+    """Initialize the WordAligner.
 
-  def _set_seqs(
+    Args:
+      use_numpy: Whether to use the vectorized NumPy candidate pre-filter for
+        fuzzy alignment. Ignored when NumPy is not installed.
+    """
+    self.use_numpy = use_numpy and np is not None
+
+  def _get_matching_blocks(
       self,
       source_tokens: Sequence[str] | Iterator[str],
       extraction_tokens: Sequence[str] | Iterator[str],
-  ):
-    """Sets the source and extraction tokens for alignment.
+  ) -> Sequence[tuple[int, int, int]]:
+    """Utilizes difflib SequenceMatcher and returns matching blocks of tokens.
+
+    A new SequenceMatcher is created per call and no per-call state is kept on
+    the aligner, so a single WordAligner can be shared across threads.
 
     Args:
       source_tokens: A nonempty sequence or iterator of word-level tokens from
         source text.
       extraction_tokens: A nonempty sequence or iterator of extraction tokens in
         order for matching to the source.
-    """
 
+    Returns:
+      Sequence of matching blocks between source_tokens (S) and
+      extraction_tokens
+      (E). Each block (i, j, n) conforms to: S[i:i+n] == E[j:j+n], guaranteed to
+      be monotonically increasing in j. Final entry is a dummy with value
+      (len(S), len(E), 0).
+
+    Raises:
+      ValueError: If either token sequence is empty.
+    """
     if isinstance(source_tokens, Iterator):
       source_tokens = list(source_tokens)
     if isinstance(extraction_tokens, Iterator):
@@ -509,26 +1064,10 @@ class WordAligner:
     if not source_tokens or not extraction_tokens:
       raise ValueError("Source tokens and extraction tokens cannot be empty.")
 
-    self.source_tokens = source_tokens
-    self.extraction_tokens = extraction_tokens
-    self.matcher.set_seqs(a=source_tokens, b=extraction_tokens)
-
-  def _get_matching_blocks(self) -> Sequence[tuple[int, int, int]]:
-    """Utilizes difflib SequenceMatcher and returns matching blocks of tokens.
-
-    Returns:
-      Sequence of matching blocks between source_tokens (S) and
-      extraction_tokens
-      (E). Each block (i, j, n) conforms to: S[i:i+n] == E[j:j+n], guaranteed to
-      be monotonically increasing in j. Final entry is a dummy with value
-      (len(S), len(E), 0).
-    """
-    if self.source_tokens is None or self.extraction_tokens is None:
-      raise ValueError(
-          "Source tokens and extraction tokens must be set before getting"
-          " matching blocks."
-      )
-    return self.matcher.get_matching_blocks()
+    matcher = difflib.SequenceMatcher(
+        autojunk=False, a=source_tokens, b=extraction_tokens
+    )
+    return matcher.get_matching_blocks()
 
   def _fuzzy_align_extraction(
       self,
@@ -538,6 +1077,8 @@ class WordAligner:
       token_offset: int,
       char_offset: int,
       fuzzy_alignment_threshold: float = _FUZZY_ALIGNMENT_MIN_THRESHOLD,
+      token_index: _TokenIdIndex | None = None,
+      top_k: int | None = None,
   ) -> data.Extraction | None:
     """Fuzzy-align an extraction using difflib.SequenceMatcher on tokens.
 
@@ -548,6 +1089,10 @@ class WordAligner:
     `fuzzy_alignment_threshold`. This only runs on unmatched extractions, which
     is usually a small subset of the total extractions.
 
+    With NumPy available, the token-count intersection is computed for all
+    windows at once and candidates are scored best-first, stopping as soon as
+    no remaining window can beat the best ratio found so far.
+
     Args:
       extraction: The extraction to align.
       source_tokens: The tokens from the source text.
@@ -555,6 +1100,12 @@ class WordAligner:
       token_offset: The token offset of the current chunk.
       char_offset: The character offset of the current chunk.
       fuzzy_alignment_threshold: The minimum ratio for a fuzzy match.
+      token_index: Integer ids of the normalized source tokens, built once per
+        chunk. Computed on demand when the NumPy path is enabled and it is not
+        provided.
+      top_k: Maximum number of candidate windows to score with
+        SequenceMatcher on the NumPy path. None scores every candidate that
+        can still beat the best ratio.
 
     Returns:
       The aligned data.Extraction if successful, None otherwise.
@@ -586,45 +1137,74 @@ class WordAligner:
 
     matcher = difflib.SequenceMatcher(autojunk=False, b=extraction_tokens_norm)
 
-    for window_size in range(len_e, max_window + 1):
-      if window_size > len(source_tokens):
-        break
-
-      # Initialize for sliding window
-      window_deque = collections.deque(source_tokens[0:window_size])
-      window_counts = collections.Counter(
-          [_normalize_token(t) for t in window_deque]
+    if self.use_numpy:
+      if token_index is None:
+        token_index = _build_token_id_index(source_tokens)
+      candidates = _fuzzy_candidate_windows(
+          extraction_tokens_norm, token_index, min_overlap
       )
+      for overlap, window_size, start_idx in itertools.islice(
+          candidates, top_k
+      ):
+        # Candidates are sorted by overlap, an upper bound on the ratio.
+        if overlap / len_e < best_ratio:
+          break
+        window_tokens_norm = [
+            _normalize_token(t)
+            for t in source_tokens[start_idx : start_idx + window_size]
+        ]
+        matcher.set_seq1(window_tokens_norm)
+        matches = sum(size for _, _, size in matcher.get_matching_blocks())
+        ratio = matches / len_e
+        # Equal ratios keep the earliest window in scan order.
+        if ratio > best_ratio or (
+            best_span is not None
+            and ratio == best_ratio
+            and (window_size, start_idx) < (best_span[1], best_span[0])
+        ):
+          best_ratio = ratio
+          best_span = (start_idx, window_size)
+    else:
+      for window_size in range(len_e, max_window + 1):
+        if window_size > len(source_tokens):
+          break
+
+        # Initialize for sliding window
+        window_deque = collections.deque(source_tokens[0:window_size])
+        window_counts = collections.Counter(
+            [_normalize_token(t) for t in window_deque]
+        )
 
-      for start_idx in range(len(source_tokens) - window_size + 1):
-        # Optimization: check if enough overlapping tokens exist before expensive
-        # sequence matching. This is an upper bound on the match count.
-        if (extraction_counts & window_counts).total() >= min_overlap:
-          window_tokens_norm = [_normalize_token(t) for t in window_deque]
-          matcher.set_seq1(window_tokens_norm)
-          matches = sum(size for _, _, size in matcher.get_matching_blocks())
-          if len_e > 0:
-            ratio = matches / len_e
-          else:
-            ratio = 0.0
-          if ratio > best_ratio:
-            best_ratio = ratio
-            best_span = (start_idx, window_size)
-
-        # Slide the window to the right
-        if start_idx + window_size < len(source_tokens):
-          # Remove the leftmost token from the count
-          old_token = window_deque.popleft()
-          old_token_norm = _normalize_token(old_token)
-          window_counts[old_token_norm] -= 1
-          if window_counts[old_token_norm] == 0:
-            del window_counts[old_token_norm]
-
-          # Add the new rightmost token to the deque and count
-          new_token = source_tokens[start_idx + window_size]
-          window_deque.append(new_token)
-          new_token_norm = _normalize_token(new_token)
-          window_counts[new_token_norm] += 1
+        for start_idx in range(len(source_tokens) - window_size + 1):
+          # Optimization: check if enough overlapping tokens exist before
+          # expensive sequence matching. This is an upper bound on the match
+          # count.
+          if (extraction_counts & window_counts).total() >= min_overlap:
+            window_tokens_norm = [_normalize_token(t) for t in window_deque]
+            matcher.set_seq1(window_tokens_norm)
+            matches = sum(size for _, _, size in matcher.get_matching_blocks())
+            if len_e > 0:
+              ratio = matches / len_e
+            else:
+              ratio = 0.0
+            if ratio > best_ratio:
+              best_ratio = ratio
+              best_span = (start_idx, window_size)
+
+          # Slide the window to the right
+          if start_idx + window_size < len(source_tokens):
+            # Remove the leftmost token from the count
+            old_token = window_deque.popleft()
+            old_token_norm = _normalize_token(old_token)
+            window_counts[old_token_norm] -= 1
+            if window_counts[old_token_norm] == 0:
+              del window_counts[old_token_norm]
+
+            # Add the new rightmost token to the deque and count
+            new_token = source_tokens[start_idx + window_size]
+            window_deque.append(new_token)
+            new_token_norm = _normalize_token(new_token)
+            window_counts[new_token_norm] += 1
 
     if best_span and best_ratio >= fuzzy_alignment_threshold:
       start_idx, window_size = best_span
@@ -652,6 +1232,83 @@ class WordAligner:
 
     return None
 
+  def _align_exact_substrings(
+      self,
+      extractions: Sequence[data.Extraction],
+      source_tokens: Sequence[str],
+      tokenized_text: tokenizer.TokenizedText,
+      token_offset: int,
+      char_offset: int,
+  ) -> list[data.Extraction]:
+    """Aligns verbatim extractions by direct search in the normalized text.
+
+    The source tokens are joined with single spaces into a normalized text,
+    and each extraction's normalized tokens are located in it with `str.find`,
+    accepting only hits on token boundaries. Extractions are placed in order
+    without overlap, mirroring the monotonic matching of the difflib path.
+    Extractions that cannot be placed after the previous match are left
+    untouched for the difflib path.
+
+    Args:
+      extractions: Extractions to align, in output order.
+      source_tokens: Lowercased tokens of the source text.
+      tokenized_text: The tokenized source text.
+      token_offset: The token offset of the current chunk.
+      char_offset: The character offset of the current chunk.
+
+    Returns:
+      The extractions that were aligned, with MATCH_EXACT status.
+    """
+    normalized_text = " ".join(source_tokens)
+    # Character offset in normalized_text where each token starts.
+    token_starts: list[int] = []
+    position = 0
+    for token in source_tokens:
+      token_starts.append(position)
+      position += len(token) + 1
+    start_to_token = {start: idx for idx, start in enumerate(token_starts)}
+
+    aligned = []
+    next_token = 0
+    for extraction in extractions:
+      if next_token >= len(source_tokens):
+        break
+      extraction_tokens = list(
+          _tokenize_with_lowercase(extraction.extraction_text)
+      )
+      if not extraction_tokens:
+        continue
+      needle = " ".join(extraction_tokens)
+
+      found = normalized_text.find(needle, token_starts[next_token])
+      while found != -1:
+        end = found + len(needle)
+        if found in start_to_token and (
+            end == len(normalized_text) or normalized_text[end] == " "
+        ):
+          break
+        found = normalized_text.find(needle, found + 1)
+      if found == -1:
+        continue
+
+      i = start_to_token[found]
+      n = len(extraction_tokens)
+      start_token = tokenized_text.tokens[i]
+      end_token = tokenized_text.tokens[i + n - 1]
+      extraction.token_interval = tokenizer.TokenInterval(
+          start_index=i + token_offset,
+          end_index=i + n + token_offset,
+      )
+      extraction.char_interval = data.CharInterval(
+          start_pos=char_offset + start_token.char_interval.start_pos,
+          end_pos=char_offset + end_token.char_interval.end_pos,
+      )
+      extraction.alignment_status = data.AlignmentStatus.MATCH_EXACT
+      aligned.append(extraction)
+      next_token = i + n
+
+    return aligned
+
   def align_extractions(
       self,
       extraction_groups: Sequence[Sequence[data.Extraction]],
@@ -662,6 +1319,7 @@ class WordAligner:
       enable_fuzzy_alignment: bool = True,
       fuzzy_alignment_threshold: float = _FUZZY_ALIGNMENT_MIN_THRESHOLD,
       accept_match_lesser: bool = True,
+      fuzzy_alignment_top_k: int | None = None,
   ) -> Sequence[Sequence[data.Extraction]]:
     """Aligns extractions with their positions in the source text.
 
@@ -688,6 +1346,8 @@ class WordAligner:
         (0-1).
       accept_match_lesser: Whether to accept partial exact matches (MATCH_LESSER
         status).
+      fuzzy_alignment_top_k: Maximum number of candidate windows scored per
+        extraction during fuzzy alignment. Only applies when NumPy is used.
 
     Returns:
       A sequence of extractions aligned with the source text, including token
@@ -710,17 +1370,7 @@ class WordAligner:
 
     logging.debug("Using delimiter %r for extraction alignment", delim)
 
-    extraction_tokens = _tokenize_with_lowercase(
-        f" {delim} ".join(
-            extraction.extraction_text
-            for extraction in itertools.chain(*extraction_groups)
-        )
-    )
-
-    self._set_seqs(source_tokens, extraction_tokens)
-
-    index_to_extraction_group = {}
-    extraction_index = 0
+    extraction_group_pairs: list[tuple[data.Extraction, int]] = []
     for group_index, group in enumerate(extraction_groups):
       logging.debug(
           "Processing extraction group %d with %d extractions.",
@@ -735,26 +1385,66 @@ class WordAligner:
               f" {extraction.extraction_text!r}. This would corrupt alignment"
               " mapping."
           )
-
-        index_to_extraction_group[extraction_index] = (extraction, group_index)
-        extraction_text_tokens = list(
-            _tokenize_with_lowercase(extraction.extraction_text)
-        )
-        extraction_index += len(extraction_text_tokens) + delim_len
+        extraction_group_pairs.append((extraction, group_index))
 
     aligned_extraction_groups: list[list[data.Extraction]] = [
         [] for _ in extraction_groups
     ]
     tokenized_text = tokenizer.tokenize(source_text)
 
-    # Track which extractions were aligned in the exact matching phase
-    aligned_extractions = []
+    # Fast path: place verbatim extractions by direct substring search, so
+    # difflib only runs on the extractions it cannot place.
+    aligned_extractions = self._align_exact_substrings(
+        [extraction for extraction, _ in extraction_group_pairs],
+        source_tokens,
+        tokenized_text,
+        token_offset,
+        char_offset,
+    )
+    fast_path_ids = {id(extraction) for extraction in aligned_extractions}
+    difflib_extractions = [
+        extraction
+        for extraction, _ in extraction_group_pairs
+        if id(extraction) not in fast_path_ids
+    ]
+    logging.debug(
+        "Substring fast path aligned %d of %d extractions.",
+        len(aligned_extractions),
+        len(extraction_group_pairs),
+    )
+
+    index_to_extraction_group = {}
+    extraction_index = 0
+    for extraction in difflib_extractions:
+      index_to_extraction_group[extraction_index] = extraction
+      extraction_text_tokens = list(
+          _tokenize_with_lowercase(extraction.extraction_text)
+      )
+      extraction_index += len(extraction_text_tokens) + delim_len
+
+    matching_blocks: Sequence[tuple[int, int, int]] = []
+    if difflib_extractions:
+      extraction_tokens = list(
+          _tokenize_with_lowercase(
+              f" {delim} ".join(
+                  extraction.extraction_text
+                  for extraction in difflib_extractions
+              )
+          )
+      )
+      # Leftover extractions without tokens cannot match; only surface the
+      # empty-input error when nothing was aligned at all.
+      if extraction_tokens or not aligned_extractions:
+        matching_blocks = self._get_matching_blocks(
+            source_tokens, extraction_tokens
+        )[:-1]
+
     exact_matches = 0
     lesser_matches = 0
 
     # Exact matching phase
-    for i, j, n in self._get_matching_blocks()[:-1]:
-      extraction, _ = index_to_extraction_group.get(j, (None, None))
+    for i, j, n in matching_blocks:
+      extraction = index_to_extraction_group.get(j)
       if extraction is None:
         logging.debug(
             "No clean start index found for extraction index=%d iterating"
@@ -808,7 +1498,7 @@ class WordAligner:
 
     # Collect unaligned extractions
     unaligned_extractions = []
-    for extraction, _ in index_to_extraction_group.values():
+    for extraction, _ in extraction_group_pairs:
       if extraction not in aligned_extractions:
         unaligned_extractions.append(extraction)
 
@@ -818,6 +1508,10 @@ class WordAligner:
           "Starting fuzzy alignment for %d unaligned extractions",
           len(unaligned_extractions),
       )
+      # Map source tokens to ids once per chunk, shared by all extractions.
+      token_index = (
+          _build_token_id_index(source_tokens) if self.use_numpy else None
+      )
       for extraction in unaligned_extractions:
         aligned_extraction = self._fuzzy_align_extraction(
             extraction,
@@ -826,6 +1520,8 @@ class WordAligner:
             token_offset,
             char_offset,
             fuzzy_alignment_threshold,
+            token_index=token_index,
+            top_k=fuzzy_alignment_top_k,
         )
         if aligned_extraction:
           aligned_extractions.append(aligned_extraction)
@@ -834,7 +1530,7 @@ class WordAligner:
               extraction.extraction_text,
           )
 
-    for extraction, group_index in index_to_extraction_group.values():
+    for extraction, group_index in extraction_group_pairs:
       aligned_extraction_groups[group_index].append(extraction)
 
     logging.debug(
@@ -1,9 +1,21 @@
-from neo4j import GraphDatabase
+import argparse
+import json
+import os
+import sqlite3
+
+import numpy as np
 import pandas as pd
 
+from graph_snapshot import FLAG_HAS_DEF, FLAG_HAS_FUNC, GraphSnapshot
+from graph_store import load_touched_nodes, open_store, save_touched_nodes
+from rarity_metrics import METRIC_NAMES, MetricContext, combine, compute_metrics, parse_weights
+
 # === 配置区 ===
 URI = "bolt://localhost:7687"
 AUTH = ("neo4j", "your password")  # ← 替换为你的密码
+GRAPH_BACKEND = "neo4j"  # neo4j、sqlite（json2neo4j.py --mode sqlite 写出的内嵌图）或 snapshot
+SQLITE_PATH = "kite_graph.db"
+SNAPSHOT_PATH = "kite_graph.snapshot"  # graph_snapshot.py export 导出的只读快照，多进程共享页缓存
 
 NODE_TYPE_WEIGHTS = {
     "Law":      1.5,
@@ -18,86 +30,336 @@ NODE_TYPE_WEIGHTS = {
 
 MIN_DEGREE = 1
 TOP_PERCENT = 0.8
+# 稀有度指标及权重（见 rarity_metrics.py）；只用 degree 时得分与原先完全一致，
+# 其余指标需要 snapshot 后端，组合时各指标先转为百分位秩再加权平均
+RARITY_METRICS = "degree=1"
+# 持久化得分表（SQLite，按得分建索引）：全量运行时重建，--incremental 只更新受影响节点后按索引取前 k 个
+SCORE_DB = "rare_scores.db"
 
-def fetch_rare_nodes():
-    driver = GraphDatabase.driver(URI, auth=AUTH)
-    
-    with driver.session() as session:
-        query = """
-        MATCH (n)
-        WHERE n.name IS NOT NULL
-        OPTIONAL MATCH (n)-[r_out]->()
-        WITH n, count(r_out) AS out_degree
-        OPTIONAL MATCH (n)<-[r_in]-()
-        WITH n, 
-             out_degree,
-             count(r_in) AS in_degree,
-             labels(n) AS labels,
-             coalesce(n.detailed_definition, '') <> '' AS has_def,
-             coalesce(n.function, '') <> '' AS has_func
-        RETURN 
-            elementId(n) AS element_id,
-            n.name AS name,
-            labels,
-            in_degree,
-            out_degree,
-            (in_degree + out_degree) AS total_degree,
-            has_def,
-            has_func
+def store_path():
+    return SNAPSHOT_PATH if GRAPH_BACKEND == "snapshot" else SQLITE_PATH
+
+# 度数表：列式数组，节点按下标对齐；element_id / name 按需取（快照后端只解码被选中的节点）
+# node_index 为各行在快照中的节点下标（仅快照后端），用于对齐全图指标
+class DegreeTable:
+    def __init__(self, in_degree, out_degree, label_codes, labels, has_def, has_func, element_id, name, node_index=None):
+        self.in_degree = np.asarray(in_degree, dtype=np.int64)
+        self.out_degree = np.asarray(out_degree, dtype=np.int64)
+        self.label_codes = np.asarray(label_codes, dtype=np.int64)
+        self.labels = list(labels)
+        self.has_def = np.asarray(has_def, dtype=bool)
+        self.has_func = np.asarray(has_func, dtype=bool)
+        self.element_id = element_id
+        self.name = name
+        self.node_index = node_index
+
+    def __len__(self):
+        return len(self.in_degree)
+
+    @property
+    def total_degree(self):
+        return self.in_degree + self.out_degree
+
+
+def degree_table(store) -> DegreeTable:
+    if isinstance(store, GraphSnapshot):
+        # 快照：度数直接由 CSR 行指针相减得到，全程向量化
+        nodes = np.flatnonzero(np.asarray(store.node_name) >= 0)  # 与 n.name IS NOT NULL 一致
+        flags = np.asarray(store.node_flags)[nodes]
+        return DegreeTable(
+            store.in_degrees()[nodes],
+            store.out_degrees()[nodes],
+            np.asarray(store.node_label)[nodes],
+            store.labels,
+            flags & FLAG_HAS_DEF,
+            flags & FLAG_HAS_FUNC,
+            lambda i: store.element_id(nodes[i]),
+            lambda i: store.name(nodes[i]),
+            nodes,
+        )
+
+    # Neo4j / SQLite：一次度数查询，结果按列收集
+    return records_table(store.node_degrees())
+
+
+def records_table(records) -> DegreeTable:
+    element_ids, names, in_deg, out_deg, codes, has_def, has_func = [], [], [], [], [], [], []
+    label_codes = {}
+    for rec in records:
+        main_label = rec["labels"][0] if rec["labels"] else "Unknown"
+        element_ids.append(rec["element_id"])
+        names.append(rec["name"])
+        in_deg.append(rec["in_degree"])
+        out_deg.append(rec["out_degree"])
+        codes.append(label_codes.setdefault(main_label, len(label_codes)))
+        has_def.append(rec["has_def"])
+        has_func.append(rec["has_func"])
+    return DegreeTable(
+        in_deg, out_deg, codes, sorted(label_codes, key=label_codes.get), has_def, has_func,
+        element_ids.__getitem__, names.__getitem__,
+    )
+
+
+# score = 1/度数 × 类型权重 × (1 + 0.3·有定义 + 0.2·有功能)，运算顺序与逐行计算一致，结果逐位相同
+def rarity_scores(table: DegreeTable) -> np.ndarray:
+    weights = np.array([NODE_TYPE_WEIGHTS.get(label, 1.0) for label in table.labels] or [1.0])
+    bonus = 1.0 + 0.3 * table.has_def + 0.2 * table.has_func
+    with np.errstate(divide="ignore"):
+        return (1.0 / table.total_degree) * weights[table.label_codes] * bonus
+
+
+# 按 RARITY_METRICS 计算 valid 行的得分；返回 (得分, {指标名: 原始值})，只用 degree 时不计算其他指标
+def metric_scores(store, table: DegreeTable, degree: np.ndarray, valid: np.ndarray, weights):
+    if set(weights) == {"degree"}:
+        return degree[valid], {}
+    if not isinstance(store, GraphSnapshot):
+        others = ", ".join(name for name in weights if name != "degree")
+        raise ValueError(f"指标 {others} 需要 snapshot 后端（先运行 graph_snapshot.py export）")
+
+    # 指标在快照全图上计算，再按 node_index 取回度数表中的行
+    n = store.num_nodes
+    full_degree = np.zeros(n)
+    full_degree[table.node_index] = degree
+    type_weights = np.array([NODE_TYPE_WEIGHTS.get(label, 1.0) for label in store.labels] or [1.0])
+    ctx = MetricContext(store, personalization=type_weights[np.asarray(store.node_label)], degree_scores=full_degree)
+    values, timings = compute_metrics(ctx, weights)
+    print("指标耗时: " + ", ".join(f"{name} {sec:.2f}s" for name, sec in timings.items()))
+    rows = table.node_index[valid]
+    values = {name: v[rows] for name, v in values.items()}
+    return combine(values, weights), values
+
+
+# 选出得分最高的 k 个下标（降序）：argpartition 取前 k，只对这 k 个排序；
+# 同分按下标（导出顺序）排列，边界上的同分节点也按下标取舍，结果确定
+def select_top(scores: np.ndarray, k: int) -> np.ndarray:
+    n = len(scores)
+    if k < n:
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[: k - len(above)]
+        top = np.concatenate([above, ties])
+    else:
+        top = np.arange(n)
+    return top[np.lexsort((top, -scores[top]))]
+
+
+# ---------- 持久化得分表 ----------
+# 只保存有效节点（total_degree >= MIN_DEGREE）；seq 为同分时的先后次序（全量重建时即度数表顺序，
+# 与 select_top 的同分规则一致），新节点追加在末尾。scores_rank 索引使取前 k 个无需排序
+SCORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    element_id TEXT PRIMARY KEY,
+    label TEXT NOT NULL,
+    name TEXT NOT NULL,
+    in_degree INTEGER NOT NULL,
+    out_degree INTEGER NOT NULL,
+    total_degree INTEGER NOT NULL,
+    has_def INTEGER NOT NULL,
+    has_func INTEGER NOT NULL,
+    score REAL NOT NULL,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_key ON scores (label, name);
+CREATE INDEX IF NOT EXISTS scores_rank ON scores (score DESC, seq);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# 影响得分的配置；与得分表中记录的不一致时增量结果不可用，需全量重建
+def score_config() -> str:
+    return json.dumps({"min_degree": MIN_DEGREE, "weights": NODE_TYPE_WEIGHTS, "metrics": RARITY_METRICS}, sort_keys=True)
+
+
+def _score_rows(table: DegreeTable, scores: np.ndarray, rows: np.ndarray):
+    for i in rows:
+        yield (
+            table.element_id(i), table.labels[table.label_codes[i]], table.name(i),
+            int(table.in_degree[i]), int(table.out_degree[i]), int(table.total_degree[i]),
+            int(table.has_def[i]), int(table.has_func[i]), float(scores[i]),
+        )
+
+
+def save_scores(path: str, table: DegreeTable, scores: np.ndarray, valid: np.ndarray):
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.executescript("DROP TABLE IF EXISTS scores; DROP TABLE IF EXISTS meta;")
+            conn.executescript(SCORE_SCHEMA)
+            conn.executemany(
+                "INSERT INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (row + (seq,) for seq, row in enumerate(_score_rows(table, scores, valid))),
+            )
+            conn.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("config", score_config()), ("count", str(len(valid))), ("next_seq", str(len(valid)))],
+            )
+    finally:
+        conn.close()
+
+
+def open_scores(path: str):
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+    except sqlite3.OperationalError:
+        meta = {}
+    if meta.get("config") != score_config():
+        conn.close()
+        return None
+    return conn
+
+
+# 重算受影响节点：删除其旧行，按最新度数写入仍有效的节点（已有节点保留原 seq）；返回 (更新数, 删除数)
+def update_scores(conn, store, keys) -> tuple:
+    table = records_table(store.degrees_of(keys))
+    scores = rarity_scores(table)
+    valid = np.flatnonzero(table.total_degree >= MIN_DEGREE)
+    meta = dict(conn.execute("SELECT key, value FROM meta"))
+    count, next_seq = int(meta["count"]), int(meta["next_seq"])
+    with conn:
+        old_seq = {}
+        for label, name in keys:
+            for element_id, seq in conn.execute(
+                "SELECT element_id, seq FROM scores WHERE label = ? AND name = ?", (label, name)
+            ):
+                old_seq[element_id] = seq
+        conn.executemany("DELETE FROM scores WHERE label = ? AND name = ?", list(keys))
+        rows = []
+        for row in _score_rows(table, scores, valid):
+            seq = old_seq.get(row[0])
+            if seq is None:
+                seq, next_seq = next_seq, next_seq + 1
+            rows.append(row + (seq,))
+        conn.executemany("INSERT INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        count += len(rows) - len(old_seq)
+        conn.executemany(
+            "UPDATE meta SET value = ? WHERE key = ?", [(str(count), "count"), (str(next_seq), "next_seq")]
+        )
+    return len(rows), len(old_seq) - len(set(old_seq) & {row[0] for row in rows})
+
+
+def top_scores(conn, k: int) -> pd.DataFrame:
+    rare_df = pd.read_sql_query(
         """
-        
-        result = session.run(query)
-        records = []
-        for rec in result:
-            total_deg = rec["total_degree"]
-            if total_deg < MIN_DEGREE:
-                continue
-                
-            main_label = rec["labels"][0] if rec["labels"] else "Unknown"
-            weight = NODE_TYPE_WEIGHTS.get(main_label, 1.0)
-            
-            base_score = 1.0 / total_deg
-            bonus = 1.0
-            if rec["has_def"]:
-                bonus += 0.3
-            if rec["has_func"]:
-                bonus += 0.2
-                
-            final_score = base_score * weight * bonus
-            
-            records.append({
-                "element_id": rec["element_id"],
-                "name": rec["name"],
-                "label": main_label,
-                "in_degree": rec["in_degree"],
-                "out_degree": rec["out_degree"],
-                "total_degree": total_deg,
-                "has_definition": rec["has_def"],
-                "has_function": rec["has_func"],
-                "score": final_score
-            })
-    
-    df = pd.DataFrame(records)
-    if df.empty:
-        print("⚠️ 未找到符合条件的节点，请检查Neo4j连接或节点属性")
-        return pd.DataFrame()
-        
-    df = df.sort_values(by="score", ascending=False).reset_index(drop=True)
-    num_top = max(1, int(len(df) * TOP_PERCENT))
-    rare_df = df.head(num_top)
-    
+        SELECT element_id, name, label, in_degree, out_degree, total_degree,
+               has_def AS has_definition, has_func AS has_function, score
+        FROM scores ORDER BY score DESC, seq LIMIT ?
+        """,
+        conn,
+        params=(k,),
+    )
+    return rare_df.astype({"has_definition": bool, "has_function": bool})
+
+
+def write_rare_nodes(rare_df: pd.DataFrame, num_valid: int):
     rare_df.to_csv("rare_nodes.csv", index=False, encoding='utf-8-sig')
     
     rare_element_ids = rare_df["element_id"].tolist()
     with open("rare_node_element_ids.txt", "w", encoding="utf-8") as f:
         f.write("\n".join(rare_element_ids))
     
-    print(f"✅ 共处理 {len(df)} 个有效节点，筛选出 {len(rare_df)} 个稀有节点")
+    print(f"✅ 共处理 {num_valid} 个有效节点，筛选出 {len(rare_df)} 个稀有节点")
     print("\n🔍 Top 5 稀有节点示例 (elementId 格式):")
     print(rare_df[["name", "label", "total_degree", "score", "element_id"]].head())
+
+
+def fetch_rare_nodes(store=None):
+    own_store = store is None
+    if own_store:
+        store = open_store(GRAPH_BACKEND, URI, AUTH, store_path())
+
+    weights = parse_weights(RARITY_METRICS)
+    try:
+        table = degree_table(store)
+        valid = np.flatnonzero(table.total_degree >= MIN_DEGREE)
+        if len(valid) == 0:
+            print("⚠️ 未找到符合条件的节点，请检查Neo4j连接或节点属性")
+            return pd.DataFrame()
+
+        scores, metric_values = metric_scores(store, table, rarity_scores(table), valid, weights)
+        num_top = max(1, int(len(valid) * TOP_PERCENT))
+        top = select_top(scores, num_top)
+        chosen = valid[top]
+
+        rare_df = pd.DataFrame({
+            "element_id": [table.element_id(i) for i in chosen],
+            "name": [table.name(i) for i in chosen],
+            "label": np.array(table.labels, dtype=object)[table.label_codes[chosen]],
+            "in_degree": table.in_degree[chosen],
+            "out_degree": table.out_degree[chosen],
+            "total_degree": table.total_degree[chosen],
+            "has_definition": table.has_def[chosen],
+            "has_function": table.has_func[chosen],
+            "score": scores[top],
+        })
+        for name, values in metric_values.items():
+            rare_df[f"{name}_score"] = values[top]
+        if not metric_values and SCORE_DB:
+            # 只用度数得分时可增量维护，保存全部有效节点的得分
+            full_scores = np.zeros(len(table))
+            full_scores[valid] = scores
+            save_scores(SCORE_DB, table, full_scores, valid)
+    finally:
+        if own_store:
+            store.close()
     
-    driver.close()
+    write_rare_nodes(rare_df, len(valid))
+    return rare_df
+
+
+# 增量模式：只重算受影响节点（导入时写出的清单，已包含变化关系的两端），更新得分表后按索引取前 k 个；
+# 耗时与变化量及 k 成正比。得分表不存在或配置变化时退回全量计算
+def refresh_rare_nodes(touched_path: str, store=None):
+    if set(parse_weights(RARITY_METRICS)) != {"degree"}:
+        raise ValueError("增量模式只支持 degree 指标，其余指标依赖全图结构，需全量计算")
+    conn = open_scores(SCORE_DB)
+    if conn is None:
+        print(f"得分表 {SCORE_DB} 不存在或配置已变化，改为全量计算")
+        rare_df = fetch_rare_nodes(store)
+        save_touched_nodes(touched_path, (), merge=False)
+        return rare_df
+
+    own_store = store is None
+    if own_store:
+        store = open_store(GRAPH_BACKEND, URI, AUTH, store_path())
+    try:
+        keys = sorted(load_touched_nodes(touched_path))
+        updated, deleted = update_scores(conn, store, keys)
+        print(f"增量更新: 受影响节点 {len(keys)} 个，更新 {updated}，移除 {deleted}")
+        num_valid = int(conn.execute("SELECT value FROM meta WHERE key = 'count'").fetchone()[0])
+        if num_valid == 0:
+            print("⚠️ 未找到符合条件的节点，请检查Neo4j连接或节点属性")
+            return pd.DataFrame()
+        rare_df = top_scores(conn, max(1, int(num_valid * TOP_PERCENT)))
+    finally:
+        conn.close()
+        if own_store:
+            store.close()
+
+    save_touched_nodes(touched_path, (), merge=False)
+    write_rare_nodes(rare_df, num_valid)
     return rare_df
 
 if __name__ == "__main__":
-    fetch_rare_nodes()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="按度数与类型权重筛选稀有节点")
+    parser.add_argument("--backend", choices=("neo4j", "sqlite", "snapshot"), default=GRAPH_BACKEND)
+    parser.add_argument("--sqlite-path", default=SQLITE_PATH)
+    parser.add_argument("--snapshot-path", default=SNAPSHOT_PATH)
+    parser.add_argument(
+        "--metrics", default=RARITY_METRICS,
+        help=f"指标=权重，逗号分隔，如 degree=1,idf=0.5,ppr=0.5；可选 {', '.join(METRIC_NAMES)}"
+             "（均为值越高越稀有，betweenness 为 1 - 归一化介数，枢纽节点得分低）",
+    )
+    parser.add_argument("--score-db", default=SCORE_DB, help="持久化得分表（SQLite），增量模式在其上更新")
+    parser.add_argument(
+        "--incremental", metavar="TOUCHED", default=None,
+        help="增量模式：读取 json2neo4j.py 写出的受影响节点清单（<data>.touched.json），只重算这些节点",
+    )
+    args = parser.parse_args()
+    GRAPH_BACKEND, SQLITE_PATH, SNAPSHOT_PATH = args.backend, args.sqlite_path, args.snapshot_path
+    RARITY_METRICS, SCORE_DB = args.metrics, args.score_db
+    if args.incremental:
+        refresh_rare_nodes(args.incremental)
+    else:
+        fetch_rare_nodes()
\ No newline at end of file
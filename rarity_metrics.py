@@ -0,0 +1,290 @@
+# 稀有度指标：在导出的邻接矩阵（graph_snapshot 的 CSR）上用 SciPy 稀疏矩阵计算，可加权组合
+#   degree       现有得分：1/度数 × 类型权重 × 定义/功能加成（由 rare_node 传入）
+#   idf          节点所在文档数的逆文档频率，只出现在少数文档中的节点得分高
+#   ppr          1 - 个性化 PageRank（按类型权重分配重启概率），远离图中心的节点得分高
+#   kcore        1 - k-core 编号 / 最大编号，处于图边缘层的节点得分高
+#   betweenness  1 - 抽样近似介数 / 最大值（Brandes，抽样源点 + 按层 BFS），很少位于最短路径上的节点得分高，
+#                桥接不同区域的枢纽节点得分低
+# 所有指标方向一致：值越高越稀有。组合时各指标先转为百分位秩（0~1，对重尾分布稳健），再按权重加权平均；权重可为负以反向使用
+import argparse
+import time
+from typing import Callable, Dict
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.stats import rankdata
+
+PPR_ALPHA = 0.85  # PageRank 阻尼系数
+PPR_TOL = 1e-8
+PPR_MAX_ITER = 100
+BETWEENNESS_SAMPLES = 256  # 介数抽样的源点数
+
+
+# 有向邻接矩阵 A[u, v] = 1 表示 u -> v（重复边合并）
+def adjacency_from_snapshot(snap) -> sp.csr_matrix:
+    n = snap.num_nodes
+    indptr = np.asarray(snap.out_indptr)
+    indices = np.asarray(snap.out_indices)
+    a = sp.csr_matrix((np.ones(len(indices), dtype=np.float64), indices, indptr), shape=(n, n))
+    a.sum_duplicates()
+    a.data[:] = 1.0
+    return a
+
+
+# 无向简单图：对称化、去自环、去重
+def undirected(a: sp.csr_matrix) -> sp.csr_matrix:
+    u = (a + a.T).tocsr()
+    u.setdiag(0)
+    u.eliminate_zeros()
+    u.data[:] = 1.0
+    return u
+
+
+def idf_scores(doc_counts: np.ndarray, num_documents: int) -> np.ndarray:
+    df = np.asarray(doc_counts, dtype=np.float64)
+    return np.log((1.0 + num_documents) / (1.0 + df)) + 1.0
+
+
+def personalized_pagerank(
+    a: sp.csr_matrix,
+    personalization: np.ndarray | None = None,
+    alpha: float = PPR_ALPHA,
+    tol: float = PPR_TOL,
+    max_iter: int = PPR_MAX_ITER,
+) -> np.ndarray:
+    n = a.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    p = np.ones(n) if personalization is None else np.asarray(personalization, dtype=np.float64)
+    p = p / p.sum()
+    out_deg = np.asarray(a.sum(axis=1)).ravel()
+    dangling = out_deg == 0
+    inv = np.divide(1.0, out_deg, out=np.zeros(n), where=~dangling)
+    pt = (sp.diags(inv) @ a).T.tocsr()  # 列随机转移矩阵的转置，x_next = alpha * P^T x + ...
+    x = p.copy()
+    for _ in range(max_iter):
+        x_next = alpha * (pt @ x + x[dangling].sum() * p) + (1.0 - alpha) * p
+        if np.abs(x_next - x).sum() < tol:
+            return x_next
+        x = x_next
+    return x
+
+
+# k-core 编号：按 k 递增逐层剥离度数小于 k 的节点；只对被剥离节点的行切片更新邻居度数
+def core_numbers(u: sp.csr_matrix) -> np.ndarray:
+    n = u.shape[0]
+    core = np.zeros(n, dtype=np.int64)
+    alive = np.ones(n, dtype=bool)
+    deg = np.diff(u.indptr).astype(np.int64)
+    k = 0
+    while alive.any():
+        k = max(k + 1, int(deg[alive].min()))
+        while True:
+            peel = np.flatnonzero(alive & (deg < k))
+            if not len(peel):
+                break
+            core[peel] = k - 1
+            alive[peel] = False
+            deg -= np.bincount(u[peel].indices, minlength=n)
+    return core
+
+
+# 抽样近似介数（无权无向图，Brandes）：对每个抽样源点做层同步 BFS；
+# 每层只切出当前层节点的行，在其边上做向量化累加，单个源点的代价与边数成正比
+def approx_betweenness(u: sp.csr_matrix, samples: int = BETWEENNESS_SAMPLES, seed: int = 0) -> np.ndarray:
+    n = u.shape[0]
+    bc = np.zeros(n)
+    if n == 0:
+        return bc
+    rng = np.random.default_rng(seed)
+    sources = rng.choice(n, size=min(samples, n), replace=False)
+    dist = np.empty(n, dtype=np.int32)
+    sigma = np.empty(n)
+    delta = np.empty(n)
+    mark = np.zeros(n, dtype=bool)  # 去重用，按布尔标记取下一层节点比 np.unique 快
+    for s in sources:
+        dist.fill(-1)
+        sigma.fill(0.0)
+        dist[s] = 0
+        sigma[s] = 1.0
+        levels = [np.array([s])]
+        while True:
+            nbrs = u[levels[-1]].indices
+            mark[nbrs[dist[nbrs] < 0]] = True
+            nbrs = np.flatnonzero(mark)
+            mark[nbrs] = False
+            if not len(nbrs):
+                break
+            d = len(levels)
+            dist[nbrs] = d
+            # sigma[w] = 上一层邻居的 sigma 之和
+            rows = u[nbrs]
+            on_prev = dist[rows.indices] == d - 1
+            contrib = np.where(on_prev, sigma[rows.indices], 0.0)
+            sigma[nbrs] = np.add.reduceat(contrib, rows.indptr[:-1]) if len(contrib) else 0.0
+            levels.append(nbrs)
+        delta.fill(0.0)
+        for d in range(len(levels) - 1, 0, -1):
+            # delta[v] += sigma[v] * sum((1 + delta[w]) / sigma[w])，w 为下一层邻居
+            parents = levels[d - 1]
+            rows = u[parents]
+            on_next = dist[rows.indices] == d
+            contrib = np.where(on_next, (1.0 + delta[rows.indices]) / sigma[rows.indices].clip(min=1.0), 0.0)
+            delta[parents] += sigma[parents] * np.add.reduceat(contrib, rows.indptr[:-1])
+        delta[s] = 0.0
+        bc += delta
+    return bc * (n / len(sources)) / 2.0  # 按抽样比例放大；无向图每条路径被两个端点各计一次
+
+
+# 百分位秩，0~1；常数列返回全 0
+def rank_normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) == 0 or np.all(x == x[0]):
+        return np.zeros(len(x))
+    r = rankdata(x, method="average")
+    return (r - 1.0) / (len(x) - 1.0)
+
+
+# 解析 "degree=1,idf=0.5" 形式的权重
+def parse_weights(spec: str) -> Dict[str, float]:
+    weights = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in METRIC_NAMES:
+            raise ValueError(f"未知指标 {name}，可选: {', '.join(METRIC_NAMES)}")
+        weights[name] = float(value) if value else 1.0
+    if not weights:
+        raise ValueError("至少需要一个指标")
+    return weights
+
+
+class MetricContext:
+    # 按需构建并缓存邻接矩阵，多个指标共用
+    def __init__(self, snap, personalization: np.ndarray | None = None, degree_scores: np.ndarray | None = None):
+        self.snap = snap
+        self.personalization = personalization
+        self.degree_scores = degree_scores
+        self._a = None
+        self._u = None
+
+    @property
+    def a(self) -> sp.csr_matrix:
+        if self._a is None:
+            self._a = adjacency_from_snapshot(self.snap)
+        return self._a
+
+    @property
+    def u(self) -> sp.csr_matrix:
+        if self._u is None:
+            self._u = undirected(self.a)
+        return self._u
+
+
+def _degree(ctx: MetricContext) -> np.ndarray:
+    if ctx.degree_scores is None:
+        raise ValueError("degree 指标需要 rare_node 计算的度数得分")
+    return ctx.degree_scores
+
+
+def _idf(ctx: MetricContext) -> np.ndarray:
+    return idf_scores(ctx.snap.doc_counts(), ctx.snap.num_documents())
+
+
+def _ppr(ctx: MetricContext) -> np.ndarray:
+    ppr = personalized_pagerank(ctx.a, ctx.personalization)
+    return 1.0 - ppr / ppr.max() if len(ppr) and ppr.max() > 0 else np.zeros(len(ppr))
+
+
+def _kcore(ctx: MetricContext) -> np.ndarray:
+    core = core_numbers(ctx.u)
+    return 1.0 - core / max(int(core.max(initial=0)), 1)
+
+
+def _betweenness(ctx: MetricContext) -> np.ndarray:
+    bc = approx_betweenness(ctx.u)
+    return 1.0 - bc / bc.max() if len(bc) and bc.max() > 0 else np.zeros(len(bc))
+
+
+METRICS: Dict[str, Callable[[MetricContext], np.ndarray]] = {
+    "degree": _degree,
+    "idf": _idf,
+    "ppr": _ppr,
+    "kcore": _kcore,
+    "betweenness": _betweenness,
+}
+METRIC_NAMES = tuple(METRICS)
+
+
+# 计算所需指标（全图节点），返回 {指标名: 原始值} 与每个指标的耗时
+def compute_metrics(ctx: MetricContext, names) -> tuple:
+    values, timings = {}, {}
+    for name in names:
+        started = time.perf_counter()
+        values[name] = np.asarray(METRICS[name](ctx), dtype=np.float64)
+        timings[name] = time.perf_counter() - started
+    return values, timings
+
+
+# 加权组合：各指标转为百分位秩后按权重加权平均
+def combine(values: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+    total = sum(abs(w) for w in weights.values()) or 1.0
+    combined = np.zeros(len(next(iter(values.values()))))
+    for name, w in weights.items():
+        combined += w * rank_normalize(values[name])
+    return combined / total
+
+
+# ---------------- 基准测试 ----------------
+
+# 合成幂律图：Chung-Lu 模型，期望度数服从指数为 gamma 的幂律
+class _SyntheticSnapshot:
+    def __init__(self, num_nodes: int, avg_degree: float, gamma: float, num_documents: int, seed: int):
+        rng = np.random.default_rng(seed)
+        w = (np.arange(1, num_nodes + 1) ** (-1.0 / (gamma - 1.0)))
+        w *= avg_degree * num_nodes / w.sum()
+        m = int(avg_degree * num_nodes / 2)
+        prob = w / w.sum()
+        src = rng.choice(num_nodes, size=m, p=prob)
+        dst = rng.choice(num_nodes, size=m, p=prob)
+        keep = src != dst
+        a = sp.csr_matrix((np.ones(keep.sum()), (src[keep], dst[keep])), shape=(num_nodes, num_nodes))
+        a.sum_duplicates()
+        self.num_nodes = num_nodes
+        self.out_indptr, self.out_indices = a.indptr, a.indices
+        self._doc_counts = rng.zipf(2.0, num_nodes).clip(max=num_documents)
+        self._num_documents = num_documents
+
+    def doc_counts(self):
+        return self._doc_counts
+
+    def num_documents(self):
+        return self._num_documents
+
+
+def benchmark(num_nodes: int, avg_degree: float, gamma: float, seed: int = 0):
+    started = time.perf_counter()
+    snap = _SyntheticSnapshot(num_nodes, avg_degree, gamma, max(num_nodes // 10, 1), seed)
+    ctx = MetricContext(snap)
+    nnz = ctx.u.nnz // 2
+    print(f"合成幂律图: {num_nodes} 个节点，{nnz} 条无向边，gamma={gamma}，构建 {time.perf_counter() - started:.2f}s")
+    names = [n for n in METRIC_NAMES if n != "degree"]
+    values, timings = compute_metrics(ctx, names)
+    for name in names:
+        print(f"  {name:<12} {timings[name]:>8.2f}s")
+    started = time.perf_counter()
+    combine(values, {n: 1.0 for n in names})
+    print(f"  {'combine':<12} {time.perf_counter() - started:>8.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="稀有度指标基准测试（合成幂律图）")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--avg-degree", type=float, default=8.0)
+    parser.add_argument("--gamma", type=float, default=2.5)
+    args = parser.parse_args()
+    for n in args.nodes:
+        benchmark(n, args.avg_degree, args.gamma)